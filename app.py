@@ -2,9 +2,31 @@
 
 from __future__ import annotations
 
+import logging
+import os
+import time
+
 import streamlit as st
 
-from lib.state import ensure_session_defaults, get_api_config
+from lib.autosave import autosave_enabled, get_autosaver
+from lib.cassette import get_cassette
+from lib.cluster import get_cluster
+from lib.credentials import get_credential_pool
+from lib.journal import get_journal, recover_after_election, recover_in_background
+from lib.memprof import (
+    format_bytes,
+    get_registry,
+    state_breakdown,
+    warn_threshold_bytes,
+)
+from lib.profiling import profile_run, profiling_enabled
+from lib.startup import record_first_render, startup_report, warm_up_in_background
+from lib.state import SESSION_KEYS, current_session_id, ensure_session_defaults, session_is_active
+from lib.watcher import get_watcher
+
+
+logger = logging.getLogger(__name__)
+MEMPROF_INTERVAL_S = 10
 
 
 st.set_page_config(
@@ -21,12 +43,173 @@ with st.sidebar:
     st.markdown(
         "Set `OPENAI_API_KEY` (and optional `OPENAI_BASE_URL`) in a `.env` file before running the app."
     )
+    cassette = get_cassette()
+    if cassette is not None:
+        cassette_stats = cassette.stats()
+        st.info(
+            f"API traffic is {'replayed from' if cassette.replaying else 'recorded to'} cassette "
+            f"`{cassette_stats['path']}`"
+            + (f" at {cassette_stats['speed']:g}x speed." if cassette.replaying and cassette_stats["speed"] else ".")
+        )
 
-cfg = get_api_config()
-st.session_state["has_api_key"] = bool(cfg.api_key)
+try:
+    credentials = get_credential_pool()
+except Exception as exc:  # malformed SORA_CREDENTIALS: bad JSON, missing file or key
+    st.error(f"Could not load API credentials from SORA_CREDENTIALS: {exc}")
+    st.stop()
+st.session_state["has_api_key"] = bool(len(credentials))
 
 create = st.Page("pages/create.py", title="Create", icon="🎬")
 jobs = st.Page("pages/jobs.py", title="Jobs", icon="📼")
+analytics = st.Page("pages/analytics.py", title="Analytics", icon="📊")
+
+pg = st.navigation([create, jobs, analytics])
+if profiling_enabled(st.query_params):
+    # Fragment reruns skip this file, so only full page runs are profiled.
+    with profile_run(pg.url_path or pg.title) as run_profile:
+        st.session_state["_profile_last"] = run_profile
+        pg.run()
+    with st.sidebar.expander(f"Run profile · {run_profile.wall_ms:.0f} ms", expanded=False):
+        st.caption(
+            f"{run_profile.samples} stack samples · "
+            f"`{run_profile.prof_path or '—'}` · `{run_profile.collapsed_path or '—'}`"
+        )
+        if run_profile.error:
+            st.warning(run_profile.error)
+        st.dataframe(run_profile.top, hide_index=True, width="stretch")
+else:
+    pg.run()
+
+record_first_render()
+# Background pollers owned by sessions that disconnected are cancelled by the reaper.
+watcher = get_watcher()
+watcher.set_liveness(session_is_active)
+watcher.heartbeat(current_session_id())
+cluster = get_cluster()
+if cluster is not None:
+    # Replicas on this host share SORA_DATA_DIR; only the elected leader polls and replays the journal,
+    # and each newly elected leader replays it again to take over its predecessor's jobs.
+    if len(credentials):
+        cluster.on_elected(recover_after_election)
+    cluster.start()
+elif len(credentials):
+    # Once per process: resume polling/downloads for jobs journaled before a restart.
+    recover_in_background()
+autosaver = get_autosaver() if autosave_enabled() and len(credentials) else None
+if autosaver is not None:
+    # Save every completed render before its media expires; on a cluster only the leader sweeps.
+    autosaver.start(should_sweep=(lambda: cluster.is_leader) if cluster is not None else None)
+    at_risk = autosaver.at_risk()
+    if at_risk:
+        lost = sum(1 for row in at_risk if row["state"] in ("expired", "failed"))
+        st.sidebar.warning(
+            f"{len(at_risk) - lost} render(s) may expire before they are saved"
+            + (f", {lost} could not be saved" if lost else "")
+            + ": " + ", ".join(f"`{row['id']}`" for row in at_risk[:5])
+        )
+if os.getenv("SORA_WARMUP") and not st.session_state.get("_warmup_started"):
+    # Load the SDK and pandas off the render path once the first page is on screen.
+    st.session_state["_warmup_started"] = True
+    warm_up_in_background()
+
+if len(credentials) > 1:
+    with st.sidebar.expander(f"API keys ({len(credentials)})", expanded=False):
+        st.dataframe(
+            [
+                {
+                    "Key": f"{row['name']} {row['key']}",
+                    "Load": f"{row['in_flight']}/{row['max_in_flight'] or '∞'} · w{row['weight']:g}",
+                    "Jobs": row["submitted"],
+                    "Requests": row["requests"],
+                    "429s": row["throttled"],
+                    "Cooldown": f"{row['cooldown_s']:.0f}s" if row["cooldown_s"] else "—",
+                }
+                for row in credentials.stats()
+            ],
+            hide_index=True,
+            width="stretch",
+        )
+
+if os.getenv("SORA_STARTUP_PROFILE"):
+    with st.sidebar.expander("Startup profile", expanded=False):
+        report = startup_report()
+        if report["over_budget"]:
+            st.warning(f"First render exceeded the {report['budget_ms']:.0f} ms budget.")
+        st.json(report)
+
+
+def _measure_session_memory() -> None:
+    """Re-measure this session's state at most every MEMPROF_INTERVAL_S seconds."""
+    state = st.session_state
+    now = time.time()
+    if now - state.get("_memprof_at", 0) < MEMPROF_INTERVAL_S:
+        return
+    keys = [str(k) for k in state.keys() if not str(k).startswith("_memprof")]
+    breakdown = state_breakdown(state, keys)
+    total = sum(size for _, size in breakdown)  # one walk of the state, not two
+    get_registry().record(current_session_id(), breakdown, total=total)
+    state["_memprof_at"] = now
+    state["_memprof_breakdown"] = breakdown
+    state["_memprof_total"] = total
+    over = total > warn_threshold_bytes()
+    if over and not state.get("_memprof_warned"):
+        top = ", ".join(f"{k}={format_bytes(v)}" for k, v in breakdown[:3])
+        logger.warning("Session %s holds %s of state (%s)", current_session_id(), format_bytes(total), top)
+    state["_memprof_warned"] = over
+
+
+def _key_owner(key: str) -> str:
+    if key in SESSION_KEYS:
+        return "lib/state"
+    for prefix in ("create", "jobs", "analytics"):
+        if key.startswith(f"{prefix}_"):
+            return f"pages/{prefix}.py"
+    return "app"
+
+
+_measure_session_memory()
+if st.session_state.get("_memprof_total", 0) > warn_threshold_bytes():
+    st.sidebar.warning(
+        f"This session is holding {format_bytes(st.session_state['_memprof_total'])} of state. "
+        "Clear old results or reload the page to free memory."
+    )
 
-pg = st.navigation([create, jobs])
-pg.run()
+# Server-side only: the panel shows every session's state and cluster/journal internals.
+if os.getenv("SORA_ADMIN", "").strip() not in ("", "0"):
+    with st.sidebar.expander("Session memory", expanded=False):
+        own = st.session_state.get("_memprof_breakdown", [])
+        st.caption(f"This session: {format_bytes(st.session_state.get('_memprof_total', 0))}")
+        st.dataframe(
+            [
+                {"Key": key, "Size": format_bytes(size), "Defined in": _key_owner(key)}
+                for key, size in own[:10]
+            ],
+            hide_index=True,
+            width="stretch",
+        )
+        snapshot = get_registry().snapshot()
+        st.caption(f"All sessions: {snapshot['sessions']} active · {format_bytes(snapshot['total'])}")
+        for sid, total, top in snapshot["largest"]:
+            top_keys = ", ".join(f"{k} {format_bytes(v)}" for k, v in top[:3])
+            st.write(f"`{sid[:8]}` · {format_bytes(total)} · {top_keys}")
+        watch_stats = watcher.stats()
+        st.caption(
+            f"Job watchers: {watch_stats['active']} active (cap {watch_stats['max_watchers']}) · "
+            f"{watch_stats['reaped']} reaped · "
+            f"{len(get_journal())} journaled"
+        )
+        if autosaver is not None:
+            save_stats = autosaver.stats()
+            queued = [f"{n} {state}" for state, n in sorted(save_stats["by_state"].items())]
+            st.caption(
+                f"Autosave ({save_stats['store']}): " + " · ".join(
+                    [f"{save_stats['saved']} saved", f"{save_stats['expired']} expired", *queued,
+                     f"~{save_stats['est_save_s']:.0f}s per render"]
+                )
+            )
+        if cluster is not None:
+            info = cluster.stats()
+            st.caption(
+                f"Cluster: {info['replica']} is {info['role']} (leader {info['leader']}, term {info['term']}) · "
+                f"{info['replicas']} replicas · {info['watching']} jobs watched · {info['polled']} polled here"
+            )
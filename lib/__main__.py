@@ -0,0 +1,6 @@
+"""Allow `python -m lib` to run the headless CLI."""
+
+from lib.cli import main
+
+
+raise SystemExit(main())
@@ -0,0 +1,261 @@
+"""Render latency, throughput, and failure analytics over job history."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from lib.api import iter_all_videos
+from lib.archive import JobArchive, archive_enabled, get_archive
+from lib.credentials import get_credential_pool
+from lib.search import get_prompt_index
+from lib.startup import lazy_import
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+FAILED_STATUSES = ("failed", "error", "canceled", "cancelled")
+COMPLETED_STATUSES = ("succeeded", "completed", "complete")
+PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+GROUP_COLS = ["model", "size", "seconds"]
+ARCHIVE_COLUMNS = ["id", "status", "model", "size", "seconds", "created_at", "completed_at"]
+SYNC_BATCH = 100
+
+logger = logging.getLogger(__name__)
+
+
+def _row(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": str(job.get("id")),
+        "model": job.get("model") or "unknown",
+        "size": job.get("size") or job.get("resolution") or "unknown",
+        "seconds": job.get("seconds") or job.get("duration"),
+        "status": str(job.get("status", "")).lower(),
+        "created_at": job.get("created_at") or job.get("created"),
+        "completed_at": job.get("completed_at"),
+    }
+
+
+def _fingerprint(job: Dict[str, Any]) -> Tuple[Any, Any]:
+    return (job.get("status"), job.get("completed_at"))
+
+
+def build_frame(jobs: Iterable[Dict[str, Any]]) -> "pd.DataFrame":
+    """Turn raw job dicts into a typed frame with derived latency columns."""
+    pd = lazy_import("pandas")
+    df = pd.DataFrame([_row(job) for job in jobs], columns=["id", "model", "size", "seconds", "status", "created_at", "completed_at"])
+    df["seconds"] = pd.to_numeric(df["seconds"], errors="coerce")
+    df["created_at"] = pd.to_datetime(pd.to_numeric(df["created_at"], errors="coerce"), unit="s", utc=True)
+    df["completed_at"] = pd.to_datetime(pd.to_numeric(df["completed_at"], errors="coerce"), unit="s", utc=True)
+    df["latency_s"] = (df["completed_at"] - df["created_at"]).dt.total_seconds()
+    df["completed"] = df["status"].isin(COMPLETED_STATUSES)
+    df["failed"] = df["status"].isin(FAILED_STATUSES)
+    return df
+
+
+def latency_percentiles(df: "pd.DataFrame") -> "pd.DataFrame":
+    """Time-to-complete percentiles (seconds) per model/size/duration."""
+    pd = lazy_import("pandas")
+    done = df[df["completed"] & df["latency_s"].notna()]
+    if done.empty:
+        return pd.DataFrame(columns=GROUP_COLS + ["jobs"] + [f"p{int(q * 100)}" for q in PERCENTILES])
+    grouped = done.groupby(GROUP_COLS, dropna=False)["latency_s"]
+    table = grouped.quantile(list(PERCENTILES)).unstack()
+    table.columns = [f"p{int(q * 100)}" for q in table.columns]
+    table.insert(0, "jobs", grouped.size())
+    return table.round(1).reset_index().sort_values(["model", "size", "seconds"])
+
+
+def throughput_by_hour(df: "pd.DataFrame") -> "pd.DataFrame":
+    """Rendered video seconds per completion hour, one column per model."""
+    pd = lazy_import("pandas")
+    done = df[df["completed"] & df["completed_at"].notna()]
+    if done.empty:
+        return pd.DataFrame()
+    hourly = (
+        done.assign(hour=done["completed_at"].dt.floor("h"))
+        .pivot_table(index="hour", columns="model", values="seconds", aggfunc="sum", fill_value=0)
+    )
+    return hourly.sort_index()
+
+
+def latency_by_hour_of_day(df: "pd.DataFrame") -> "pd.DataFrame":
+    """Median time-to-complete by hour of submission (UTC), per model."""
+    pd = lazy_import("pandas")
+    done = df[df["completed"] & df["latency_s"].notna()]
+    if done.empty:
+        return pd.DataFrame()
+    return (
+        done.assign(hour_of_day=done["created_at"].dt.hour)
+        .pivot_table(index="hour_of_day", columns="model", values="latency_s", aggfunc="median")
+        .round(1)
+    )
+
+
+def failure_rates(df: "pd.DataFrame") -> "pd.DataFrame":
+    """Share of terminal jobs that failed, per model/size."""
+    terminal = df[df["completed"] | df["failed"]]
+    if terminal.empty:
+        return terminal.head(0)
+    table = terminal.groupby(["model", "size"], dropna=False).agg(jobs=("id", "size"), failed=("failed", "sum"))
+    table["failure_rate_pct"] = (table["failed"] / table["jobs"] * 100).round(1)
+    return table.reset_index().sort_values("failure_rate_pct", ascending=False)
+
+
+def archived_jobs(archive: JobArchive) -> List[Dict[str, Any]]:
+    """Archived jobs as dicts shaped like API jobs (epoch-second timestamps)."""
+    pd = lazy_import("pandas")
+    frame = archive.read(columns=ARCHIVE_COLUMNS)
+    for col in ("created_at", "completed_at"):
+        frame[col] = (frame[col] - pd.Timestamp(0, tz="UTC")).dt.total_seconds()
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.to_dict("records")
+
+
+class JobHistory:
+    """
+    Incrementally maintained job frame. update() only rebuilds rows for jobs that
+    are new or whose status changed; summaries are memoized until the next change.
+    One instance is shared by every session (see `get_job_history`).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._frame: Optional["pd.DataFrame"] = None
+        self._seen: Dict[str, Tuple[Any, Any]] = {}
+        self._version = 0
+        self._summary: Optional[Tuple[int, Dict[str, "pd.DataFrame"]]] = None
+        self._archived = -1
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def update(self, jobs: Iterable[Dict[str, Any]]) -> int:
+        """Merge jobs into the frame; returns how many rows were added or changed."""
+        pd = lazy_import("pandas")
+        with self._lock:
+            latest = {str(job.get("id")): job for job in jobs if job.get("id")}  # last one wins
+            changed = [job for video_id, job in latest.items() if self._seen.get(video_id) != _fingerprint(job)]
+            if not changed:
+                return 0
+            delta = build_frame(changed)
+            if self._frame is None or self._frame.empty:
+                frame = delta
+            else:
+                frame = pd.concat([self._frame[~self._frame["id"].isin(delta["id"])], delta], ignore_index=True)
+            self._frame = frame
+            for job in changed:
+                self._seen[str(job.get("id"))] = _fingerprint(job)
+            self._version += 1
+            return len(changed)
+
+    def update_from_archive(self, archive: JobArchive) -> int:
+        """Merge the Parquet archive, re-reading it only when it gained ids since the last call."""
+        count = len(archive)
+        if count == self._archived:
+            return 0
+        changed = self.update(archived_jobs(archive))
+        self._archived = count
+        return changed
+
+    @property
+    def frame(self) -> "pd.DataFrame":
+        return self._frame if self._frame is not None else build_frame([])
+
+    def summary(self) -> Dict[str, "pd.DataFrame"]:
+        with self._lock:
+            if self._summary and self._summary[0] == self._version:
+                return self._summary[1]
+            df = self.frame
+            result = {
+                "latency": latency_percentiles(df),
+                "throughput": throughput_by_hour(df),
+                "latency_by_hour": latency_by_hour_of_day(df),
+                "failures": failure_rates(df),
+            }
+            self._summary = (self._version, result)
+            return result
+
+
+class HistorySync:
+    """
+    Background "Sync history": lists every key's jobs in batches, pins them, and
+    feeds the prompt index, the archive, and the shared JobHistory. One run at a
+    time per process; pages poll the counters instead of blocking on the API.
+    """
+
+    def __init__(self, history: JobHistory) -> None:
+        self.history = history
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.listed = 0
+        self.archived = 0
+        self.error: Optional[str] = None
+        self.finished: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, max_pages: int) -> bool:
+        """Start a sync unless one is running; returns whether it started."""
+        with self._lock:
+            if self.running:
+                return False
+            self.listed, self.archived, self.error, self.finished = 0, 0, None, None
+            self._thread = threading.Thread(target=self._run, args=(max_pages,), name="sora-history-sync", daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self, max_pages: int) -> None:
+        pool = get_credential_pool()
+        try:
+            for name in pool.names():  # each key only sees its own organization's jobs
+                batch: List[Dict[str, Any]] = []
+                for job in iter_all_videos(pool.client(name), page_size=SYNC_BATCH, max_pages=max_pages):
+                    batch.append(job)
+                    if len(batch) >= SYNC_BATCH:
+                        self._store(name, batch)
+                        batch = []
+                self._store(name, batch)
+        except Exception as exc:  # pragma: no cover - network path
+            logger.warning("History sync failed: %s", exc)
+            self.error = str(exc)
+        finally:
+            self.finished = time.time()
+
+    def _store(self, name: str, jobs: List[Dict[str, Any]]) -> None:
+        if not jobs:
+            return
+        get_credential_pool().pin([job.get("id") for job in jobs], name)
+        get_prompt_index().index_jobs(jobs)
+        if archive_enabled():
+            self.archived += get_archive().append(jobs)
+        self.history.update(jobs)
+        self.listed += len(jobs)
+
+
+_HISTORY: Optional[JobHistory] = None
+_SYNC: Optional[HistorySync] = None
+_HISTORY_LOCK = threading.Lock()
+
+
+def get_job_history() -> JobHistory:
+    """Process-wide job history behind the Analytics page."""
+    global _HISTORY
+    with _HISTORY_LOCK:
+        if _HISTORY is None:
+            _HISTORY = JobHistory()
+        return _HISTORY
+
+
+def get_history_sync() -> HistorySync:
+    global _SYNC
+    history = get_job_history()
+    with _HISTORY_LOCK:
+        if _SYNC is None:
+            _SYNC = HistorySync(history)
+        return _SYNC
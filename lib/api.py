@@ -3,11 +3,24 @@
 from __future__ import annotations
 
 import json
+import os
+import threading
 import time
-from typing import Any, Callable, Dict, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
 
 from collections.abc import Mapping
-from openai import OpenAI
+from dataclasses import dataclass
+
+from lib.cassette import get_cassette, make_transport
+from lib.locks import file_lock
+from lib.startup import lazy_import
+
+if TYPE_CHECKING:  # the SDK is imported lazily on first client construction
+    from openai import OpenAI
+
+
+DOWNLOAD_MAX_RETRIES = 5
+DOWNLOAD_BACKOFF_S = 1.0
 
 
 # =========================
@@ -85,18 +98,59 @@ def get_progress_percent(job: dict) -> int:
     return 0
 
 
+class PollCancelled(RuntimeError):
+    """Polling stopped because its CancelToken was cancelled."""
+
+
+class PollDeadlineExceeded(RuntimeError):
+    """The job did not finish within the poller's wall-time budget."""
+
+
+class CancelToken:
+    """Cooperative cancellation flag; `wait()` doubles as an interruptible sleep."""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to `timeout` seconds; returns True if cancelled meanwhile."""
+        return self._event.wait(max(0.0, timeout))
+
+
 def poll_until_complete(
     client: OpenAI,
     video_id: str,
     sleep_s: int = 3,
     on_tick: Optional[Callable[[dict], None]] = None,
+    interval: Optional[Callable[[dict], float]] = None,
+    fetch: Optional[Callable[[str], Any]] = None,
+    *,
+    token: Optional[CancelToken] = None,
+    timeout_s: Optional[float] = None,
 ) -> dict:
     """
     Poll GET /v1/videos/{video_id} until the job is complete or failed.
-    Returns the final job as a dict.
+    `interval(job)` may return the next sleep (e.g. from a completion predictor);
+    otherwise polls every `sleep_s` seconds. `fetch(video_id)` replaces the direct
+    retrieve (e.g. a coalesced one). Returns the final job as a dict.
+    Raises PollCancelled when `token` is cancelled and PollDeadlineExceeded after
+    `timeout_s` seconds of wall time.
     """
+    deadline = time.monotonic() + timeout_s if timeout_s is not None else None
     while True:
-        job = client.videos.retrieve(video_id)
+        if token is not None and token.cancelled:
+            raise PollCancelled(f"Stopped watching {video_id}: {token.reason}.")
+        job = fetch(video_id) if callable(fetch) else client.videos.retrieve(video_id)
         job_dict = to_dict(job)
         if callable(on_tick):
             on_tick(job_dict)
@@ -105,19 +159,46 @@ def poll_until_complete(
             return job_dict
         if status in ("failed", "error", "canceled", "cancelled"):
             raise RuntimeError(f"Video job {status}. Details:\n{json.dumps(job_dict, indent=2)}")
-        time.sleep(sleep_s)
-
-
-def download_video_bytes(client: OpenAI, video_id: str, variant: Optional[str] = None) -> bytes:
+        delay = interval(job_dict) if callable(interval) else sleep_s
+        cassette = get_cassette()
+        if cassette is not None:  # replays compress the client's waits too
+            delay *= cassette.time_scale
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise PollDeadlineExceeded(
+                    f"Gave up on {video_id} after {timeout_s:.0f}s (last status: {status or 'unknown'})."
+                )
+            delay = min(delay, remaining)
+        if token is not None:
+            token.wait(delay)
+        else:
+            time.sleep(delay)
+
+
+def download_video_bytes(
+    client: OpenAI,
+    video_id: str,
+    variant: Optional[str] = None,
+    *,
+    max_retries: int = DOWNLOAD_MAX_RETRIES,
+    on_progress: Optional[Callable[[DownloadProgress], None]] = None,
+) -> bytes:
     """
     Downloads rendered media via GET /v1/videos/{video_id}/content.
-    If variant is None, server defaults to MP4.
+    If variant is None, server defaults to MP4. Interrupted transfers resume
+    with a Range request instead of starting over.
     """
-    if variant:
-        resp = client.videos.download_content(video_id=video_id, variant=variant)
-    else:
-        resp = client.videos.download_content(video_id=video_id)
-    return resp.read()
+    buf = bytearray()
+    download_with_resume(
+        client,
+        video_id,
+        buf.extend,
+        variant=variant,
+        max_retries=max_retries,
+        on_progress=on_progress,
+    )
+    return bytes(buf)
 
 
 # ---- Helper: extract video URL from job object (kept) ----
@@ -180,11 +261,25 @@ def get_openai_client(
     api_key: str,
     *,
     base_url: Optional[str] = None,
+    event_hooks: Optional[Dict[str, List[Callable[[Any], None]]]] = None,
 ) -> OpenAI:
+    """
+    `event_hooks` ({"request": [...], "response": [...]}) observe every HTTP exchange.
+    With SORA_CASSETTE set, traffic is recorded to or replayed from a cassette.
+    """
+    openai = lazy_import("openai")
     kwargs: Dict[str, Any] = {"api_key": api_key}
     if base_url:
         kwargs["base_url"] = base_url
-    return OpenAI(**kwargs)
+    http_kwargs: Dict[str, Any] = {}
+    if event_hooks:
+        http_kwargs["event_hooks"] = event_hooks
+    cassette = get_cassette()
+    if cassette is not None:
+        http_kwargs["transport"] = make_transport(cassette)
+    if http_kwargs:
+        kwargs["http_client"] = openai.DefaultHttpxClient(**http_kwargs)
+    return openai.OpenAI(**kwargs)
 
 
 def create_video(client: OpenAI, payload: Dict[str, Any]):
@@ -211,11 +306,33 @@ def list_videos(
     if after:
         params["after"] = after
     if status and status.lower() != "all":
-        params["status"] = status
+        # The SDK's list() has no status argument; send it as a raw query parameter.
+        params["extra_query"] = {"status": status}
     page = client.videos.list(**params)
     return to_dict(page)
 
 
+def iter_all_videos(
+    client: OpenAI,
+    *,
+    page_size: int = 100,
+    order: str = "desc",
+    status: Optional[str] = None,
+    max_pages: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Follow `after` pagination and yield every job as a dict."""
+    after: Optional[str] = None
+    pages = 0
+    while True:
+        page = list_videos(client, limit=page_size, order=order, after=after, status=status)
+        data = [to_dict(x) for x in page.get("data") or []]
+        yield from data
+        pages += 1
+        if not page.get("has_more") or not data or (max_pages and pages >= max_pages):
+            return
+        after = data[-1].get("id")
+
+
 def download_video_to_file(
     client: OpenAI,
     video_id: str,
@@ -223,19 +340,186 @@ def download_video_to_file(
     variant: Optional[str] = None,
     chunk_size: int = 1024 * 512,
     writer: Optional[Callable[[bytes], None]] = None,
+    max_retries: int = DOWNLOAD_MAX_RETRIES,
 ) -> bytes:
-    resp = (
-        client.videos.download_content(video_id=video_id, variant=variant)
-        if variant
-        else client.videos.download_content(video_id=video_id)
-    )
-    if writer:
-        content = b""
-        while True:
-            chunk = resp.read(chunk_size)
-            if not chunk:
-                break
+    content = bytearray()
+
+    def _write(chunk: bytes) -> None:
+        if writer:
             writer(chunk)
-            content += chunk
-        return content
-    return resp.read()
+        content.extend(chunk)
+
+    download_with_resume(
+        client,
+        video_id,
+        _write,
+        variant=variant,
+        chunk_size=chunk_size,
+        max_retries=max_retries,
+    )
+    return bytes(content)
+
+
+# =========================
+# Resumable downloads
+# =========================
+
+class IncompleteDownload(RuntimeError):
+    """The stream ended before the advertised size was received."""
+
+
+@dataclass
+class DownloadProgress:
+    video_id: str
+    bytes_done: int = 0
+    total: Optional[int] = None
+    retries: int = 0
+    resumed_from: int = 0
+
+    @property
+    def percent(self) -> Optional[int]:
+        if not self.total:
+            return None
+        return max(0, min(100, int(self.bytes_done * 100 / self.total)))
+
+
+def _content_total(headers: Mapping, status_code: int) -> Optional[int]:
+    """Full object size from Content-Range (206) or Content-Length (200)."""
+    if status_code == 206:
+        total = str(headers.get("content-range", "")).rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+    length = str(headers.get("content-length", ""))
+    return int(length) if length.isdigit() else None
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, IncompleteDownload):
+        return True
+    openai = lazy_import("openai")
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code in (408, 409, 429) or exc.status_code >= 500
+    if isinstance(exc, openai.APIConnectionError):
+        return True
+    # Mid-body read failures surface as raw transport errors (httpx ReadError etc.).
+    return type(exc).__module__.split(".")[0].startswith("httpx")
+
+
+def download_with_resume(
+    client: OpenAI,
+    video_id: str,
+    write: Callable[[bytes], None],
+    *,
+    variant: Optional[str] = None,
+    offset: int = 0,
+    chunk_size: int = 1024 * 512,
+    max_retries: int = DOWNLOAD_MAX_RETRIES,
+    on_progress: Optional[Callable[[DownloadProgress], None]] = None,
+) -> DownloadProgress:
+    """
+    Stream /content into `write`, starting at `offset` bytes already held by the caller.
+    After a dropped connection the transfer continues with `Range: bytes=N-`; if the
+    server ignores the range, the replayed prefix is skipped rather than re-written.
+    The final size is checked against Content-Length/Content-Range.
+    """
+    kwargs: Dict[str, Any] = {"video_id": video_id}
+    if variant:
+        kwargs["variant"] = variant
+    progress = DownloadProgress(video_id=video_id, bytes_done=offset, resumed_from=offset)
+    while True:
+        try:
+            headers = {"Range": f"bytes={progress.bytes_done}-"} if progress.bytes_done else None
+            with client.videos.with_streaming_response.download_content(**kwargs, extra_headers=headers) as resp:
+                skip = progress.bytes_done if progress.bytes_done and resp.status_code != 206 else 0
+                progress.total = _content_total(resp.headers, resp.status_code)
+                for chunk in resp.iter_bytes(chunk_size):
+                    if skip:
+                        if len(chunk) <= skip:
+                            skip -= len(chunk)
+                            continue
+                        chunk, skip = chunk[skip:], 0
+                    write(chunk)
+                    progress.bytes_done += len(chunk)
+                    if callable(on_progress):
+                        on_progress(progress)
+            if progress.total is not None and progress.bytes_done != progress.total:
+                raise IncompleteDownload(
+                    f"Got {progress.bytes_done} of {progress.total} bytes for {video_id}."
+                )
+            return progress
+        except Exception as exc:
+            if progress.retries >= max_retries or not _is_retryable(exc):
+                raise
+            progress.retries += 1
+            if callable(on_progress):
+                on_progress(progress)
+            time.sleep(DOWNLOAD_BACKOFF_S * 2 ** (progress.retries - 1))
+
+
+def stream_video_to_path(
+    client: OpenAI,
+    video_id: str,
+    path: str,
+    *,
+    variant: Optional[str] = None,
+    chunk_size: int = 1024 * 512,
+    max_retries: int = DOWNLOAD_MAX_RETRIES,
+    on_progress: Optional[Callable[[DownloadProgress], None]] = None,
+    lock_timeout: Optional[float] = None,
+) -> int:
+    """
+    Stream GET /v1/videos/{video_id}/content straight to disk without buffering the body.
+    Writes to `<path>.part` and renames on success; a `.part` left by an interrupted run
+    is resumed rather than discarded. Returns the final file size.
+
+    The transfer holds `<path>.lock`, so two writers of one path (threads, the CLI,
+    other replicas) never interleave bytes. Others wait up to `lock_timeout` seconds
+    (None waits, 0 fails fast with LockBusy); one that waited returns the file the
+    previous holder just finished instead of downloading it again.
+    """
+    before = _mtime(path)
+    with file_lock(f"{path}.lock", timeout=lock_timeout) as waited:
+        if waited and _mtime(path) not in (None, before):
+            return os.path.getsize(path)
+        return _stream_to_part(client, video_id, path, variant, chunk_size, max_retries, on_progress)
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _stream_to_part(
+    client: OpenAI,
+    video_id: str,
+    path: str,
+    variant: Optional[str],
+    chunk_size: int,
+    max_retries: int,
+    on_progress: Optional[Callable[[DownloadProgress], None]],
+) -> int:
+    """Body of stream_video_to_path; call only while holding the path's lock."""
+    tmp_path = f"{path}.part"
+    offset = os.path.getsize(tmp_path) if os.path.exists(tmp_path) else 0
+    try:
+        with open(tmp_path, "ab") as fh:
+            download_with_resume(
+                client,
+                video_id,
+                fh.write,
+                variant=variant,
+                offset=offset,
+                chunk_size=chunk_size,
+                max_retries=max_retries,
+                on_progress=on_progress,
+            )
+    except Exception as exc:
+        openai = lazy_import("openai")
+        if not (offset and isinstance(exc, openai.APIStatusError) and exc.status_code == 416):
+            raise
+        # Stale partial larger than the object: start clean once.
+        os.remove(tmp_path)
+        return _stream_to_part(client, video_id, path, variant, chunk_size, max_retries, on_progress)
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
@@ -0,0 +1,203 @@
+"""Incremental, day-partitioned Parquet archive of job history."""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence
+
+from lib.config import data_dir, load_env
+from lib.locks import file_lock
+from lib.startup import lazy_import
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+TERMINAL_STATUSES = ("succeeded", "completed", "complete", "failed", "error", "canceled", "cancelled")
+ID_INDEX_FILE = "_ids.txt"
+
+
+def archive_enabled() -> bool:
+    load_env()
+    return os.getenv("SORA_ARCHIVE", "1").lower() not in ("0", "false", "no", "off")
+
+
+def _pyarrow():
+    try:
+        return lazy_import("pyarrow"), lazy_import("pyarrow.parquet")
+    except ImportError as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError("The Parquet archive needs pyarrow (`pip install pyarrow`).") from exc
+
+
+def _schema():
+    pa, _ = _pyarrow()
+    ts = pa.timestamp("s", tz="UTC")
+    return pa.schema(
+        [
+            ("id", pa.string()),
+            ("status", pa.string()),
+            ("model", pa.string()),
+            ("size", pa.string()),
+            ("seconds", pa.int32()),
+            ("progress", pa.int32()),
+            ("prompt", pa.string()),
+            ("created_at", ts),
+            ("completed_at", ts),
+            ("expires_at", ts),
+            ("error", pa.string()),
+            ("raw", pa.string()),
+        ]
+    )
+
+
+def _int_or_none(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _record(job: Dict[str, Any]) -> Dict[str, Any]:
+    error = job.get("error")
+    return {
+        "id": str(job.get("id")),
+        "status": str(job.get("status", "")).lower(),
+        "model": job.get("model"),
+        "size": job.get("size") or job.get("resolution"),
+        "seconds": _int_or_none(job.get("seconds") or job.get("duration")),
+        "progress": _int_or_none(job.get("progress")),
+        "prompt": job.get("prompt"),
+        "created_at": _int_or_none(job.get("created_at") or job.get("created")),
+        "completed_at": _int_or_none(job.get("completed_at")),
+        "expires_at": _int_or_none(job.get("expires_at")),
+        "error": json.dumps(error, default=str) if error else None,
+        "raw": json.dumps(job, default=str),
+    }
+
+
+class JobArchive:
+    """
+    Append-only Parquet dataset under `<root>/day=YYYY-MM-DD/part-*.parquet`.
+    Only terminal jobs are written (their fields no longer change), each id once;
+    ids already archived are tracked in a sidecar index so appends never rescan data.
+    Writers from several processes serialize on `_ids.txt.lock` and pick up each
+    other's index lines before filtering.
+    """
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        self.root = root or data_dir("archive", "jobs")
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._ids: set = set()
+        self._ids_offset = 0
+
+    def _index_path(self) -> str:
+        return os.path.join(self.root, ID_INDEX_FILE)
+
+    def _known_ids(self) -> set:
+        """Ids archived so far, reading only what other writers appended since the last call."""
+        try:
+            with open(self._index_path(), "rb") as fh:
+                fh.seek(self._ids_offset)
+                tail = fh.read()
+        except OSError:
+            return self._ids
+        complete = tail.rfind(b"\n") + 1  # a line still being written is picked up next time
+        self._ids.update(line.strip() for line in tail[:complete].decode("utf-8").splitlines() if line.strip())
+        self._ids_offset += complete
+        return self._ids
+
+    def append(self, jobs: Iterable[Dict[str, Any]]) -> int:
+        """Write newly seen terminal jobs; returns how many rows were added."""
+        pa, pq = _pyarrow()
+        with self._lock, file_lock(f"{self._index_path()}.lock"):
+            known = self._known_ids()
+            fresh: Dict[str, Dict[str, Any]] = {}
+            for job in jobs:
+                video_id = job.get("id")
+                status = str(job.get("status", "")).lower()
+                if video_id and status in TERMINAL_STATUSES and str(video_id) not in known:
+                    fresh[str(video_id)] = job
+            if not fresh:
+                return 0
+
+            by_day: Dict[str, List[Dict[str, Any]]] = {}
+            for record in (_record(job) for job in fresh.values()):
+                stamp = record["created_at"] or int(time.time())
+                day = time.strftime("%Y-%m-%d", time.gmtime(stamp))
+                by_day.setdefault(day, []).append(record)
+
+            schema = _schema()
+            for day, records in by_day.items():
+                part_dir = os.path.join(self.root, f"day={day}")
+                os.makedirs(part_dir, exist_ok=True)
+                table = pa.Table.from_pylist(records, schema=schema)
+                name = f"part-{int(time.time())}-{uuid.uuid4().hex[:8]}.parquet"
+                tmp = os.path.join(part_dir, f".{name}.tmp")
+                pq.write_table(table, tmp, compression="zstd")
+                os.replace(tmp, os.path.join(part_dir, name))
+
+            with open(self._index_path(), "a", encoding="utf-8") as fh:
+                fh.writelines(f"{video_id}\n" for video_id in fresh)
+            return len(fresh)
+
+    def read(
+        self,
+        *,
+        columns: Optional[Sequence[str]] = None,
+        since_day: Optional[str] = None,
+    ) -> "pd.DataFrame":
+        """Load the archive (optionally pruned to days >= since_day) as a DataFrame."""
+        pa, pq = _pyarrow()
+        ds = lazy_import("pyarrow.dataset")
+        if not glob.glob(os.path.join(self.root, "day=*", "*.parquet")):
+            return _schema().empty_table().to_pandas()
+        dataset = ds.dataset(self.root, format="parquet", partitioning="hive", schema=_schema().append(pa.field("day", pa.string())))
+        flt = ds.field("day") >= since_day if since_day else None
+        return dataset.to_table(columns=list(columns) if columns else None, filter=flt).to_pandas()
+
+    def compact(self, day: Optional[str] = None) -> int:
+        """Merge each day's small part files into one, keeping the last row per id; returns partitions rewritten."""
+        pa, pq = _pyarrow()
+        schema = _schema()
+        rewritten = 0
+        with self._lock, file_lock(f"{self._index_path()}.lock"):
+            pattern = f"day={day}" if day else "day=*"
+            for part_dir in sorted(glob.glob(os.path.join(self.root, pattern))):
+                # Oldest first, so "last" below is the most recently written row.
+                parts = sorted(glob.glob(os.path.join(part_dir, "part-*.parquet")), key=lambda p: (os.stat(p).st_mtime_ns, p))
+                if len(parts) < 2:
+                    continue
+                table = pa.concat_tables([pq.read_table(p, schema=schema) for p in parts])
+                # Older archives may hold an id twice (writers that did not share the index).
+                frame = table.to_pandas().drop_duplicates(subset="id", keep="last")
+                table = pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+                name = f"part-{int(time.time())}-{uuid.uuid4().hex[:8]}.parquet"
+                tmp = os.path.join(part_dir, f".{name}.tmp")
+                pq.write_table(table, tmp, compression="zstd")
+                os.replace(tmp, os.path.join(part_dir, name))
+                for path in parts:
+                    os.remove(path)
+                rewritten += 1
+        return rewritten
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._known_ids())
+
+
+_ARCHIVE: Optional[JobArchive] = None
+_ARCHIVE_LOCK = threading.Lock()
+
+
+def get_archive() -> JobArchive:
+    global _ARCHIVE
+    with _ARCHIVE_LOCK:
+        if _ARCHIVE is None:
+            _ARCHIVE = JobArchive()
+        return _ARCHIVE
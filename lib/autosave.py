@@ -0,0 +1,415 @@
+"""Expiry-aware background saving of completed renders (earliest deadline first)."""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional
+
+from lib.api import DownloadProgress, iter_all_videos
+from lib.config import load_env
+from lib.credentials import get_credential_pool
+from lib.media import VARIANT_EXTENSIONS, cached_media, completion_variants, get_background_media
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+# Rendered media can only be downloaded for this long after the job completes.
+MEDIA_TTL_S = 3600
+SWEEP_INTERVAL_S = 120.0
+SWEEP_MAX_PAGES = 5
+RETRY_BACKOFF_S = 15.0
+# Finished items stay visible in stats for this long.
+KEEP_FINISHED_S = 2 * 3600
+# Download estimates until a few transfers have been measured.
+DEFAULT_VIDEO_BYTES = 8 * 1024 * 1024
+DEFAULT_RATE_BPS = 4 * 1024 * 1024
+COMPLETED_STATUSES = ("succeeded", "completed", "complete")
+
+logger = logging.getLogger(__name__)
+
+
+def media_deadline(job: Dict[str, Any]) -> float:
+    """When the job's media stops being downloadable (epoch seconds)."""
+    for key, offset in (("expires_at", 0), ("completed_at", MEDIA_TTL_S), ("created_at", MEDIA_TTL_S)):
+        try:
+            value = float(job.get(key) or 0)
+        except (TypeError, ValueError):
+            continue
+        if value:
+            # created_at is earlier than the real completion, so it errs on the early side.
+            return value + offset
+    return time.time() + MEDIA_TTL_S
+
+
+# ---- Storage ----
+
+class LocalMediaStore:
+    """Default store: the media cache under SORA_DATA_DIR/media is the archive."""
+
+    name = "local"
+
+    def has(self, video_id: str, variant: str) -> bool:
+        return cached_media(video_id, variant) is not None
+
+    def put(self, video_id: str, variant: str, path: str) -> str:
+        return path
+
+
+class DirectoryMediaStore:
+    """Copies saved media into `<root>/<video_id>/<variant>.<ext>`, e.g. a mounted bucket."""
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.name = root
+
+    def _path(self, video_id: str, variant: str) -> str:
+        return os.path.join(self.root, video_id, f"{variant}.{VARIANT_EXTENSIONS.get(variant, 'bin')}")
+
+    def has(self, video_id: str, variant: str) -> bool:
+        return os.path.exists(self._path(video_id, variant))
+
+    def put(self, video_id: str, variant: str, path: str) -> str:
+        target = self._path(video_id, variant)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(path, f"{target}.part")
+        os.replace(f"{target}.part", target)
+        return target
+
+
+def load_media_store() -> Any:
+    """
+    SORA_MEDIA_STORE picks where saved renders go: unset or `local` keeps them in the
+    media cache, a directory path copies them there too, and `package.module:factory`
+    loads a custom store (any object with `has(video_id, variant)` and
+    `put(video_id, variant, path)`).
+    """
+    load_env()
+    raw = os.getenv("SORA_MEDIA_STORE", "").strip()
+    if raw in ("", "local"):
+        return LocalMediaStore()
+    module, sep, attr = raw.partition(":")
+    if sep and not os.path.isabs(raw) and module.replace(".", "").replace("_", "").isalnum():
+        factory = getattr(importlib.import_module(module), attr)
+        return factory()
+    return DirectoryMediaStore(os.path.expanduser(raw))
+
+
+# ---- Scheduling ----
+
+@dataclass
+class SaveItem:
+    video_id: str
+    deadline: float
+    credential: Optional[str] = None
+    state: str = "queued"  # queued | saving | saved | failed | expired
+    attempts: int = 0
+    not_before: float = 0.0
+    bytes: int = 0
+    error: Optional[str] = None
+    finished: Optional[float] = None
+
+    @property
+    def open(self) -> bool:
+        return self.state in ("queued", "saving")
+
+
+class _Bandwidth:
+    """Shared byte budget across download workers; 0 means unlimited."""
+
+    def __init__(self, bytes_per_s: float) -> None:
+        self.bytes_per_s = bytes_per_s
+        self._lock = threading.Lock()
+        self._next_free = 0.0
+
+    def consume(self, n: int) -> None:
+        if self.bytes_per_s <= 0 or n <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._next_free = max(self._next_free, now - 1.0) + n / self.bytes_per_s
+            delay = self._next_free - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class AutoSaver:
+    """
+    Downloads every completed render before its media expires. Jobs are picked up
+    from periodic `status=completed` list sweeps and from anything passed to
+    `observe()`, then saved earliest-deadline-first by `workers` threads within a
+    shared bandwidth budget. Jobs whose estimated finish falls inside `margin_s` of
+    their deadline are reported by `at_risk()` and logged once.
+    """
+
+    def __init__(
+        self,
+        store: Any,
+        *,
+        workers: int = 2,
+        max_bytes_per_s: float = 0.0,
+        margin_s: float = 600.0,
+        sweep_interval_s: float = SWEEP_INTERVAL_S,
+    ) -> None:
+        self.store = store
+        self.workers = max(1, workers)
+        self.margin_s = margin_s
+        self.sweep_interval_s = sweep_interval_s
+        self._bandwidth = _Bandwidth(max_bytes_per_s)
+        self._cond = threading.Condition()
+        self._items: Dict[str, SaveItem] = {}
+        self._threads: List[threading.Thread] = []
+        self._should_sweep: Callable[[], bool] = lambda: True
+        self._alerted: set = set()
+        self._avg_bytes = float(DEFAULT_VIDEO_BYTES)
+        self._rate_bps = float(DEFAULT_RATE_BPS)
+        self._saved = 0
+        self._expired = 0
+        self._sweeps = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads)
+
+    def start(self, should_sweep: Optional[Callable[[], bool]] = None) -> None:
+        """Start the sweeper and workers once; `should_sweep` can pause sweeps (e.g. on followers)."""
+        with self._cond:
+            if should_sweep is not None:
+                self._should_sweep = should_sweep
+            if self._threads:
+                return
+            self._threads = [
+                threading.Thread(target=self._work, name=f"sora-autosave-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            self._threads.append(threading.Thread(target=self._sweep_forever, name="sora-autosave-sweep", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    # ---- Intake ----
+
+    def observe(self, client: Optional[OpenAI], jobs: Iterable[Dict[str, Any]]) -> int:
+        """Queue completed jobs whose media is not stored yet; returns how many were added."""
+        if not self.running or not self._should_sweep():  # followers leave saving to the leader
+            return 0
+        credential = get_credential_pool().name_of(client) if client is not None else None
+        added = 0
+        with self._cond:
+            for job in jobs:
+                video_id = str(job.get("id") or "")
+                if not video_id or str(job.get("status", "")).lower() not in COMPLETED_STATUSES:
+                    continue
+                if video_id in self._items or self.store.has(video_id, "video"):
+                    continue
+                self._items[video_id] = SaveItem(video_id, media_deadline(job), credential)
+                added += 1
+            if added:
+                self._cond.notify_all()
+        return added
+
+    def sweep(self) -> int:
+        """List recently completed jobs under every key and queue the unsaved ones."""
+        pool = get_credential_pool()
+        cutoff = time.time() - 2 * MEDIA_TTL_S  # renders finish well within an hour of creation
+        added = 0
+        for name in pool.names():
+            client = pool.client(name)
+            recent: List[Dict[str, Any]] = []
+            for job in iter_all_videos(client, page_size=100, status="completed", max_pages=SWEEP_MAX_PAGES):
+                if float(job.get("created_at") or 0) < cutoff:
+                    break
+                recent.append(job)
+            pool.pin([job.get("id") for job in recent], name)
+            added += self.observe(client, recent)
+        with self._cond:
+            self._sweeps += 1
+        self._forget_finished()
+        return added
+
+    def _sweep_forever(self) -> None:
+        while True:
+            try:
+                if self._should_sweep():
+                    self.sweep()
+            except Exception:  # pragma: no cover - network path; try again next interval
+                logger.exception("Autosave sweep failed")
+            self.at_risk()  # logs new alerts even when nobody has the app open
+            time.sleep(self.sweep_interval_s)
+
+    # ---- Workers ----
+
+    def _next_locked(self) -> Optional[SaveItem]:
+        now = time.time()
+        for item in sorted(self._items.values(), key=lambda i: i.deadline):
+            if item.state != "queued" or item.not_before > now:
+                continue
+            if item.deadline <= now:
+                self._finish_locked(item, "expired", "expired before it could be saved")
+                continue
+            return item
+        return None
+
+    def _finish_locked(self, item: SaveItem, state: str, error: Optional[str] = None) -> None:
+        item.state = state
+        item.error = error
+        item.finished = time.time()
+        if state == "saved":
+            self._saved += 1
+        elif state == "expired":
+            self._expired += 1
+            logger.error("Render %s expired before it was saved", item.video_id)
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                item = self._next_locked()
+                while item is None:
+                    self._cond.wait(5.0)
+                    item = self._next_locked()
+                item.state = "saving"
+                item.attempts += 1
+            try:
+                state = self._save(item)
+            except Exception as exc:  # pragma: no cover - network path
+                state = "failed"
+                item.error = str(exc)
+            with self._cond:
+                if state == "saved":
+                    self._finish_locked(item, "saved")
+                elif state == "busy":  # a page is already downloading it; check back shortly
+                    item.state, item.not_before = "queued", time.time() + 5.0
+                    item.attempts -= 1
+                elif time.time() + RETRY_BACKOFF_S * item.attempts < item.deadline:
+                    item.state, item.not_before = "queued", time.time() + RETRY_BACKOFF_S * item.attempts
+                else:
+                    self._finish_locked(item, "failed", item.error)
+                self._cond.notify_all()
+
+    def _save(self, item: SaveItem) -> str:
+        pool = get_credential_pool()
+        client = pool.client(item.credential) if item.credential in pool else pool.client_for(item.video_id)
+        background = get_background_media()
+        variants = list(dict.fromkeys(("video", *completion_variants())))
+        started = time.monotonic()
+        fetched = 0
+        for variant in variants:
+            if self.store.has(item.video_id, variant):
+                continue
+            seen = {"bytes": 0}
+
+            def _throttle(progress: DownloadProgress, seen: Dict[str, int] = seen) -> None:
+                delta = progress.bytes_done - progress.resumed_from - seen["bytes"]
+                seen["bytes"] += delta
+                self._bandwidth.consume(delta)
+
+            path = background.run_inline(client, item.video_id, variant, on_progress=_throttle)
+            if path is None:
+                return "busy"
+            self.store.put(item.video_id, variant, path)
+            fetched += seen["bytes"]
+            if variant == "video":
+                item.bytes = os.path.getsize(path)
+        elapsed = time.monotonic() - started
+        if fetched and elapsed > 0:
+            with self._cond:
+                self._rate_bps = 0.7 * self._rate_bps + 0.3 * (fetched / elapsed)
+                if item.bytes:
+                    self._avg_bytes = 0.7 * self._avg_bytes + 0.3 * item.bytes
+        return "saved"
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until nothing is queued or saving; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while any(i.open for i in self._items.values()):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(1.0 if remaining is None else min(1.0, remaining))
+        return True
+
+    # ---- Reporting ----
+
+    def _estimate_s(self) -> float:
+        rate = self._rate_bps
+        if self._bandwidth.bytes_per_s > 0:
+            rate = min(rate, self._bandwidth.bytes_per_s / self.workers)
+        return self._avg_bytes / max(rate, 1.0)
+
+    def at_risk(self) -> List[Dict[str, Any]]:
+        """Unsaved jobs that are expected to finish within `margin_s` of expiring, soonest first."""
+        now = time.time()
+        risky: List[Dict[str, Any]] = []
+        with self._cond:
+            per_job = self._estimate_s()
+            pending = sorted((i for i in self._items.values() if i.open), key=lambda i: i.deadline)
+            for position, item in enumerate(pending):
+                eta = now + (position // self.workers + 1) * per_job
+                if eta + self.margin_s >= item.deadline:
+                    risky.append({"id": item.video_id, "state": item.state, "expires_in_s": item.deadline - now, "eta_s": eta - now})
+            lost = [i for i in self._items.values() if i.state in ("expired", "failed")]
+            risky.extend({"id": i.video_id, "state": i.state, "expires_in_s": i.deadline - now, "eta_s": None} for i in lost)
+            fresh = [r for r in risky if r["id"] not in self._alerted]
+            self._alerted.update(r["id"] for r in fresh)
+        for row in fresh:
+            if row["state"] != "expired":  # already logged when it expired
+                logger.warning("Render %s is at risk of expiring before it is saved (%s)", row["id"], row["state"])
+        return risky
+
+    def _forget_finished(self) -> None:
+        cutoff = time.time() - KEEP_FINISHED_S
+        with self._cond:
+            for video_id in [k for k, i in self._items.items() if i.finished and i.finished < cutoff]:
+                del self._items[video_id]
+                self._alerted.discard(video_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            by_state: Dict[str, int] = {}
+            for item in self._items.values():
+                by_state[item.state] = by_state.get(item.state, 0) + 1
+            return {
+                "store": getattr(self.store, "name", type(self.store).__name__),
+                "running": self.running,
+                "workers": self.workers,
+                "max_bytes_per_s": self._bandwidth.bytes_per_s,
+                "by_state": by_state,
+                "saved": self._saved,
+                "expired": self._expired,
+                "sweeps": self._sweeps,
+                "est_save_s": round(self._estimate_s(), 1),
+            }
+
+
+def autosave_enabled() -> bool:
+    load_env()
+    return os.getenv("SORA_AUTOSAVE", "1").strip() not in ("", "0")
+
+
+_AUTOSAVER: Optional[AutoSaver] = None
+_AUTOSAVER_LOCK = threading.Lock()
+
+
+def get_autosaver() -> AutoSaver:
+    """
+    Process-wide saver; SORA_AUTOSAVE_WORKERS caps concurrent downloads (default 2),
+    SORA_AUTOSAVE_MBPS caps their combined bandwidth in MB/s (default unlimited), and
+    SORA_AUTOSAVE_MARGIN_S is the at-risk margin (default 600).
+    """
+    global _AUTOSAVER
+    with _AUTOSAVER_LOCK:
+        if _AUTOSAVER is None:
+            load_env()
+            _AUTOSAVER = AutoSaver(
+                load_media_store(),
+                workers=int(os.getenv("SORA_AUTOSAVE_WORKERS", "2") or 2),
+                max_bytes_per_s=float(os.getenv("SORA_AUTOSAVE_MBPS", "0") or 0) * 1024 * 1024,
+                margin_s=float(os.getenv("SORA_AUTOSAVE_MARGIN_S", "600") or 600),
+            )
+        return _AUTOSAVER
@@ -0,0 +1,253 @@
+"""Record/replay of Videos API HTTP traffic for offline, repeatable benchmarks."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from lib.config import data_dir, load_env
+from lib.startup import lazy_import
+
+
+INTERACTIONS_FILE = "interactions.jsonl"
+REPLAY_CHUNK = 64 * 1024
+# Response headers never written to a cassette.
+_DROP_HEADERS = {"set-cookie", "openai-organization", "openai-project"}
+
+
+@dataclass
+class CassetteConfig:
+    path: str
+    mode: str = "once"  # once | record | replay
+    speed: float = 1.0  # replay time scale; 0 serves responses without delay
+
+
+def load_cassette_config() -> Optional[CassetteConfig]:
+    """
+    SORA_CASSETTE names a cassette directory (a bare name lives under
+    SORA_DATA_DIR/cassettes). SORA_CASSETTE_MODE is `once` (replay if recorded,
+    otherwise record), `record` (append, so several processes can add to one
+    cassette), or `replay`; SORA_CASSETTE_SPEED scales replay timing.
+    """
+    load_env()
+    raw = os.getenv("SORA_CASSETTE", "").strip()
+    if not raw:
+        return None
+    path = raw if os.sep in raw or raw.startswith(".") else os.path.join(data_dir("cassettes"), raw)
+    mode = os.getenv("SORA_CASSETTE_MODE", "once").strip().lower() or "once"
+    if mode not in ("once", "record", "replay"):
+        raise RuntimeError(f"SORA_CASSETTE_MODE must be once, record, or replay (got '{mode}').")
+    try:
+        speed = float(os.getenv("SORA_CASSETTE_SPEED", "1") or 1)
+    except ValueError:
+        speed = 1.0
+    return CassetteConfig(path=path, mode=mode, speed=max(0.0, speed))
+
+
+def _httpx() -> ModuleType:
+    """The httpx distribution the installed OpenAI SDK is built on."""
+    openai = lazy_import("openai")
+    return lazy_import(openai.DefaultHttpxClient.__mro__[1].__module__.split(".")[0])
+
+
+def request_key(method: str, path: str, query: str, range_header: Optional[str] = None) -> str:
+    """Host-independent match key: method, path, sorted query, and any Range."""
+    params = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    key = f"{method.upper()} {path}" + (f"?{params}" if params else "")
+    return f"{key} [{range_header}]" if range_header else key
+
+
+class Cassette:
+    """
+    One recording: `interactions.jsonl` (request key, status, headers, timing) plus
+    raw response bodies under `bodies/`. Repeated requests for the same key (polls)
+    replay in recorded order, and the last response repeats once they run out.
+    Bodies get random names because several processes may record into one cassette.
+    """
+
+    def __init__(self, config: CassetteConfig) -> None:
+        self.config = config
+        self.path = config.path
+        self._lock = threading.Lock()
+        self._queues: Dict[str, List[Dict[str, Any]]] = {}
+        self._served: Dict[str, int] = {}
+        self._recorded = 0
+        self._misses = 0
+        log = os.path.join(self.path, INTERACTIONS_FILE)
+        exists = os.path.exists(log)
+        if config.mode == "replay" and not exists:
+            raise RuntimeError(f"No cassette recorded at {self.path}.")
+        self.replaying = config.mode == "replay" or (config.mode == "once" and exists)
+        if exists:
+            with open(log, encoding="utf-8") as fh:
+                for line in fh:
+                    if line.strip():
+                        record = json.loads(line)
+                        self._queues.setdefault(record["key"], []).append(record)
+                        self._recorded = max(self._recorded, int(record.get("seq") or 0))
+        if not self.replaying:
+            os.makedirs(os.path.join(self.path, "bodies"), exist_ok=True)
+        self._t0 = time.monotonic()
+
+    # ---- Replay ----
+
+    @property
+    def time_scale(self) -> float:
+        """Factor applied to recorded waits (and client poll sleeps) during replay."""
+        if not self.replaying:
+            return 1.0
+        return 0.0 if self.config.speed <= 0 else 1.0 / self.config.speed
+
+    def next_response(self, key: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                self._misses += 1
+                return None
+            index = self._served.get(key, 0)
+            self._served[key] = index + 1
+            record = queue[min(index, len(queue) - 1)]
+        body = b""
+        if record.get("body"):
+            with open(os.path.join(self.path, record["body"]), "rb") as fh:
+                body = fh.read()
+        return record, body
+
+    # ---- Record ----
+
+    def save(self, key: str, status: int, headers: List[Tuple[str, str]], body: bytes, latency_s: float, transfer_s: float) -> None:
+        with self._lock:
+            self._recorded += 1
+            seq = self._recorded
+            body_ref = None
+            if body:
+                body_ref = f"bodies/{seq:06d}-{uuid.uuid4().hex[:12]}.bin"
+                with open(os.path.join(self.path, body_ref), "wb") as fh:
+                    fh.write(body)
+            record = {
+                "seq": seq,
+                "key": key,
+                "at_s": round(time.monotonic() - self._t0, 4),
+                "status": status,
+                "headers": [[k, v] for k, v in headers if k.lower() not in _DROP_HEADERS],
+                "body": body_ref,
+                "bytes": len(body),
+                "latency_s": round(latency_s, 4),
+                "transfer_s": round(transfer_s, 4),
+            }
+            with open(os.path.join(self.path, INTERACTIONS_FILE), "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(record) + "\n")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "path": self.path,
+                "mode": "replay" if self.replaying else "record",
+                "speed": self.config.speed,
+                "recorded": self._recorded,  # highest sequence number in the cassette
+                "keys": len(self._queues),
+                "served": sum(self._served.values()),
+                "misses": self._misses,
+            }
+
+
+def make_transport(cassette: Cassette) -> Any:
+    """An httpx transport that records through to the network or replays from `cassette`."""
+    httpx = _httpx()
+
+    class _TeeStream(httpx.SyncByteStream):
+        def __init__(self, inner: Any, on_close: Any) -> None:
+            self._inner = inner
+            self._on_close = on_close
+            self._chunks: List[bytes] = []
+            self._started = time.monotonic()
+
+        def __iter__(self) -> Iterator[bytes]:
+            for chunk in self._inner:
+                self._chunks.append(chunk)
+                yield chunk
+
+        def close(self) -> None:
+            try:
+                self._inner.close()
+            finally:
+                if self._on_close is not None:
+                    self._on_close(b"".join(self._chunks), time.monotonic() - self._started)
+                    self._on_close = None
+
+    class _ReplayStream(httpx.SyncByteStream):
+        def __init__(self, body: bytes, transfer_s: float) -> None:
+            self._body = body
+            chunks = max(1, -(-len(body) // REPLAY_CHUNK))
+            self._gap = transfer_s / chunks
+
+        def __iter__(self) -> Iterator[bytes]:
+            for start in range(0, len(self._body), REPLAY_CHUNK):
+                if self._gap:
+                    time.sleep(self._gap)
+                yield self._body[start : start + REPLAY_CHUNK]
+
+    class CassetteTransport(httpx.BaseTransport):
+        def __init__(self) -> None:
+            self._inner = None if cassette.replaying else httpx.HTTPTransport()
+
+        def handle_request(self, request: Any) -> Any:
+            url = request.url
+            key = request_key(request.method, url.path, url.query.decode("ascii", "replace"), request.headers.get("range"))
+            if cassette.replaying:
+                hit = cassette.next_response(key)
+                if hit is None:
+                    raise RuntimeError(f"Cassette {cassette.path} has no recorded response for {key}.")
+                record, body = hit
+                scale = cassette.time_scale
+                if record.get("latency_s") and scale:
+                    time.sleep(record["latency_s"] * scale)
+                return httpx.Response(
+                    record["status"],
+                    headers=[(k, v) for k, v in record["headers"]],
+                    stream=_ReplayStream(body, float(record.get("transfer_s") or 0) * scale),
+                )
+
+            started = time.monotonic()
+            response = self._inner.handle_request(request)
+            latency = time.monotonic() - started
+            headers = [(k.decode("latin-1"), v.decode("latin-1")) for k, v in response.headers.raw]
+
+            def _save(body: bytes, transfer_s: float) -> None:
+                cassette.save(key, response.status_code, headers, body, latency, transfer_s)
+
+            return httpx.Response(
+                response.status_code,
+                headers=response.headers,
+                stream=_TeeStream(response.stream, _save),
+                extensions=response.extensions,
+            )
+
+        def close(self) -> None:
+            if self._inner is not None:
+                self._inner.close()
+
+    return CassetteTransport()
+
+
+_CASSETTE: Optional[Cassette] = None
+_CASSETTE_LOCK = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Process-wide cassette from SORA_CASSETTE, shared by every client; None when unset."""
+    global _CASSETTE
+    with _CASSETTE_LOCK:
+        if _CASSETTE is None:
+            config = load_cassette_config()
+            if config is None:
+                return None
+            _CASSETTE = Cassette(config)
+        return _CASSETTE
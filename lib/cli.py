@@ -0,0 +1,346 @@
+"""Headless command-line interface for create/poll/download pipelines.
+
+Usage: python -m lib <command> [options]; every command prints JSON to stdout.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from lib.api import (
+    CancelToken,
+    create_video,
+    delete_video,
+    iter_all_videos,
+    poll_until_complete,
+    safe_get_id,
+    stream_video_to_path,
+    to_dict,
+)
+from lib.credentials import CredentialPool, get_credential_pool
+from lib.archive import get_archive
+from lib.autosave import get_autosaver
+from lib.coalesce import get_coalescer
+from lib.journal import get_journal
+from lib.media import VARIANT_EXTENSIONS
+from lib.predictor import get_predictor
+from lib.scheduler import PRIORITY_BULK, PRIORITY_INTERACTIVE, get_scheduler
+from lib.search import get_prompt_index
+from lib.watcher import max_wall_time_s
+
+
+# Cancelled on Ctrl-C so worker threads stop polling instead of blocking exit.
+_INTERRUPT = CancelToken()
+
+
+def _pool(credential: Optional[str] = None) -> CredentialPool:
+    """The credential pool; exits when it is empty or `credential` is not one of its keys."""
+    try:
+        pool = get_credential_pool()
+        if credential:
+            pool.get(credential)
+    except RuntimeError as exc:
+        raise SystemExit(str(exc)) from exc
+    if not len(pool):
+        raise SystemExit("Set OPENAI_API_KEY or SORA_CREDENTIALS.")
+    return pool
+
+
+def _iter_owned(pool: CredentialPool, credential: Optional[str], **kwargs: Any) -> Iterator[Dict[str, Any]]:
+    """List jobs under every key (or just `credential`), pinning each job to the key that sees it."""
+    for name in [credential] if credential else pool.names():
+        for job in iter_all_videos(pool.client(name), **kwargs):
+            pool.pin([job.get("id")], name)
+            yield job
+
+
+def _read_ids(ids: Sequence[str]) -> List[str]:
+    """Expand '-' into ids read from stdin (one per line) so commands can be piped."""
+    out: List[str] = []
+    for value in ids:
+        if value == "-":
+            out.extend(line.strip() for line in sys.stdin if line.strip())
+        else:
+            out.append(value)
+    return out
+
+
+def _run_many(fn: Callable[[str], Dict[str, Any]], items: Iterable[str], workers: int) -> List[Dict[str, Any]]:
+    """Apply fn to every item on a bounded pool; failures become {"ok": false} records."""
+
+    def _guard(item: str) -> Dict[str, Any]:
+        try:
+            return {"id": item, "ok": True, **fn(item)}
+        except Exception as exc:  # pragma: no cover - network path
+            return {"id": item, "ok": False, "error": str(exc)}
+
+    items = list(items)
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(items)))) as pool:
+        try:
+            return list(pool.map(_guard, items))
+        except KeyboardInterrupt:
+            _INTERRUPT.cancel("interrupted")
+            raise
+
+
+def _wait_for(client, video_id: str, min_interval: float, timeout_s: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Poll with predictor-driven sleeps (never faster than min_interval) and train on the result.
+    Gives up after timeout_s, by default the job's per-model wall-time budget.
+    """
+    predictor = get_predictor()
+    fetch = get_coalescer().fetcher(client)
+    if timeout_s is None:
+        first = fetch(video_id)  # cached, so the first poll below costs nothing extra
+        timeout_s = max_wall_time_s(first.get("model"), first.get("seconds"))
+    job = poll_until_complete(
+        client,
+        video_id,
+        on_tick=predictor.observe_tick,
+        interval=lambda j: predictor.next_poll_delay(j, min_s=min_interval),
+        fetch=fetch,
+        token=_INTERRUPT,
+        timeout_s=timeout_s,
+    )
+    predictor.observe_jobs([job])
+    get_journal().record_status(video_id, job.get("status"), job=job)
+    return job
+
+
+def _emit(payload: Any) -> None:
+    json.dump(payload, sys.stdout, indent=2, default=str)
+    sys.stdout.write("\n")
+
+
+def _exit_code(results: List[Dict[str, Any]]) -> int:
+    return 0 if all(r.get("ok") for r in results) else 1
+
+
+# ---- Commands ----
+
+def cmd_create(args: argparse.Namespace) -> int:
+    pool = _pool(args.credential)
+    prompts = list(args.prompt or [])
+    if args.prompts_file:
+        with open(args.prompts_file, encoding="utf-8") as fh:
+            prompts.extend(line.strip() for line in fh if line.strip())
+    if not prompts:
+        raise SystemExit("Provide --prompt or --prompts-file.")
+    priority = PRIORITY_INTERACTIVE if args.priority == "interactive" else PRIORITY_BULK
+
+    def _create(prompt: str) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
+            "prompt": prompt,
+            "model": args.model,
+            "seconds": str(args.seconds),
+            "size": args.size,
+        }
+        # Hold a scheduler slot and a key lease for as long as we track the job (through --wait).
+        with get_scheduler().slot(args.model, args.size, priority=priority), pool.lease(args.credential) as cred:
+            client = pool.client(cred.name)
+            if args.input_reference:
+                payload["input_reference"] = open(args.input_reference, "rb")
+            try:
+                job = to_dict(create_video(client, payload))
+            except Exception as exc:
+                pool.record_error(cred.name, exc)
+                raise
+            finally:
+                if args.input_reference:
+                    payload["input_reference"].close()
+            video_id = safe_get_id(job) or job.get("id")
+            if video_id:
+                pool.pin([video_id], cred.name)
+                get_journal().record_submit(
+                    video_id,
+                    credential=cred.name,
+                    prompt=prompt,
+                    model=args.model,
+                    size=args.size,
+                    seconds=args.seconds,
+                )
+                get_prompt_index().index_jobs([job], prompts={video_id: prompt})
+            if args.wait and video_id:
+                job = _wait_for(client, video_id, args.interval, args.timeout)
+        return {"video_id": video_id, "credential": cred.name, "status": job.get("status"), "job": job}
+
+    # Results are keyed by prompt here; the created id is in "video_id".
+    results = _run_many(_create, prompts, args.workers)
+    for record in results:
+        record["prompt"] = record.pop("id")
+    _emit(results)
+    return _exit_code(results)
+
+
+def cmd_wait(args: argparse.Namespace) -> int:
+    pool = _pool()
+
+    def _wait(video_id: str) -> Dict[str, Any]:
+        job = _wait_for(pool.client_for(video_id), video_id, args.interval, args.timeout)
+        return {"status": job.get("status"), "job": job}
+
+    results = _run_many(_wait, _read_ids(args.ids), args.workers)
+    _emit(results)
+    return _exit_code(results)
+
+
+def cmd_list(args: argparse.Namespace) -> int:
+    items = list(
+        _iter_owned(
+            _pool(args.credential),
+            args.credential,
+            page_size=args.limit,
+            order=args.order,
+            status=args.status,
+            max_pages=None if args.all else 1,
+        )
+    )
+    get_prompt_index().index_jobs(items)
+    _emit(items if not args.ids_only else [item.get("id") for item in items])
+    return 0
+
+
+def cmd_download(args: argparse.Namespace) -> int:
+    pool = _pool()
+    os.makedirs(args.out, exist_ok=True)
+    ext = VARIANT_EXTENSIONS.get(args.variant or "video", "bin")
+
+    def _download(video_id: str) -> Dict[str, Any]:
+        path = os.path.join(args.out, f"{video_id}.{ext}")
+        last: Dict[str, Any] = {}
+        size = stream_video_to_path(
+            pool.client_for(video_id),
+            video_id,
+            path,
+            variant=args.variant,
+            max_retries=args.retries,
+            on_progress=lambda p: last.update(retries=p.retries, resumed_from=p.resumed_from),
+        )
+        return {"path": path, "bytes": size, **last}
+
+    results = _run_many(_download, _read_ids(args.ids), args.workers)
+    _emit(results)
+    return _exit_code(results)
+
+
+def cmd_delete(args: argparse.Namespace) -> int:
+    pool = _pool()
+
+    def _delete(video_id: str) -> Dict[str, Any]:
+        response = to_dict(delete_video(pool.client_for(video_id), video_id))
+        get_prompt_index().remove(video_id)
+        get_journal().record_status(video_id, "deleted")
+        return {"response": response}
+
+    results = _run_many(_delete, _read_ids(args.ids), args.workers)
+    _emit(results)
+    return _exit_code(results)
+
+
+def cmd_archive(args: argparse.Namespace) -> int:
+    archive = get_archive()
+    added = 0
+    if not args.compact_only:
+        added = archive.append(_iter_owned(_pool(args.credential), args.credential, page_size=100, max_pages=args.pages))
+    compacted = archive.compact() if args.compact or args.compact_only else 0
+    _emit({"added": added, "archived_total": len(archive), "compacted_partitions": compacted, "root": archive.root})
+    return 0
+
+
+def cmd_autosave(args: argparse.Namespace) -> int:
+    _pool()
+    saver = get_autosaver()
+    saver.start(should_sweep=lambda: False)  # sweep once here rather than on the timer
+    queued = saver.sweep()
+    idle = saver.wait_idle(args.timeout)
+    _emit({"queued": queued, "finished": idle, "at_risk": saver.at_risk(), **saver.stats()})
+    return 0 if idle and not saver.stats()["expired"] else 1
+
+
+def cmd_search(args: argparse.Namespace) -> int:
+    index = get_prompt_index()
+    if args.reindex:
+        index.index_jobs(_iter_owned(_pool(args.credential), args.credential, page_size=100, max_pages=args.pages))
+    results, total = index.search(" ".join(args.query), limit=args.limit, offset=args.offset)
+    _emit({"total": total, "indexed": len(index), "results": results})
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m lib", description="Sora 2 Videos API pipeline tool.")
+    parser.add_argument("--workers", type=int, default=8, help="Max concurrent requests (default 8).")
+    parser.add_argument(
+        "--credential",
+        help="Use only this SORA_CREDENTIALS key for create/list/archive/search (default: route or scan all).",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_create = sub.add_parser("create", help="Submit one or more render jobs.")
+    p_create.add_argument("--prompt", action="append", help="Prompt text (repeatable).")
+    p_create.add_argument("--prompts-file", help="File with one prompt per line.")
+    p_create.add_argument("--model", default="sora-2")
+    p_create.add_argument("--seconds", type=int, default=4)
+    p_create.add_argument("--size", default="1280x720")
+    p_create.add_argument("--input-reference", help="Path to a reference image.")
+    p_create.add_argument("--wait", action="store_true", help="Poll each job until it finishes.")
+    p_create.add_argument("--interval", type=float, default=3, help="Minimum poll interval in seconds.")
+    p_create.add_argument("--priority", choices=["interactive", "bulk"], default="bulk")
+    p_create.add_argument("--timeout", type=float, help="Give up waiting after this many seconds (default: per-model budget).")
+    p_create.set_defaults(func=cmd_create)
+
+    p_wait = sub.add_parser("wait", help="Poll jobs until they complete or fail.")
+    p_wait.add_argument("ids", nargs="+", help="Video ids, or '-' to read them from stdin.")
+    p_wait.add_argument("--interval", type=float, default=3, help="Minimum poll interval in seconds.")
+    p_wait.add_argument("--timeout", type=float, help="Give up after this many seconds (default: per-model budget).")
+    p_wait.set_defaults(func=cmd_wait)
+
+    p_list = sub.add_parser("list", help="List jobs.")
+    p_list.add_argument("--limit", type=int, default=50)
+    p_list.add_argument("--order", choices=["asc", "desc"], default="desc")
+    p_list.add_argument("--status", help="Filter by status, e.g. completed or in_progress.")
+    p_list.add_argument("--all", action="store_true", help="Follow pagination to the end.")
+    p_list.add_argument("--ids-only", action="store_true", help="Print only job ids.")
+    p_list.set_defaults(func=cmd_list)
+
+    p_download = sub.add_parser("download", help="Stream rendered media to disk.")
+    p_download.add_argument("ids", nargs="+", help="Video ids, or '-' to read them from stdin.")
+    p_download.add_argument("--out", default=".", help="Output directory.")
+    p_download.add_argument("--variant", choices=sorted(VARIANT_EXTENSIONS), help="Defaults to the MP4.")
+    p_download.add_argument("--retries", type=int, default=5, help="Resume attempts after a dropped connection.")
+    p_download.set_defaults(func=cmd_download)
+
+    p_delete = sub.add_parser("delete", help="Delete jobs.")
+    p_delete.add_argument("ids", nargs="+", help="Video ids, or '-' to read them from stdin.")
+    p_delete.set_defaults(func=cmd_delete)
+
+    p_archive = sub.add_parser("archive", help="Append newly finished jobs to the Parquet archive.")
+    p_archive.add_argument("--pages", type=int, default=None, help="Max list pages to scan (default: all).")
+    p_archive.add_argument("--compact", action="store_true", help="Merge small part files afterwards.")
+    p_archive.add_argument("--compact-only", action="store_true", help="Only compact; skip the API sync.")
+    p_archive.set_defaults(func=cmd_archive)
+
+    p_autosave = sub.add_parser("autosave", help="Save every recently completed render that is not stored yet.")
+    p_autosave.add_argument("--timeout", type=float, help="Stop waiting after this many seconds.")
+    p_autosave.set_defaults(func=cmd_autosave)
+
+    p_search = sub.add_parser("search", help="Full-text search over indexed prompts.")
+    p_search.add_argument("query", nargs="+", help="Words to match; the last one matches as a prefix.")
+    p_search.add_argument("--limit", type=int, default=20)
+    p_search.add_argument("--offset", type=int, default=0)
+    p_search.add_argument("--reindex", action="store_true", help="Index job listings from the API first.")
+    p_search.add_argument("--pages", type=int, default=None, help="Max list pages to index (default: all).")
+    p_search.set_defaults(func=cmd_search)
+
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
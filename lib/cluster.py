@@ -0,0 +1,323 @@
+"""
+Multi-replica coordination: shared job state and a lease-elected leader that polls.
+
+Replicas must run on one host and share SORA_DATA_DIR on a local disk. SQLite
+WAL mode and the fcntl locks in `lib.locks` are not reliable on network
+filesystems (NFS, SMB), so a data dir shared across machines is unsupported.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional
+
+from lib.coalesce import LIVE_STATUSES, get_coalescer
+from lib.config import data_dir, load_env
+from lib.credentials import get_credential_pool
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+LEADER_LEASE = "poller"
+LEASE_TTL_S = 15.0
+TICK_S = 5.0
+# Followers fall back to their own retrieve when the shared snapshot is older than this.
+SHARED_STALE_S = 3 * TICK_S
+# A follower's interest in a job lapses unless it keeps reading it.
+REQUEST_TTL_S = 120.0
+JOB_ROW_TTL_S = 24 * 3600
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    term INTEGER NOT NULL DEFAULT 1,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS replicas (
+    id TEXT PRIMARY KEY,
+    seen_at REAL NOT NULL,
+    is_leader INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS watch_requests (
+    id TEXT PRIMARY KEY,
+    credential TEXT,
+    requested_at REAL NOT NULL
+);
+"""
+
+
+class ClusterStore:
+    """SQLite file shared by every replica on this host (SORA_DATA_DIR must be a local disk)."""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or os.path.join(data_dir(), "cluster.db")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def try_acquire(self, name: str, holder: str, ttl_s: float) -> bool:
+        """Take or renew lease `name`; BEGIN IMMEDIATE serializes contenders across processes."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT holder, term, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+                if row is None:
+                    self._conn.execute(
+                        "INSERT INTO leases (name, holder, term, expires_at) VALUES (?, ?, 1, ?)", (name, holder, now + ttl_s)
+                    )
+                    acquired = True
+                elif row[0] == holder or row[2] < now:
+                    term = row[1] if row[0] == holder else row[1] + 1
+                    self._conn.execute(
+                        "UPDATE leases SET holder = ?, term = ?, expires_at = ? WHERE name = ?",
+                        (holder, term, now + ttl_s, name),
+                    )
+                    acquired = True
+                else:
+                    acquired = False
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return acquired
+
+    def release(self, name: str, holder: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder))
+
+    def lease(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT holder, term, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+        return {"holder": row[0], "term": row[1], "expires_at": row[2]} if row else None
+
+    def heartbeat(self, replica_id: str, is_leader: bool) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO replicas (id, seen_at, is_leader) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET seen_at = excluded.seen_at, is_leader = excluded.is_leader",
+                (replica_id, time.time(), int(is_leader)),
+            )
+
+    def replicas(self, *, alive_within_s: float = 3 * LEASE_TTL_S) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, seen_at, is_leader FROM replicas WHERE seen_at >= ? ORDER BY id",
+                (time.time() - alive_within_s,),
+            ).fetchall()
+        return [{"id": r[0], "seen_at": r[1], "is_leader": bool(r[2])} for r in rows]
+
+    # ---- Shared job state ----
+
+    def publish(self, jobs: Iterable[Dict[str, Any]]) -> int:
+        now = time.time()
+        rows = [
+            (str(job["id"]), str(job.get("status") or ""), json.dumps(job, default=str), now)
+            for job in jobs
+            if job.get("id")
+        ]
+        if rows:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT INTO jobs (id, status, data, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET status = excluded.status, data = excluded.data, "
+                    "updated_at = excluded.updated_at",
+                    rows,
+                )
+        return len(rows)
+
+    def job(self, video_id: str) -> Optional[tuple]:
+        """(job, updated_at) from the shared table, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT data, updated_at FROM jobs WHERE id = ?", (video_id,)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def request(self, video_id: str, credential: Optional[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO watch_requests (id, credential, requested_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET requested_at = excluded.requested_at, "
+                "credential = COALESCE(excluded.credential, watch_requests.credential)",
+                (video_id, credential, time.time()),
+            )
+
+    def requested(self) -> Dict[str, Optional[str]]:
+        """Live jobs some replica still wants polled: {video_id: credential}."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT r.id, r.credential, j.status FROM watch_requests r LEFT JOIN jobs j ON j.id = r.id "
+                "WHERE r.requested_at >= ?",
+                (time.time() - REQUEST_TTL_S,),
+            ).fetchall()
+        return {r[0]: r[1] for r in rows if not r[2] or r[2].lower() in LIVE_STATUSES}
+
+    def prune(self) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM watch_requests WHERE requested_at < ?", (now - REQUEST_TTL_S,))
+            self._conn.execute("DELETE FROM jobs WHERE updated_at < ?", (now - JOB_ROW_TTL_S,))
+            self._conn.execute("DELETE FROM replicas WHERE seen_at < ?", (now - JOB_ROW_TTL_S,))
+
+
+class Cluster:
+    """
+    One per replica. A background loop holds (or contends for) the poller lease;
+    the leader batch-refreshes every job any replica is watching and publishes the
+    results, while followers' status reads are served from the shared table. A dead
+    leader's lease expires after LEASE_TTL_S and the next replica to tick takes over,
+    so API traffic stays that of a single poller however many replicas run.
+    """
+
+    def __init__(self, store: ClusterStore, replica_id: str, *, tick_s: float = TICK_S, ttl_s: float = LEASE_TTL_S) -> None:
+        self.store = store
+        self.replica_id = replica_id
+        self.tick_s = tick_s
+        self.ttl_s = ttl_s
+        self.is_leader = False
+        self._leader_seen = 0.0
+        self._on_elected: List[Callable[[], None]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._polled = 0
+
+    def on_elected(self, callback: Callable[[], None]) -> None:
+        """Run `callback` each time this replica becomes leader (e.g. journal recovery)."""
+        if callback not in self._on_elected:
+            self._on_elected.append(callback)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        get_coalescer().set_shared(self)
+        self._thread = threading.Thread(target=self._run, name="sora-cluster", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Step down now instead of waiting for the lease to lapse."""
+        self._stop.set()
+        if self.is_leader:
+            self.store.release(LEADER_LEASE, self.replica_id)
+            self.is_leader = False
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception:  # pragma: no cover - keep coordinating through store hiccups
+                logger.exception("Cluster tick failed")
+            self._stop.wait(self.tick_s)
+
+    def tick(self) -> None:
+        was_leader = self.is_leader
+        self.is_leader = self.store.try_acquire(LEADER_LEASE, self.replica_id, self.ttl_s)
+        self.store.heartbeat(self.replica_id, self.is_leader)
+        if self.is_leader and not was_leader:
+            logger.info("Replica %s is now the leader", self.replica_id)
+            self.store.prune()
+            for callback in self._on_elected:
+                try:
+                    callback()
+                except Exception:  # pragma: no cover - never block the election loop
+                    logger.exception("on_elected callback failed")
+        elif was_leader and not self.is_leader:
+            logger.warning("Replica %s lost the leader lease", self.replica_id)
+        if self.is_leader:
+            self._poll_requested()
+
+    def _poll_requested(self) -> None:
+        pool = get_credential_pool()
+        by_key: Dict[Optional[str], List[str]] = {}
+        for video_id, credential in self.store.requested().items():
+            # Pins are shared through SORA_DATA_DIR; the requester's name only covers pins not visible yet.
+            name = pool.pinned_name(video_id) or (credential if credential in pool else pool.get().name)
+            by_key.setdefault(name, []).append(video_id)
+        for name, ids in by_key.items():
+            # One in_progress sweep per key; the coalescer publishes what it fetched.
+            get_coalescer().refresh_many(pool.client(name), ids)
+            self._polled += len(ids)
+
+    # ---- Shared status source (used by StatusCoalescer) ----
+
+    def following(self) -> bool:
+        """True when another live replica is leading, so status reads should not hit the API."""
+        if self.is_leader:
+            return False
+        now = time.monotonic()
+        if now - self._leader_seen > 1.0:
+            lease = self.store.lease(LEADER_LEASE)
+            alive = bool(lease and lease["holder"] != self.replica_id and lease["expires_at"] >= time.time())
+            self._leader_seen = now if alive else 0.0
+        return self._leader_seen > 0.0
+
+    def read(self, client: OpenAI, video_id: str) -> Optional[Dict[str, Any]]:
+        """Ask the leader to keep `video_id` polled and return its shared snapshot if fresh."""
+        self.store.request(video_id, get_credential_pool().pinned_name(video_id))
+        row = self.store.job(video_id)
+        if row is None:
+            return None
+        job, updated_at = row
+        live = str(job.get("status", "")).lower() in LIVE_STATUSES
+        return job if not live or time.time() - updated_at <= SHARED_STALE_S else None
+
+    def publish(self, jobs: Iterable[Dict[str, Any]]) -> None:
+        self.store.publish(jobs)
+
+    def stats(self) -> Dict[str, Any]:
+        lease = self.store.lease(LEADER_LEASE) or {}
+        return {
+            "replica": self.replica_id,
+            "role": "leader" if self.is_leader else "follower",
+            "leader": lease.get("holder"),
+            "term": lease.get("term"),
+            "replicas": len(self.store.replicas()),
+            "watching": len(self.store.requested()),
+            "polled": self._polled,
+        }
+
+
+def cluster_enabled() -> bool:
+    load_env()
+    return os.getenv("SORA_CLUSTER", "").strip() not in ("", "0")
+
+
+def runs_maintenance() -> bool:
+    """
+    Whether this process may do housekeeping on shared files (journal compaction):
+    always without a cluster, only on the leader with one. Plain appends to the
+    journal, archive, and pin file are safe from any replica; they hold file locks.
+    """
+    cluster = get_cluster()
+    return cluster is None or cluster.is_leader
+
+
+_CLUSTER: Optional[Cluster] = None
+_CLUSTER_LOCK = threading.Lock()
+
+
+def get_cluster() -> Optional[Cluster]:
+    """This replica's coordinator when SORA_CLUSTER=1 (id from SORA_REPLICA_ID), else None."""
+    global _CLUSTER
+    with _CLUSTER_LOCK:
+        if _CLUSTER is None and cluster_enabled():
+            replica_id = os.getenv("SORA_REPLICA_ID") or f"{socket.gethostname()}:{os.getpid()}"
+            _CLUSTER = Cluster(ClusterStore(), replica_id)
+        return _CLUSTER
@@ -0,0 +1,249 @@
+"""Process-wide single-flight coalescing of job status retrieves."""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Optional
+
+from lib.api import get_video, list_videos, to_dict
+from lib.cassette import get_cassette
+from lib.config import load_env
+from lib.startup import lazy_import
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+# Snapshots kept in memory; the least recently refreshed are evicted beyond this.
+MAX_SNAPSHOTS = 1000
+LIVE_STATUSES = ("queued", "in_progress", "processing", "pending")
+SWEEP_PAGE_SIZE = 100
+# Queued jobs never show up in an in_progress sweep; retrieve them at most this often.
+QUEUED_RECHECK_S = 30.0
+
+
+@dataclass
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[BaseException] = None
+    waiters: int = 0
+
+
+class StatusCoalescer:
+    """
+    Ensures at most one GET /v1/videos/{id} is in flight per video id. Concurrent
+    callers (other tabs, sessions, or the create flow) wait on the in-flight request
+    and share its result; snapshots younger than `freshness_s` are served from memory.
+    With a shared source installed (see lib.cluster), followers read other replicas'
+    results instead of calling the API, and everything fetched here is published.
+    """
+
+    def __init__(self, freshness_s: float = 2.0, *, max_snapshots: int = MAX_SNAPSHOTS) -> None:
+        self.freshness_s = freshness_s
+        self.max_snapshots = max(1, max_snapshots)
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _Flight] = {}
+        self._snapshots: Dict[str, tuple] = {}  # ordered oldest refresh first
+        self._sweep_lock = threading.Lock()
+        self._shared: Optional[Any] = None
+        self._requests = 0
+        self._coalesced = 0
+        self._cache_hits = 0
+        self._sweeps = 0
+        self._fallbacks = 0
+        self._shared_hits = 0
+
+    def _store_locked(self, video_id: str, job: Dict[str, Any], now: float) -> None:
+        self._snapshots.pop(video_id, None)  # re-insert so dict order stays refresh order
+        self._snapshots[video_id] = (now, job)
+
+    def set_shared(self, source: Any) -> None:
+        """Install a cross-replica source with following(), read(client, id), and publish(jobs)."""
+        self._shared = source
+
+    def _read_shared(self, client: OpenAI, video_id: str) -> Optional[Dict[str, Any]]:
+        shared = self._shared
+        if shared is None or not shared.following():
+            return None
+        job = shared.read(client, video_id)
+        if job is not None:
+            with self._lock:
+                self._shared_hits += 1
+                self._store_locked(video_id, dict(job), time.monotonic())
+        return job
+
+    def _publish(self, jobs: Iterable[Dict[str, Any]]) -> None:
+        if self._shared is not None:
+            try:
+                self._shared.publish(jobs)
+            except Exception:  # pragma: no cover - the shared store is best effort
+                pass
+
+    def retrieve(self, client: OpenAI, video_id: str, *, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """`max_age=0` is an explicit refresh and always goes to the API."""
+        max_age = self.freshness_s if max_age is None else max_age
+        with self._lock:
+            snap = self._snapshots.get(video_id)
+            if snap and time.monotonic() - snap[0] <= max_age:
+                self._cache_hits += 1
+                return dict(snap[1])
+        if max_age > 0:
+            shared = self._read_shared(client, video_id)
+            if shared is not None:
+                return dict(shared)
+        with self._lock:
+            flight = self._inflight.get(video_id)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[video_id] = _Flight()
+                self._requests += 1
+            else:
+                flight.waiters += 1
+                self._coalesced += 1
+
+        if leader:
+            try:
+                flight.result = to_dict(get_video(client, video_id))
+                with self._lock:
+                    self._store_locked(video_id, flight.result, time.monotonic())
+                    overflow = len(self._snapshots) > self.max_snapshots
+                if overflow:
+                    self.prune()
+                self._publish([flight.result])
+            except BaseException as exc:  # pragma: no cover - network path
+                flight.error = exc
+            finally:
+                with self._lock:
+                    self._inflight.pop(video_id, None)
+                flight.done.set()
+        else:
+            flight.done.wait()
+
+        if flight.error is not None:
+            raise flight.error
+        return dict(flight.result or {})
+
+    def fetcher(self, client: OpenAI) -> Callable[[str], Dict[str, Any]]:
+        """Adapter for poll_until_complete(fetch=...)."""
+        return lambda video_id: self.retrieve(client, video_id)
+
+    def prime(self, jobs: Iterable[Dict[str, Any]]) -> None:
+        """Store snapshots taken from a list response so retrieves can skip the network."""
+        now = time.monotonic()
+        with self._lock:
+            for job in jobs:
+                if job.get("id"):
+                    self._store_locked(str(job["id"]), dict(job), now)
+            overflow = len(self._snapshots) > self.max_snapshots
+        if overflow:
+            self.prune()
+
+    def refresh_many(self, client: OpenAI, video_ids: Iterable[str], *, max_pages: int = 10) -> Dict[str, Dict[str, Any]]:
+        """
+        Refresh live jobs with one paged `status=in_progress` list sweep instead of a
+        retrieve per job, then diff against the ids asked for: only jobs that dropped
+        out of the sweep (finished, failed, or deleted since) get a targeted retrieve.
+        Sweeps are serialized, so concurrent callers share the snapshots of the first.
+        Returns {video_id: job}; a job that no longer exists comes back as "deleted".
+        """
+        wanted = list(dict.fromkeys(str(v) for v in video_ids if v))
+        with self._sweep_lock:
+            now = time.monotonic()
+            with self._lock:
+                known = {v: self._snapshots.get(v) for v in wanted}
+            stale = [v for v, snap in known.items() if not snap or now - snap[0] > self.freshness_s]
+            results = {v: dict(snap[1]) for v, snap in known.items() if snap and v not in stale}
+            with self._lock:
+                self._cache_hits += len(results)
+            for video_id in list(stale):
+                shared = self._read_shared(client, video_id)
+                if shared is not None:
+                    results[video_id] = shared
+                    stale.remove(video_id)
+            if not stale:
+                return results
+
+            seen: Dict[str, Dict[str, Any]] = {}
+            after: Optional[str] = None
+            for _ in range(max_pages):
+                page = list_videos(client, limit=SWEEP_PAGE_SIZE, after=after, status="in_progress")
+                items = [to_dict(x) for x in page.get("data") or []]
+                with self._lock:
+                    self._sweeps += 1
+                self.prime(items)
+                self._publish(items)
+                seen.update((str(job.get("id")), job) for job in items if str(job.get("id")) in known)
+                if not page.get("has_more") or not items or all(v in seen for v in stale):
+                    break
+                after = items[-1].get("id")
+
+            openai = lazy_import("openai")
+            for video_id in stale:
+                if video_id in seen:
+                    results[video_id] = seen[video_id]
+                    continue
+                snap = known[video_id]
+                last = snap[1] if snap else {}
+                if str(last.get("status", "")).lower() == "queued" and now - snap[0] <= QUEUED_RECHECK_S:
+                    results[video_id] = dict(last)
+                    continue
+                with self._lock:
+                    self._fallbacks += 1
+                try:
+                    results[video_id] = self.retrieve(client, video_id, max_age=0)
+                except openai.NotFoundError:
+                    self.invalidate(video_id)
+                    results[video_id] = {**last, "id": video_id, "status": "deleted"}
+                except Exception:  # pragma: no cover - network path; keep the last known state
+                    if last:
+                        results[video_id] = dict(last)
+        return results
+
+    def invalidate(self, video_id: str) -> None:
+        with self._lock:
+            self._snapshots.pop(video_id, None)
+
+    def prune(self, older_than_s: float = 300.0) -> None:
+        """Drop stale snapshots, then the oldest beyond `max_snapshots`, so memory stays bounded."""
+        cutoff = time.monotonic() - older_than_s
+        with self._lock:
+            for video_id in [k for k, (at, _) in self._snapshots.items() if at < cutoff]:
+                del self._snapshots[video_id]
+            excess = len(self._snapshots) - self.max_snapshots
+            for video_id in list(self._snapshots)[: max(0, excess)]:
+                del self._snapshots[video_id]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "coalesced": self._coalesced,
+                "cache_hits": self._cache_hits,
+                "sweeps": self._sweeps,
+                "fallbacks": self._fallbacks,
+                "shared_hits": self._shared_hits,
+                "in_flight": len(self._inflight),
+                "snapshots": len(self._snapshots),
+            }
+
+
+_COALESCER: Optional[StatusCoalescer] = None
+_COALESCER_LOCK = threading.Lock()
+
+
+def get_coalescer() -> StatusCoalescer:
+    """Process-wide coalescer; SORA_STATUS_FRESHNESS_S sets the snapshot window."""
+    global _COALESCER
+    with _COALESCER_LOCK:
+        if _COALESCER is None:
+            load_env()
+            freshness = float(os.getenv("SORA_STATUS_FRESHNESS_S", "2") or 2)
+            cassette = get_cassette()
+            if cassette is not None:  # keep snapshot reuse in step with the replay clock
+                freshness *= cassette.time_scale
+            _COALESCER = StatusCoalescer(freshness)
+        return _COALESCER
@@ -0,0 +1,43 @@
+"""Environment-backed configuration shared by the Streamlit app and the CLI."""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from dotenv import load_dotenv
+
+
+_ENV_LOADED = False
+
+
+@dataclass
+class ApiConfig:
+    api_key: str
+    base_url: Optional[str] = None
+
+
+def load_env() -> None:
+    """Load `.env` into the process environment once (existing vars win)."""
+    global _ENV_LOADED
+    if not _ENV_LOADED:
+        load_dotenv()
+        _ENV_LOADED = True
+
+
+def load_api_config() -> ApiConfig:
+    """Read OPENAI_API_KEY / OPENAI_BASE_URL without touching Streamlit."""
+    load_env()
+    return ApiConfig(
+        api_key=os.getenv("OPENAI_API_KEY", ""),
+        base_url=os.getenv("OPENAI_BASE_URL") or None,
+    )
+
+
+def data_dir(*parts: str) -> str:
+    """Return (and create) a directory under SORA_DATA_DIR (default `.sora`)."""
+    load_env()
+    path = os.path.join(os.getenv("SORA_DATA_DIR") or ".sora", *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,303 @@
+"""Pool of API credentials: weighted least-load routing, health cooldowns, and job pinning."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional
+
+from lib.api import get_openai_client
+from lib.config import data_dir, load_api_config, load_env
+from lib.locks import file_lock
+from lib.startup import lazy_import
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+PIN_FILE = "credential_pins.tsv"
+COOLDOWN_BASE_S = 5.0
+COOLDOWN_MAX_S = 120.0
+
+
+@dataclass
+class Credential:
+    name: str
+    api_key: str = field(repr=False)
+    base_url: Optional[str] = None
+    weight: float = 1.0
+    max_in_flight: Optional[int] = None
+
+    @property
+    def masked_key(self) -> str:
+        return f"…{self.api_key[-4:]}" if len(self.api_key) > 8 else "…"
+
+
+@dataclass
+class _Usage:
+    in_flight: int = 0
+    submitted: int = 0
+    requests: int = 0
+    errors: int = 0
+    throttled: int = 0
+    failures_in_row: int = 0
+    cooldown_until: float = 0.0
+    remaining_requests: Optional[int] = None
+    last_error: Optional[str] = None
+
+
+def load_credentials() -> List[Credential]:
+    """
+    Read SORA_CREDENTIALS: a JSON list (inline, or a path to a JSON file) of
+    {"name", "api_key" | "api_key_env", "base_url", "weight", "max_in_flight"}.
+    Without it the pool is the single OPENAI_API_KEY credential.
+    """
+    load_env()
+    raw = os.getenv("SORA_CREDENTIALS", "").strip()
+    if not raw:
+        cfg = load_api_config()
+        return [Credential("default", cfg.api_key, cfg.base_url)] if cfg.api_key else []
+    if not raw.startswith("["):
+        with open(raw, encoding="utf-8") as fh:
+            raw = fh.read()
+    credentials: List[Credential] = []
+    for idx, entry in enumerate(json.loads(raw), start=1):
+        name = str(entry.get("name") or f"key{idx}")
+        api_key = entry.get("api_key") or os.getenv(entry.get("api_key_env") or "", "")
+        if not api_key:
+            raise RuntimeError(f"Credential '{name}' has no api_key (or its api_key_env is unset).")
+        if any(c.name == name for c in credentials):
+            raise RuntimeError(f"Duplicate credential name '{name}' in SORA_CREDENTIALS.")
+        limit = entry.get("max_in_flight")
+        credentials.append(
+            Credential(
+                name=name,
+                api_key=api_key,
+                base_url=entry.get("base_url") or os.getenv("OPENAI_BASE_URL") or None,
+                weight=max(float(entry.get("weight", 1) or 1), 0.01),
+                max_in_flight=int(limit) if limit else None,
+            )
+        )
+    return credentials
+
+
+class CredentialPool:
+    """
+    Routes new submissions to the healthy credential with the lowest in-flight load
+    per unit of weight, and remembers which credential created each video so later
+    retrieve/download/delete calls go to the org that owns it. Every HTTP response
+    feeds per-key stats; 429s and 5xx put a key on an exponential cooldown.
+    """
+
+    def __init__(self, credentials: Iterable[Credential], *, pin_path: Optional[str] = None) -> None:
+        self._creds: Dict[str, Credential] = {c.name: c for c in credentials}
+        self._usage: Dict[str, _Usage] = {name: _Usage() for name in self._creds}
+        self._clients: Dict[str, OpenAI] = {}
+        self._lock = threading.Lock()
+        self._pins: Dict[str, str] = {}
+        self._pins_offset = 0
+        self.pin_path = pin_path or os.path.join(data_dir(), PIN_FILE)
+
+    def __len__(self) -> int:
+        return len(self._creds)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._creds
+
+    def names(self) -> List[str]:
+        return list(self._creds)
+
+    def get(self, name: Optional[str] = None) -> Credential:
+        """The credential called `name` (the first one when None); raises RuntimeError on an unknown name."""
+        if name:
+            if name not in self._creds:
+                raise RuntimeError(f"Unknown credential '{name}'; configured: {', '.join(self._creds) or 'none'}.")
+            return self._creds[name]
+        if not self._creds:
+            raise RuntimeError("No API credentials configured. Set OPENAI_API_KEY or SORA_CREDENTIALS.")
+        return next(iter(self._creds.values()))
+
+    # ---- Clients and HTTP accounting ----
+
+    def client(self, name: Optional[str] = None) -> OpenAI:
+        cred = self.get(name)
+        with self._lock:
+            client = self._clients.get(cred.name)
+        if client is None:
+            client = get_openai_client(
+                cred.api_key,
+                base_url=cred.base_url,
+                event_hooks={
+                    "request": [lambda request, n=cred.name: self._on_request(n)],
+                    "response": [lambda response, n=cred.name: self._on_response(n, response)],
+                },
+            )
+            with self._lock:
+                client = self._clients.setdefault(cred.name, client)
+        return client
+
+    def name_of(self, client: Any) -> Optional[str]:
+        """Credential name behind a client built by this pool."""
+        with self._lock:
+            return next((name for name, c in self._clients.items() if c is client), None)
+
+    def _on_request(self, name: str) -> None:
+        with self._lock:
+            self._usage[name].requests += 1
+
+    def _on_response(self, name: str, response: Any) -> None:
+        status = int(getattr(response, "status_code", 0) or 0)
+        headers = getattr(response, "headers", {}) or {}
+        with self._lock:
+            usage = self._usage[name]
+            remaining = str(headers.get("x-ratelimit-remaining-requests", ""))
+            if remaining.isdigit():
+                usage.remaining_requests = int(remaining)
+            if status == 429 or status >= 500:
+                usage.errors += 1
+                usage.throttled += status == 429
+                usage.last_error = f"HTTP {status}"
+                retry_after = str(headers.get("retry-after", ""))
+                self._cool_down_locked(usage, float(retry_after) if retry_after.isdigit() else None)
+            elif status < 400:
+                usage.failures_in_row = 0
+
+    def _cool_down_locked(self, usage: _Usage, retry_after: Optional[float] = None) -> None:
+        usage.failures_in_row += 1
+        delay = retry_after or min(COOLDOWN_MAX_S, COOLDOWN_BASE_S * 2 ** (usage.failures_in_row - 1))
+        usage.cooldown_until = max(usage.cooldown_until, time.monotonic() + delay)
+
+    def record_error(self, name: str, exc: BaseException) -> None:
+        """Report a failure the response hook cannot see (connection errors)."""
+        openai = lazy_import("openai")
+        if isinstance(exc, openai.APIConnectionError):
+            with self._lock:
+                usage = self._usage[name]
+                usage.errors += 1
+                usage.last_error = str(exc)
+                self._cool_down_locked(usage)
+
+    # ---- Routing ----
+
+    def _healthy_locked(self, name: str) -> bool:
+        return time.monotonic() >= self._usage[name].cooldown_until
+
+    def _pick_locked(self) -> Credential:
+        candidates = [
+            cred
+            for cred in self._creds.values()
+            if self._healthy_locked(cred.name)
+            and (cred.max_in_flight is None or self._usage[cred.name].in_flight < cred.max_in_flight)
+        ]
+        if not candidates:
+            raise RuntimeError(
+                f"All {len(self._creds)} API key(s) are at capacity or cooling down after throttling; retry shortly."
+            )
+        return min(
+            candidates,
+            key=lambda c: (
+                (self._usage[c.name].in_flight + 1) / c.weight,
+                self._usage[c.name].submitted / c.weight,
+            ),
+        )
+
+    @contextmanager
+    def lease(self, name: Optional[str] = None) -> Iterator[Credential]:
+        """Hold a unit of load on the best credential (or `name`) while a job is tracked."""
+        cred = self.get(name) if name else None
+        with self._lock:
+            cred = cred or self._pick_locked()
+            usage = self._usage[cred.name]
+            usage.in_flight += 1
+            usage.submitted += 1
+        try:
+            yield cred
+        finally:
+            with self._lock:
+                usage.in_flight -= 1
+
+    # ---- Pinning ----
+
+    def _load_pins_locked(self) -> Dict[str, str]:
+        """Pins so far, reading only what was appended (by any process) since the last call."""
+        try:
+            with open(self.pin_path, "rb") as fh:
+                fh.seek(self._pins_offset)
+                tail = fh.read()
+        except OSError:
+            return self._pins
+        complete = tail.rfind(b"\n") + 1  # a line still being written is picked up next time
+        for line in tail[:complete].decode("utf-8").splitlines():
+            video_id, _, name = line.partition("\t")
+            if video_id and name:
+                self._pins[video_id] = name
+        self._pins_offset += complete
+        return self._pins
+
+    def pin(self, video_ids: Iterable[str], name: str) -> int:
+        """Record that `name` owns these videos; returns how many pins were new or changed."""
+        with self._lock, file_lock(f"{self.pin_path}.lock"):  # appends from the app, CLI and replicas never interleave
+            pins = self._load_pins_locked()
+            fresh = [str(v) for v in video_ids if v and pins.get(str(v)) != name]
+            if not fresh:
+                return 0
+            with open(self.pin_path, "a", encoding="utf-8") as fh:
+                fh.writelines(f"{video_id}\t{name}\n" for video_id in fresh)
+            pins.update((video_id, name) for video_id in fresh)
+            return len(fresh)
+
+    def pinned_name(self, video_id: Optional[str]) -> Optional[str]:
+        """Configured credential `video_id` is pinned to; re-reads pins other processes added on a miss."""
+        if not video_id:
+            return None
+        with self._lock:
+            name = self._pins.get(str(video_id)) or self._load_pins_locked().get(str(video_id))
+        return name if name in self._creds else None
+
+    def credential_for(self, video_id: Optional[str]) -> Credential:
+        """The credential that created `video_id` (the first one when unknown)."""
+        return self.get(self.pinned_name(video_id))
+
+    def client_for(self, video_id: Optional[str]) -> OpenAI:
+        return self.client(self.credential_for(video_id).name)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            pinned: Dict[str, int] = {}
+            for name in self._pins.values():
+                pinned[name] = pinned.get(name, 0) + 1
+            return [
+                {
+                    "name": cred.name,
+                    "key": cred.masked_key,
+                    "weight": cred.weight,
+                    "in_flight": usage.in_flight,
+                    "max_in_flight": cred.max_in_flight,
+                    "submitted": usage.submitted,
+                    "requests": usage.requests,
+                    "errors": usage.errors,
+                    "throttled": usage.throttled,
+                    "cooldown_s": round(max(0.0, usage.cooldown_until - now), 1),
+                    "remaining_requests": usage.remaining_requests,
+                    "pinned_jobs": pinned.get(cred.name, 0),
+                    "last_error": usage.last_error,
+                }
+                for cred, usage in ((self._creds[n], self._usage[n]) for n in self._creds)
+            ]
+
+
+_POOL: Optional[CredentialPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_credential_pool() -> CredentialPool:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = CredentialPool(load_credentials())
+        return _POOL
@@ -0,0 +1,120 @@
+"""Bulk export of rendered jobs into a ZIP archive streamed to disk."""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from lib.api import stream_video_to_path
+from lib.config import data_dir
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+@dataclass
+class ExportItemResult:
+    video_id: str
+    ok: bool
+    bytes: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class ExportResult:
+    path: str
+    items: List[ExportItemResult] = field(default_factory=list)
+    elapsed_s: float = 0.0
+
+    @property
+    def bytes_total(self) -> int:
+        return sum(item.bytes for item in self.items)
+
+    @property
+    def failures(self) -> List[ExportItemResult]:
+        return [item for item in self.items if not item.ok]
+
+    @property
+    def throughput_mb_s(self) -> float:
+        if self.elapsed_s <= 0:
+            return 0.0
+        return self.bytes_total / (1024 * 1024) / self.elapsed_s
+
+
+def default_export_path() -> str:
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(data_dir("exports"), f"sora-export-{stamp}.zip")
+
+
+def export_jobs_zip(
+    client: OpenAI,
+    jobs: List[Dict[str, Any]],
+    zip_path: Optional[str] = None,
+    *,
+    include_metadata: bool = True,
+    include_thumbnails: bool = False,
+    max_workers: int = 4,
+    on_progress: Optional[Callable[[int, int, ExportItemResult], None]] = None,
+    client_for: Optional[Callable[[str], OpenAI]] = None,
+) -> ExportResult:
+    """
+    Download each job's MP4 (plus optional metadata/thumbnail) on a bounded pool and
+    append it to a ZIP on disk. Media is spooled to a temp file per item, so memory
+    stays flat regardless of archive size. on_progress runs on the calling thread.
+    `client_for(video_id)` picks a per-job client (e.g. the key that created it).
+    """
+    zip_path = zip_path or default_export_path()
+    result = ExportResult(path=zip_path)
+    zip_lock = threading.Lock()
+    started = time.perf_counter()
+
+    with tempfile.TemporaryDirectory(prefix="sora-export-") as tmp_dir, zipfile.ZipFile(
+        zip_path, "w", compression=zipfile.ZIP_STORED, allowZip64=True
+    ) as zf:
+
+        def _add_file(src: str, arcname: str) -> int:
+            size = os.path.getsize(src)
+            with zip_lock:
+                zf.write(src, arcname)  # MP4/WebP are already compressed; store as-is
+            os.remove(src)
+            return size
+
+        def _export_one(job: Dict[str, Any]) -> ExportItemResult:
+            video_id = str(job.get("id"))
+            try:
+                client_ = client_for(video_id) if callable(client_for) else client
+                total = 0
+                tmp_video = os.path.join(tmp_dir, f"{video_id}.mp4")
+                stream_video_to_path(client_, video_id, tmp_video)
+                total += _add_file(tmp_video, f"{video_id}.mp4")
+                if include_thumbnails:
+                    tmp_thumb = os.path.join(tmp_dir, f"{video_id}.webp")
+                    stream_video_to_path(client_, video_id, tmp_thumb, variant="thumbnail")
+                    total += _add_file(tmp_thumb, f"{video_id}.webp")
+                if include_metadata:
+                    meta = json.dumps(job, indent=2, default=str).encode("utf-8")
+                    with zip_lock:
+                        zf.writestr(f"{video_id}.json", meta, compress_type=zipfile.ZIP_DEFLATED)
+                    total += len(meta)
+                return ExportItemResult(video_id=video_id, ok=True, bytes=total)
+            except Exception as exc:  # pragma: no cover - network path
+                return ExportItemResult(video_id=video_id, ok=False, error=str(exc))
+
+        workers = max(1, min(max_workers, len(jobs) or 1))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sora-export") as pool:
+            futures = [pool.submit(_export_one, job) for job in jobs]
+            for done, future in enumerate(as_completed(futures), start=1):
+                item = future.result()
+                result.items.append(item)
+                if callable(on_progress):
+                    on_progress(done, len(futures), item)
+
+    result.elapsed_s = time.perf_counter() - started
+    return result
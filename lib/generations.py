@@ -0,0 +1,224 @@
+"""Per-session concurrent generations: non-blocking submission plus shared background polling."""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from lib.api import create_video, extract_asset_url, safe_get_id, to_dict
+from lib.coalesce import get_coalescer
+from lib.config import load_env
+from lib.credentials import get_credential_pool
+from lib.journal import get_journal, resume_watch
+from lib.media import completion_variants, get_background_media
+from lib.predictor import get_predictor
+from lib.scheduler import get_scheduler
+from lib.search import get_prompt_index
+from lib.watcher import Watch, get_watcher
+
+
+# Interactive submissions give up on a local slot after this long.
+ADMISSION_TIMEOUT_S = 120
+# Finished generations are forgotten this long after they end, dismissed or not.
+RESULT_TTL_S = 6 * 3600
+# ...and beyond this many per session, oldest first.
+MAX_FINISHED_PER_OWNER = 20
+ACTIVE_STATES = ("waiting", "submitting", "rendering")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Generation:
+    key: str
+    owner: str
+    payload: Dict[str, Any]
+    state: str = "waiting"  # waiting | submitting | rendering | completed | failed | cancelled | timed_out
+    note: str = "Waiting for a slot…"
+    video_id: Optional[str] = None
+    credential: Optional[str] = None
+    job: Optional[Dict[str, Any]] = None
+    media_url: Optional[str] = None
+    variants: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    started: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+    applied: bool = False  # session state updated from the final job
+    dismissed: bool = False
+
+    @property
+    def prompt(self) -> str:
+        return str(self.payload.get("prompt") or "")
+
+    @property
+    def active(self) -> bool:
+        return self.state in ACTIVE_STATES
+
+
+class GenerationRunner:
+    """
+    Runs each submission on its own thread (admission queue, key lease, create)
+    and hands the job to the process-wide JobWatcher, so a session can keep
+    several renders in flight while its page stays interactive. Generations are
+    grouped by owner (the Streamlit session); at most `max_per_owner` may be
+    active at once.
+    """
+
+    def __init__(self, *, max_per_owner: int = 4) -> None:
+        self.max_per_owner = max(1, max_per_owner)
+        self._lock = threading.Lock()
+        self._by_owner: Dict[str, List[Generation]] = {}
+        self._seq = itertools.count(1)
+
+    def submit(self, owner: str, payload: Dict[str, Any]) -> Generation:
+        """Start a generation in the background; raises RuntimeError when the owner is at its cap."""
+        with self._lock:
+            self._prune_locked()
+            mine = self._by_owner.setdefault(owner, [])
+            active = sum(1 for g in mine if g.active)
+            if active >= self.max_per_owner:
+                raise RuntimeError(f"{active} generations are already running; wait for one to finish.")
+            gen = Generation(key=f"gen-{next(self._seq)}", owner=owner, payload=dict(payload))
+            mine.append(gen)
+        threading.Thread(target=self._run, args=(gen,), name=f"sora-{gen.key}", daemon=True).start()
+        return gen
+
+    def _run(self, gen: Generation) -> None:
+        pool = get_credential_pool()
+        scheduler = get_scheduler()
+        payload = gen.payload
+        # Released when the job stops being tracked, not when this thread returns.
+        cleanup = ExitStack()
+        try:
+
+            def _on_queue_wait(position: int, waited_s: float) -> None:
+                gen.note = f"Waiting for a {payload['model']} slot · #{position} in queue · {waited_s:.0f}s"
+
+            ticket = scheduler.acquire(
+                payload["model"], payload["size"], timeout=ADMISSION_TIMEOUT_S, on_wait=_on_queue_wait
+            )
+            cleanup.callback(scheduler.release, ticket)
+            cred = cleanup.enter_context(pool.lease())
+            client = pool.client(cred.name)
+            gen.state, gen.credential = "submitting", cred.name
+            gen.note = f"Sending payload to OpenAI Videos API with key '{cred.name}'." if len(pool) > 1 else "Sending payload…"
+            job = create_video(client, payload)
+            job_dict = to_dict(job)
+            job_id = safe_get_id(job) or job_dict.get("id")
+            if not job_id:
+                raise RuntimeError(f"No video id returned from create(). Raw: {job_dict}")
+            pool.pin([job_id], cred.name)
+            get_journal().record_submit(
+                job_id,
+                credential=cred.name,
+                prompt=gen.prompt,
+                model=payload["model"],
+                size=payload["size"],
+                seconds=payload["seconds"],
+            )
+            get_prompt_index().index_jobs([job_dict], prompts={job_id: gen.prompt})
+            gen.video_id, gen.job = job_id, job_dict
+            gen.state, gen.note = "rendering", "Queued…"
+            self._watch(gen, client, cleanup)
+        except Exception as exc:
+            if gen.credential is not None:
+                pool.record_error(gen.credential, exc)
+            cleanup.close()
+            self._end(gen, "failed", error=str(exc))
+
+    def _watch(self, gen: Generation, client: Any, cleanup: ExitStack) -> None:
+        predictor = get_predictor()
+        journal = get_journal()
+
+        def _on_tick(job: Dict[str, Any]) -> None:
+            gen.job = job
+            predictor.observe_tick(job)
+
+        def _on_done(watch: Watch) -> None:
+            cleanup.close()
+            journal.record_watch(watch)
+            if watch.state == "completed" and watch.job:
+                job = watch.job
+                predictor.observe_jobs([job])
+                get_prompt_index().index_jobs([job], prompts={watch.video_id: gen.prompt})
+                gen.media_url = extract_asset_url(job)
+                gen.variants = [v for v in completion_variants() if not (gen.media_url and v == "video")]
+                # Downloads outlive the page; result cards attach each file as it lands.
+                get_background_media().submit(client, watch.video_id, gen.variants)
+            elif watch.state == "cancelled" and watch.error == "abandoned":  # the session went away; the render goes on
+                try:
+                    resume_watch(watch.video_id)
+                except Exception as exc:  # pragma: no cover - left in the journal for the next start
+                    logger.warning("Could not hand off %s: %s", watch.video_id, exc)
+            self._end(gen, watch.state, job=watch.job, error=watch.error)
+
+        # The job exists and is billed; submit() already capped this session, so never refuse to watch it.
+        get_watcher().start(
+            client,
+            gen.video_id,
+            gen.owner,
+            model=gen.payload["model"],
+            seconds=gen.payload["seconds"],
+            fetch=get_coalescer().fetcher(client),
+            interval=predictor.next_poll_delay,
+            on_tick=_on_tick,
+            on_done=_on_done,
+            capped=False,
+        )
+
+    def _end(self, gen: Generation, state: str, *, job: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        gen.job = job or gen.job
+        gen.error = error
+        gen.note = ""
+        gen.finished = time.time()
+        gen.state = state  # last, so readers see a finished generation fully populated
+
+    def generations(self, owner: str) -> List[Generation]:
+        """The owner's generations that were not dismissed, newest first."""
+        with self._lock:
+            return [g for g in reversed(self._by_owner.get(owner, [])) if not g.dismissed]
+
+    def dismiss(self, owner: str, key: str) -> None:
+        with self._lock:
+            for gen in self._by_owner.get(owner, []):
+                if gen.key == key and not gen.active:
+                    gen.dismissed = True
+
+    def _prune_locked(self) -> None:
+        cutoff = time.time() - RESULT_TTL_S
+        for owner, gens in list(self._by_owner.items()):
+            gens[:] = [g for g in gens if g.active or not (g.dismissed or (g.finished or 0) < cutoff)]
+            finished = [g for g in gens if not g.active]
+            if len(finished) > MAX_FINISHED_PER_OWNER:
+                dropped = {id(g) for g in finished[: len(finished) - MAX_FINISHED_PER_OWNER]}
+                gens[:] = [g for g in gens if id(g) not in dropped]
+            if not gens:
+                del self._by_owner[owner]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            by_state: Dict[str, int] = {}
+            for gens in self._by_owner.values():
+                for gen in gens:
+                    by_state[gen.state] = by_state.get(gen.state, 0) + 1
+            return {"sessions": len(self._by_owner), "by_state": by_state, "max_per_session": self.max_per_owner}
+
+
+_RUNNER: Optional[GenerationRunner] = None
+_RUNNER_LOCK = threading.Lock()
+
+
+def get_generation_runner() -> GenerationRunner:
+    """Process-wide runner; SORA_MAX_GENERATIONS caps in-flight generations per session (default 4)."""
+    global _RUNNER
+    with _RUNNER_LOCK:
+        if _RUNNER is None:
+            load_env()
+            _RUNNER = GenerationRunner(max_per_owner=int(os.getenv("SORA_MAX_GENERATIONS", "4") or 4))
+        return _RUNNER
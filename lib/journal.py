@@ -0,0 +1,371 @@
+"""Durable journal of in-flight jobs so polling and downloads survive restarts."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, ContextManager, Dict, List, Optional
+
+from lib.autosave import media_deadline
+from lib.cluster import runs_maintenance
+from lib.coalesce import get_coalescer
+from lib.config import data_dir
+from lib.credentials import get_credential_pool
+from lib.locks import file_lock
+from lib.media import cached_media, completion_variants, get_background_media
+from lib.predictor import get_predictor
+from lib.search import get_prompt_index
+from lib.watcher import SYSTEM_OWNER, Watch, get_watcher
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+JOURNAL_FILE = "journal.jsonl"
+COMPACT_EVERY = 200
+# Give up on an entry that never reported a final status after this long.
+MAX_AGE_S = 24 * 3600
+COMPLETED_STATUSES = ("succeeded", "completed", "complete")
+FAILED_STATUSES = ("failed", "error", "canceled", "cancelled", "deleted")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JournalEntry:
+    id: str
+    submitted_at: float
+    credential: Optional[str] = None
+    prompt: str = ""
+    model: Optional[str] = None
+    size: Optional[str] = None
+    seconds: Optional[str] = None
+    status: str = "queued"
+    # When the rendered media stops being downloadable; set once the job completes.
+    expires_at: Optional[float] = None
+
+    @property
+    def completed(self) -> bool:
+        return self.status in COMPLETED_STATUSES
+
+    @property
+    def terminal(self) -> bool:
+        return self.completed or self.status in FAILED_STATUSES
+
+
+class JobJournal:
+    """
+    Append-only JSONL log of submissions and status changes. Each record is
+    fsynced before the call returns, so a crash loses at most a torn last line
+    (skipped on replay). An entry is settled once the job failed or was deleted,
+    or completed and its video is in the media cache or has expired; `compact()`
+    rewrites the file with only unsettled entries. Appends and compactions from
+    every process (app, CLI, replicas) serialize on `journal.jsonl.lock`; records
+    other processes append are picked up by re-reading the file's tail.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or os.path.join(data_dir(), JOURNAL_FILE)
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, JournalEntry]] = None
+        self._offset = 0
+        self._ino: Optional[int] = None
+        self._appends = 0
+
+    def _file_lock(self) -> ContextManager[bool]:
+        return file_lock(f"{self.path}.lock")
+
+    def _load_locked(self) -> Dict[str, JournalEntry]:
+        if self._entries is None:
+            self._entries, self._offset, self._ino = {}, 0, None
+            self._read_tail_locked()
+        return self._entries
+
+    def _read_tail_locked(self) -> None:
+        """Apply complete records appended since the last read (by any process)."""
+        try:
+            with open(self.path, "rb") as fh:
+                stat = os.fstat(fh.fileno())
+                if stat.st_ino != self._ino or stat.st_size < self._offset:  # compacted elsewhere: start over
+                    self._entries, self._offset, self._ino = {}, 0, stat.st_ino
+                fh.seek(self._offset)
+                tail = fh.read()
+        except OSError:  # not written yet
+            return
+        complete = tail.rfind(b"\n") + 1  # leave a line still being written for the next read
+        for line in tail[:complete].splitlines():
+            try:
+                self._apply_locked(json.loads(line))
+            except (ValueError, TypeError, KeyError):
+                continue  # torn or foreign line
+        self._offset += complete
+
+    def _apply_locked(self, record: Dict[str, Any]) -> None:
+        video_id = str(record["id"])
+        if record.get("op") == "submit":
+            self._entries[video_id] = JournalEntry(
+                id=video_id,
+                submitted_at=float(record.get("ts") or time.time()),
+                credential=record.get("credential"),
+                prompt=record.get("prompt") or "",
+                model=record.get("model"),
+                size=record.get("size"),
+                seconds=record.get("seconds"),
+                status=record.get("status") or "queued",
+                expires_at=record.get("expires_at"),
+            )
+        elif record.get("op") == "status" and video_id in self._entries:
+            entry = self._entries[video_id]
+            entry.status = str(record["status"])
+            if record.get("expires_at"):
+                entry.expires_at = float(record["expires_at"])
+
+    def _torn_tail(self) -> bool:
+        try:
+            with open(self.path, "rb") as fh:
+                fh.seek(-1, os.SEEK_END)
+                return fh.read(1) != b"\n"
+        except OSError:  # missing or empty
+            return False
+
+    def _append_locked(self, records: List[Dict[str, Any]]) -> None:
+        self._load_locked()
+        with self._file_lock():
+            torn = self._torn_tail()
+            with open(self.path, "a", encoding="utf-8") as fh:
+                if torn:  # a crash mid-write left a partial line; start a fresh one
+                    fh.write("\n")
+                fh.writelines(json.dumps(record) + "\n" for record in records)
+                fh.flush()
+                os.fsync(fh.fileno())
+            self._read_tail_locked()  # our records, plus anything other processes appended first
+        self._appends += len(records)
+
+    # ---- Recording ----
+
+    def record_submit(
+        self,
+        video_id: str,
+        *,
+        credential: Optional[str] = None,
+        prompt: str = "",
+        model: Optional[str] = None,
+        size: Optional[str] = None,
+        seconds: Any = None,
+    ) -> None:
+        record = {
+            "op": "submit",
+            "id": str(video_id),
+            "ts": time.time(),
+            "credential": credential,
+            "prompt": prompt,
+            "model": model,
+            "size": size,
+            "seconds": str(seconds) if seconds is not None else None,
+        }
+        with self._lock:
+            self._append_locked([record])
+
+    def record_status(self, video_id: str, status: Optional[str], *, job: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Log a status change for a journaled job; returns False if nothing was written.
+        Pass the retrieved `job` so a completion records when its media expires.
+        """
+        status = str(status or "").lower()
+        now = time.time()
+        with self._lock:
+            entry = self._lookup_locked(str(video_id))
+            if not status or entry is None or entry.status == status:
+                return False
+            record: Dict[str, Any] = {"op": "status", "id": entry.id, "status": status, "ts": now}
+            if status in COMPLETED_STATUSES:
+                job = job or {}
+                record["expires_at"] = media_deadline({**job, "completed_at": job.get("completed_at") or now})
+            self._append_locked([record])
+            due = self._appends >= COMPACT_EVERY
+        if due and runs_maintenance():  # on a cluster the leader compacts (recover() does on election)
+            self.compact()
+        return True
+
+    def record_watch(self, watch: Watch) -> None:
+        """Watcher `on_done` hook: journal the job's final status, if it has one."""
+        job = watch.job or {}
+        status = str(job.get("status") or "").lower()
+        if watch.state == "completed" or status in FAILED_STATUSES:
+            self.record_status(watch.video_id, status or "completed", job=job)
+
+    # ---- Replay ----
+
+    def _lookup_locked(self, video_id: str) -> Optional[JournalEntry]:
+        entry = self._load_locked().get(video_id)
+        if entry is None:  # journaled by another process (the CLI or another replica) since we last read
+            self._read_tail_locked()
+            entry = self._entries.get(video_id)
+        return entry
+
+    def _settled(self, entry: JournalEntry, now: float) -> bool:
+        if entry.status in FAILED_STATUSES or now - entry.submitted_at > MAX_AGE_S:
+            return True
+        if not entry.completed:
+            return False
+        # Nothing left to do once the video is cached, or once it can no longer be downloaded.
+        return cached_media(entry.id, "video") is not None or (entry.expires_at is not None and now > entry.expires_at)
+
+    def get(self, video_id: str) -> Optional[JournalEntry]:
+        with self._lock:
+            return self._lookup_locked(str(video_id))
+
+    def pending(self) -> List[JournalEntry]:
+        """Unsettled entries, oldest first."""
+        now = time.time()
+        with self._lock:
+            self._load_locked()
+            self._read_tail_locked()
+            entries = list(self._entries.values())
+        return sorted((e for e in entries if not self._settled(e, now)), key=lambda e: e.submitted_at)
+
+    def compact(self) -> int:
+        """Rewrite the journal with only unsettled entries; returns how many were dropped."""
+        now = time.time()
+        with self._lock, self._file_lock():
+            self._load_locked()
+            self._read_tail_locked()  # so records appended by other processes (the CLI) survive
+            entries = self._entries
+            keep = [e for e in entries.values() if not self._settled(e, now)]
+            dropped = len(entries) - len(keep)
+            fd, tmp_path = tempfile.mkstemp(prefix="journal.", suffix=".tmp", dir=os.path.dirname(self.path) or ".")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                    for entry in keep:
+                        record = {"op": "submit", "ts": entry.submitted_at, **asdict(entry)}
+                        record.pop("submitted_at")
+                        fh.write(json.dumps(record) + "\n")
+                    fh.flush()
+                    os.fsync(fh.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            stat = os.stat(self.path)
+            self._entries, self._offset, self._ino = {e.id: e for e in keep}, stat.st_size, stat.st_ino
+            self._appends = 0
+        return dropped
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load_locked())
+
+
+_JOURNAL: Optional[JobJournal] = None
+_JOURNAL_LOCK = threading.Lock()
+
+
+def get_journal() -> JobJournal:
+    global _JOURNAL
+    with _JOURNAL_LOCK:
+        if _JOURNAL is None:
+            _JOURNAL = JobJournal()
+        return _JOURNAL
+
+
+# ---- Recovery ----
+
+def _client_for(entry: JournalEntry) -> OpenAI:
+    pool = get_credential_pool()
+    return pool.client(entry.credential) if entry.credential in pool else pool.client_for(entry.id)
+
+
+def resume_watch(video_id: str) -> Optional[Watch]:
+    """
+    Keep polling a journaled job on a background watch owned by the process, then
+    download its media. Returns the watch, or None if the job needs no polling.
+    """
+    journal = get_journal()
+    entry = journal.get(video_id)
+    if entry is None or entry.terminal:
+        return None
+    client = _client_for(entry)
+    predictor = get_predictor()
+
+    def _on_tick(job: Dict[str, Any]) -> None:
+        predictor.observe_tick(job)
+        journal.record_status(entry.id, job.get("status"), job=job)
+
+    def _on_done(watch: Watch) -> None:
+        journal.record_watch(watch)
+        if watch.state == "completed" and watch.job:
+            predictor.observe_jobs([watch.job])
+            get_prompt_index().index_jobs([watch.job], prompts={entry.id: entry.prompt})
+            get_background_media().submit(client, entry.id, completion_variants())
+
+    return get_watcher().start(
+        client,
+        entry.id,
+        SYSTEM_OWNER,
+        model=entry.model,
+        seconds=entry.seconds,
+        fetch=get_coalescer().fetcher(client),
+        interval=predictor.next_poll_delay,
+        on_tick=_on_tick,
+        on_done=_on_done,
+    )
+
+
+def recover() -> Dict[str, int]:
+    """Replay the journal: resume polling unfinished jobs and fetch media for finished ones."""
+    journal = get_journal()
+    journal.compact()
+    counts = {"polling": 0, "downloading": 0, "deferred": 0}
+    for entry in journal.pending():
+        try:
+            if entry.completed:
+                get_background_media().submit(_client_for(entry), entry.id, completion_variants())
+                counts["downloading"] += 1
+            elif resume_watch(entry.id) is not None:
+                counts["polling"] += 1
+        except Exception as exc:  # pragma: no cover - left in the journal for the next start
+            counts["deferred"] += 1
+            logger.warning("Could not resume %s from the journal: %s", entry.id, exc)
+    return counts
+
+
+_RECOVERY_STARTED = False
+_RECOVERY_RUNNING = False
+_RECOVERY_LOCK = threading.Lock()
+
+
+def recover_in_background(*, rerun: bool = False) -> bool:
+    """
+    Run `recover()` on a daemon thread, once per process unless `rerun`; returns
+    True if a run started. Never overlaps a run that is still going.
+    """
+    global _RECOVERY_STARTED, _RECOVERY_RUNNING
+    with _RECOVERY_LOCK:
+        if _RECOVERY_RUNNING or (_RECOVERY_STARTED and not rerun):
+            return False
+        _RECOVERY_STARTED = _RECOVERY_RUNNING = True
+
+    def _run() -> None:
+        global _RECOVERY_RUNNING
+        try:
+            counts = recover()
+            if any(counts.values()):
+                logger.info("Journal recovery: %s", counts)
+        except Exception:  # pragma: no cover - never break app startup
+            logger.exception("Journal recovery failed")
+        finally:
+            with _RECOVERY_LOCK:
+                _RECOVERY_RUNNING = False
+
+    threading.Thread(target=_run, name="sora-journal-recovery", daemon=True).start()
+    return True
+
+
+def recover_after_election() -> None:
+    """`ClusterCoordinator.on_elected` hook: take over the jobs a previous leader was polling."""
+    recover_in_background(rerun=True)
@@ -0,0 +1,62 @@
+"""Inter-process file locks for data several processes write (app, CLI, replicas)."""
+
+from __future__ import annotations
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+    import msvcrt
+
+
+class LockBusy(RuntimeError):
+    """Raised when a lock is still held by someone else after the timeout."""
+
+
+def _try_lock(fd: int) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:  # pragma: no cover - Windows
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:  # pragma: no cover - Windows
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(path: str, *, timeout: Optional[float] = None, poll_s: float = 0.05) -> Iterator[bool]:
+    """
+    Hold an exclusive lock on `path` (created if missing, never deleted) for the block.
+    Waits up to `timeout` seconds (forever when None; `0` fails fast) and raises
+    LockBusy after that. Yields True if it had to wait for another holder. Locks
+    are per open file, so two threads of one process exclude each other too.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waited = False
+        while not _try_lock(fd):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise LockBusy(f"{path} is locked by another writer.")
+            waited = True
+            time.sleep(poll_s)
+        try:
+            yield waited
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,200 @@
+"""Local media cache and concurrent multi-variant downloads."""
+
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from lib.api import DownloadProgress, stream_video_to_path
+from lib.config import data_dir, load_env
+from lib.locks import LockBusy
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+VARIANT_EXTENSIONS = {"video": "mp4", "thumbnail": "webp", "spritesheet": "jpg"}
+DEFAULT_COMPLETION_VARIANTS = ("video", "thumbnail")
+
+
+def completion_variants() -> Tuple[str, ...]:
+    """Variants fetched when a render completes (SORA_COMPLETION_VARIANTS, comma separated)."""
+    load_env()
+    raw = os.getenv("SORA_COMPLETION_VARIANTS", "")
+    picked = tuple(v.strip() for v in raw.split(",") if v.strip() in VARIANT_EXTENSIONS)
+    return picked or DEFAULT_COMPLETION_VARIANTS
+
+
+def media_path(video_id: str, variant: str = "video") -> str:
+    ext = VARIANT_EXTENSIONS.get(variant, "bin")
+    return os.path.join(data_dir("media", video_id), f"{variant}.{ext}")
+
+
+def cached_media(video_id: str, variant: str = "video") -> Optional[str]:
+    """Return the cached file for a variant if it was already downloaded."""
+    path = media_path(video_id, variant)
+    return path if os.path.exists(path) else None
+
+
+def fetch_variant(
+    client: OpenAI,
+    video_id: str,
+    variant: str = "video",
+    *,
+    on_progress: Optional[Callable[[DownloadProgress], None]] = None,
+    lock_timeout: Optional[float] = None,
+) -> str:
+    """
+    Download a variant into the media cache unless it is already there. Every
+    cache write goes through here; see `stream_video_to_path` for `lock_timeout`.
+    """
+    path = cached_media(video_id, variant)
+    if path:
+        return path
+    path = media_path(video_id, variant)
+    stream_video_to_path(
+        client,
+        video_id,
+        path,
+        variant=None if variant == "video" else variant,
+        on_progress=on_progress,
+        lock_timeout=lock_timeout,
+    )
+    return path
+
+
+def fetch_variants(
+    client: OpenAI,
+    video_id: str,
+    variants: Iterable[str],
+    *,
+    max_workers: int = 3,
+) -> Iterator[Tuple[str, Optional[str], Optional[Exception]]]:
+    """
+    Download several variants in parallel into the media cache.
+    Yields (variant, path, error) in completion order so small assets (thumbnails)
+    can be shown while the MP4 is still streaming.
+    """
+    variants = list(dict.fromkeys(variants))
+    if not variants:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(variants))), thread_name_prefix="sora-media") as pool:
+        futures = {pool.submit(fetch_variant, client, video_id, variant): variant for variant in variants}
+        for future in as_completed(futures):
+            variant = futures[future]
+            try:
+                yield variant, future.result(), None
+            except Exception as exc:  # pragma: no cover - network path
+                yield variant, None, exc
+
+
+# ---- Background downloads ----
+
+class BackgroundMedia:
+    """
+    Process-wide pool for media downloads that outlive the script run that started
+    them. Pages submit variants and poll `state()` on later reruns; finished files
+    live in the media cache, so only in-flight work is tracked here.
+    """
+
+    def __init__(self, max_workers: int = 4) -> None:
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sora-bg-media")
+        self._lock = threading.Lock()
+        self._futures: Dict[Tuple[str, str], Future] = {}
+        self._progress: Dict[Tuple[str, str], DownloadProgress] = {}
+
+    def submit(self, client: OpenAI, video_id: str, variants: Iterable[str]) -> List[str]:
+        """Queue variants that are neither cached nor already downloading; returns those queued."""
+        queued = []
+        with self._lock:
+            for variant in dict.fromkeys(variants):
+                key = (video_id, variant)
+                running = self._futures.get(key)
+                if cached_media(video_id, variant) or (running is not None and not running.done()):
+                    continue
+
+                def _on_progress(progress: DownloadProgress, key: Tuple[str, str] = key) -> None:
+                    self._progress[key] = progress
+
+                self._futures[key] = self._pool.submit(
+                    fetch_variant, client, video_id, variant, on_progress=_on_progress
+                )
+                self._progress.pop(key, None)
+                queued.append(variant)
+        return queued
+
+    def run_inline(
+        self,
+        client: OpenAI,
+        video_id: str,
+        variant: str,
+        *,
+        on_progress: Optional[Callable[[DownloadProgress], None]] = None,
+    ) -> Optional[str]:
+        """
+        Download on the calling thread but register it like a submitted download, so
+        pages see its progress and nobody writes the same `.part` file concurrently.
+        Returns the path, or None when another download of this variant is running,
+        in this process or (holding the file lock) in another one.
+        """
+        key = (video_id, variant)
+        future: Future = Future()
+        with self._lock:
+            running = self._futures.get(key)
+            if running is not None and not running.done():
+                return None
+            self._futures[key] = future
+            self._progress.pop(key, None)
+        future.set_running_or_notify_cancel()
+
+        def _track(progress: DownloadProgress) -> None:
+            self._progress[key] = progress
+            if callable(on_progress):
+                on_progress(progress)
+
+        try:
+            path = fetch_variant(client, video_id, variant, on_progress=_track, lock_timeout=0)
+        except LockBusy:
+            with self._lock:
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+            future.set_result(None)
+            return None
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        future.set_result(path)
+        return path
+
+    def state(self, video_id: str, variant: str) -> Tuple[str, Optional[str], Optional[str]]:
+        """Return (state, path, error) where state is ready, pending, failed, or missing."""
+        with self._lock:
+            future = self._futures.get((video_id, variant))
+            if future is not None and not future.done():
+                return "pending", None, None
+            if future is not None:
+                error = future.exception()
+                if error is not None:  # kept until the variant is resubmitted
+                    return "failed", None, str(error)
+                self._futures.pop((video_id, variant), None)
+                self._progress.pop((video_id, variant), None)
+        path = cached_media(video_id, variant)
+        return ("ready", path, None) if path else ("missing", None, None)
+
+    def progress(self, video_id: str, variant: str) -> Optional[DownloadProgress]:
+        with self._lock:
+            return self._progress.get((video_id, variant))
+
+
+_BACKGROUND: Optional[BackgroundMedia] = None
+_BACKGROUND_LOCK = threading.Lock()
+
+
+def get_background_media() -> BackgroundMedia:
+    global _BACKGROUND
+    with _BACKGROUND_LOCK:
+        if _BACKGROUND is None:
+            _BACKGROUND = BackgroundMedia()
+        return _BACKGROUND
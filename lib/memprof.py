@@ -0,0 +1,141 @@
+"""Session-state memory accounting: deep sizes per key and totals across sessions."""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+import types
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from lib.config import load_env
+
+
+SESSION_TTL_S = 15 * 60
+_OPAQUE = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def deep_sizeof(obj: Any, *, max_items: int = 200_000) -> int:
+    """
+    Approximate retained size of obj in bytes, following containers and instance
+    attributes. Shared objects are counted once; DataFrames and uploaded files use
+    their own byte accounting.
+    """
+    seen: set = set()
+    stack = [obj]
+    total = 0
+    visited = 0
+    while stack and visited < max_items:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        visited += 1
+
+        if hasattr(item, "memory_usage") and hasattr(item, "columns"):  # pandas DataFrame
+            try:
+                total += int(item.memory_usage(deep=True).sum())
+                continue
+            except Exception:
+                pass
+        if hasattr(item, "getbuffer") and callable(item.getbuffer):  # UploadedFile / BytesIO
+            try:
+                total += item.getbuffer().nbytes
+                continue
+            except Exception:
+                pass
+
+        total += sys.getsizeof(item, 0)
+        if isinstance(item, (str, bytes, bytearray, int, float, bool, type(None)) + _OPAQUE):
+            continue
+        if isinstance(item, Mapping):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        else:
+            attrs = getattr(item, "__dict__", None)
+            if isinstance(attrs, dict):
+                stack.append(attrs)
+            for slot in getattr(type(item), "__slots__", ()) or ():
+                if hasattr(item, slot):
+                    stack.append(getattr(item, slot))
+    return total
+
+
+def state_breakdown(state: Mapping, keys: Optional[Iterable[str]] = None) -> List[Tuple[str, int]]:
+    """Deep size of each session-state key, largest first."""
+    names = list(keys) if keys is not None else [str(k) for k in state.keys()]
+    sizes = []
+    for name in names:
+        try:
+            sizes.append((name, deep_sizeof(state[name])))
+        except Exception:  # key vanished or object refuses introspection
+            continue
+    return sorted(sizes, key=lambda kv: kv[1], reverse=True)
+
+
+def warn_threshold_bytes() -> int:
+    load_env()
+    raw = os.getenv("SORA_SESSION_MEM_WARN_MB", "200")
+    try:
+        return int(float(raw) * 1024 * 1024)
+    except ValueError:
+        return 200 * 1024 * 1024
+
+
+class SessionMemoryRegistry:
+    """Latest per-session measurements, aged out after SESSION_TTL_S of silence."""
+
+    def __init__(self, ttl_s: float = SESSION_TTL_S) -> None:
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, session_id: str, breakdown: List[Tuple[str, int]], total: Optional[int] = None) -> int:
+        """Store a session's per-key sizes; pass `total` when keys share objects."""
+        total = sum(size for _, size in breakdown) if total is None else total
+        with self._lock:
+            self._sessions[session_id] = {
+                "total": total,
+                "top": breakdown[:5],
+                "updated": time.time(),
+            }
+            self._prune_locked()
+        return total
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _prune_locked(self) -> None:
+        cutoff = time.time() - self.ttl_s
+        for sid in [s for s, info in self._sessions.items() if info["updated"] < cutoff]:
+            del self._sessions[sid]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._prune_locked()
+            sessions = sorted(self._sessions.items(), key=lambda kv: kv[1]["total"], reverse=True)
+            return {
+                "sessions": len(sessions),
+                "total": sum(info["total"] for _, info in sessions),
+                "largest": [(sid, info["total"], info["top"]) for sid, info in sessions[:5]],
+            }
+
+
+_REGISTRY = SessionMemoryRegistry()
+
+
+def get_registry() -> SessionMemoryRegistry:
+    return _REGISTRY
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
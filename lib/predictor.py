@@ -0,0 +1,289 @@
+"""History-based completion-time predictor used to schedule polls and show ETAs."""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from lib.api import get_progress_percent
+from lib.config import data_dir
+from lib.locks import file_lock
+
+
+COMPLETED_STATUSES = ("succeeded", "completed", "complete")
+QUEUED_STATUSES = ("queued", "pending")
+FAILED_STATUSES = ("failed", "error", "canceled", "cancelled", "deleted")
+MIN_SAMPLES = 3
+# Most recently trained ids remembered (and persisted) so restarts don't count them twice.
+MAX_SEEN = 5000
+# Progress samples of jobs that stop ticking without completing are dropped after this long.
+PROGRESS_TTL_S = 3600
+
+# Prior used until history exists: seconds of wall time per rendered second, plus overhead.
+PRIOR_OVERHEAD_S = 20.0
+PRIOR_S_PER_RENDERED_S = {"sora-2": 8.0, "sora-2-pro": 20.0}
+PRIOR_HD_FACTOR = 1.5
+# Learned tables: total time-to-complete, and its split into queue wait and render time.
+TABLES = ("latency", "queue", "render")
+
+
+@dataclass
+class Estimate:
+    mean_s: float
+    std_s: float
+    samples: int
+    basis: str
+
+
+class _RunningStats:
+    """Welford mean/variance accumulator."""
+
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self, n: int = 0, mean: float = 0.0, m2: float = 0.0) -> None:
+        self.n, self.mean, self.m2 = n, mean, m2
+
+    def add(self, value: float) -> None:
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+
+def _levels(model: Any, size: Any, seconds: Any) -> List[Tuple[str, str]]:
+    """Keys from most to least specific; estimate() falls back along this list."""
+    model, size, seconds = str(model or "?"), str(size or "?"), str(seconds or "?")
+    return [
+        ("model+size+seconds", f"{model}|{size}|{seconds}"),
+        ("model+seconds", f"{model}|*|{seconds}"),
+        ("model", f"{model}|*|*"),
+    ]
+
+
+def _ts(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class CompletionPredictor:
+    """
+    Learns time-to-complete per (model, size, seconds) from finished jobs and refines
+    per-job ETAs from progress samples recorded on each poll tick. The API reports
+    no start time, so queue wait is measured as the elapsed time at the first tick
+    that shows the job running; jobs watched that way also train separate queue and
+    render tables, and a job known to have started gets its ETA from render time
+    alone. Jobs only seen once finished (listings) train the total only.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, _RunningStats]] = {table: {} for table in TABLES}
+        self._seen: Dict[str, None] = {}  # insertion-ordered, oldest first
+        # Samples trained since the last save, merged into the file under its lock.
+        self._pending: Dict[str, List[Tuple[str, str, float]]] = {}
+        self._progress: Dict[str, List[Tuple[float, int]]] = {}
+        self._progress_at: Dict[str, float] = {}
+        self._started: Dict[str, float] = {}  # video id -> seconds from creation to first running tick
+        if path:
+            self._stats, self._seen = self._read()
+
+    # ---- persistence ----
+
+    def _read(self) -> Tuple[Dict[str, Dict[str, _RunningStats]], Dict[str, None]]:
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                raw = json.load(fh)
+        except (OSError, ValueError):
+            raw = {}
+        stats = {table: {k: _RunningStats(*v) for k, v in raw.get(table, {}).items()} for table in TABLES}
+        return stats, dict.fromkeys(raw.get("seen", []))
+
+    def _save(self) -> None:
+        """
+        Merge samples trained here into predictor.json, which the app and the CLI
+        share: under the file lock, re-read it, add pending samples for ids it has
+        not trained on yet, write it back, and adopt the merged tables.
+        """
+        if not self.path:
+            self._pending.clear()
+            return
+        with file_lock(f"{self.path}.lock"):
+            stats, seen = self._read()
+            for video_id, samples in self._pending.items():
+                if video_id in seen:
+                    continue
+                seen[video_id] = None
+                for table, key, value in samples:
+                    stats[table].setdefault(key, _RunningStats()).add(value)
+            for video_id in list(seen)[: max(0, len(seen) - MAX_SEEN)]:
+                del seen[video_id]
+            payload = {table: {k: [s.n, s.mean, s.m2] for k, s in stats[table].items()} for table in TABLES}
+            payload["seen"] = list(seen)
+            fd, tmp = tempfile.mkstemp(prefix="predictor.", suffix=".tmp", dir=os.path.dirname(self.path) or ".")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                    json.dump(payload, fh)
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        self._stats, self._seen = stats, seen
+        self._pending.clear()
+
+    # ---- training ----
+
+    def observe_tick(self, job: Dict[str, Any], now: Optional[float] = None) -> None:
+        """Record a (elapsed, progress) sample for an in-flight job."""
+        video_id = str(job.get("id") or "")
+        created = _ts(job.get("created_at") or job.get("created"))
+        if not video_id or created is None:
+            return
+        now = now or time.time()
+        with self._lock:
+            self._prune_progress_locked(now)
+            status = str(job.get("status", "")).lower()
+            if status in FAILED_STATUSES:
+                self._forget_locked(video_id)
+                return
+            progress = get_progress_percent(job)
+            samples = self._progress.setdefault(video_id, [])
+            samples.append((now - created, progress))
+            del samples[:-50]
+            self._progress_at[video_id] = now
+            if video_id not in self._started and (progress > 0 or status not in QUEUED_STATUSES):
+                # A queue time needs an earlier tick that saw the job queued; -1 marks it unknown.
+                self._started[video_id] = now - created if len(samples) > 1 else -1.0
+
+    def _forget_locked(self, video_id: str) -> None:
+        self._progress.pop(video_id, None)
+        self._progress_at.pop(video_id, None)
+        self._started.pop(video_id, None)
+
+    def _prune_progress_locked(self, now: float) -> None:
+        for video_id in [k for k, at in self._progress_at.items() if now - at > PROGRESS_TTL_S]:
+            self._forget_locked(video_id)
+
+    def observe_jobs(self, jobs: Iterable[Dict[str, Any]]) -> int:
+        """Train on completed jobs; already-seen ids are ignored. Returns new samples."""
+        added = 0
+        with self._lock:
+            for job in jobs:
+                video_id = str(job.get("id") or "")
+                if not video_id or video_id in self._seen:
+                    continue
+                if str(job.get("status", "")).lower() not in COMPLETED_STATUSES:
+                    continue
+                created = _ts(job.get("created_at") or job.get("created"))
+                completed = _ts(job.get("completed_at"))
+                if created is None or completed is None or completed <= created:
+                    continue
+                self._seen[video_id] = None
+                latency = completed - created
+                values = [("latency", latency)]
+                queued = self._started.get(video_id, -1.0)
+                if 0 <= queued <= latency:
+                    values += [("queue", queued), ("render", latency - queued)]
+                samples = [
+                    (table, key, value)
+                    for _, key in _levels(job.get("model"), job.get("size"), job.get("seconds"))
+                    for table, value in values
+                ]
+                for table, key, value in samples:
+                    self._stats[table].setdefault(key, _RunningStats()).add(value)
+                self._pending[video_id] = samples
+                self._forget_locked(video_id)
+                added += 1
+            if added:
+                self._save()
+        return added
+
+    # ---- inference ----
+
+    def _learned(self, table: str, model: Any, size: Any, seconds: Any) -> Optional[Estimate]:
+        with self._lock:
+            for basis, key in _levels(model, size, seconds):
+                stats = self._stats[table].get(key)
+                if stats and stats.n >= MIN_SAMPLES:
+                    return Estimate(stats.mean, max(stats.std, 0.1 * stats.mean), stats.n, basis)
+        return None
+
+    def estimate(self, model: Any, size: Any, seconds: Any) -> Estimate:
+        """Expected total time-to-complete (and spread) for a new job."""
+        learned = self._learned("latency", model, size, seconds)
+        if learned is not None:
+            return learned
+        try:
+            rendered = float(seconds)
+        except (TypeError, ValueError):
+            rendered = 8.0
+        mean = PRIOR_OVERHEAD_S + rendered * PRIOR_S_PER_RENDERED_S.get(str(model), 12.0)
+        if "1080" in str(size) or "1792" in str(size):
+            mean *= PRIOR_HD_FACTOR
+        return Estimate(mean, 0.5 * mean, 0, "prior")
+
+    def eta(self, job: Dict[str, Any], now: Optional[float] = None) -> Optional[float]:
+        """Seconds until the job is expected to finish (None if it can't be dated)."""
+        created = _ts(job.get("created_at") or job.get("created"))
+        if created is None:
+            return None
+        elapsed = max(0.0, (now or time.time()) - created)
+        est = self.estimate(job.get("model"), job.get("size"), job.get("seconds"))
+        history_eta = max(0.0, est.mean_s - elapsed)
+
+        with self._lock:
+            samples = list(self._progress.get(str(job.get("id")), []))
+            started = self._started.get(str(job.get("id")))
+        render = self._learned("render", job.get("model"), job.get("size"), job.get("seconds"))
+        if render is not None and started is not None and started >= 0:
+            # Past the queue: a long wait no longer eats into the expected render time.
+            history_eta = max(0.0, render.mean_s - (elapsed - started))
+        moving = [(t, p) for t, p in samples if 0 < p < 100]
+        if len(moving) >= 2 and moving[-1][1] > moving[0][1]:
+            (t0, p0), (t1, p1) = moving[0], moving[-1]
+            rate = (p1 - p0) / max(t1 - t0, 1e-6)
+            progress_eta = (100 - p1) / rate - (elapsed - t1)
+            # Trust observed progress more as the render advances.
+            weight = p1 / 100.0
+            return max(0.0, weight * progress_eta + (1 - weight) * history_eta)
+        return history_eta
+
+    def next_poll_delay(
+        self,
+        job: Dict[str, Any],
+        *,
+        min_s: float = 2.0,
+        max_s: float = 30.0,
+        now: Optional[float] = None,
+    ) -> float:
+        """Sleep until shortly before the predicted finish, then poll at min_s."""
+        remaining = self.eta(job, now)
+        if remaining is None:
+            return min_s
+        est = self.estimate(job.get("model"), job.get("size"), job.get("seconds"))
+        return max(min_s, min(max_s, remaining - est.std_s))
+
+
+_PREDICTOR: Optional[CompletionPredictor] = None
+_PREDICTOR_LOCK = threading.Lock()
+
+
+def get_predictor() -> CompletionPredictor:
+    """Process-wide predictor persisted under SORA_DATA_DIR."""
+    global _PREDICTOR
+    with _PREDICTOR_LOCK:
+        if _PREDICTOR is None:
+            _PREDICTOR = CompletionPredictor(os.path.join(data_dir(), "predictor.json"))
+        return _PREDICTOR
@@ -0,0 +1,161 @@
+"""Opt-in per-rerun profiling: cProfile stats plus sampled stacks for flame graphs."""
+
+from __future__ import annotations
+
+import cProfile
+import glob
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from lib.config import data_dir, load_env
+
+
+DEFAULT_TOP_N = 15
+SAMPLE_INTERVAL_S = 0.005
+# Oldest dumps beyond this many runs are deleted.
+MAX_RUNS_KEPT = 200
+_SITE_RE = re.compile(r".*[/\\](?:site|dist)-packages[/\\]")
+
+
+def profiling_enabled(query_params: Optional[Any] = None) -> bool:
+    """SORA_PROFILE=1 profiles every run; `?profile=1` profiles one browser tab."""
+    load_env()
+    if os.getenv("SORA_PROFILE", "").strip() not in ("", "0"):
+        return True
+    return query_params is not None and str(query_params.get("profile", "")) == "1"
+
+
+def profile_top_n() -> int:
+    load_env()
+    try:
+        return max(1, int(os.getenv("SORA_PROFILE_TOP_N", DEFAULT_TOP_N)))
+    except ValueError:
+        return DEFAULT_TOP_N
+
+
+@dataclass
+class RunProfile:
+    label: str
+    started: float = field(default_factory=time.time)
+    wall_ms: float = 0.0
+    samples: int = 0
+    prof_path: Optional[str] = None
+    collapsed_path: Optional[str] = None
+    top: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def _frame_label(code: Any) -> str:
+    path = code.co_filename
+    short = _SITE_RE.sub("", path)
+    if short == path:
+        try:
+            short = os.path.relpath(path)
+        except ValueError:  # other drive on Windows
+            short = os.path.basename(path)
+    return f"{code.co_name} ({short}:{code.co_firstlineno})".replace(";", ",")
+
+
+class _StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval into collapsed-stack counts."""
+
+    def __init__(self, thread_id: int, interval_s: float = SAMPLE_INTERVAL_S) -> None:
+        super().__init__(name="sora-profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.counts: Dict[str, int] = {}
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                key = ";".join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    def stop(self) -> Dict[str, int]:
+        self._done.set()
+        self.join(timeout=1.0)
+        return self.counts
+
+
+def _top_functions(profiler: cProfile.Profile, limit: int) -> List[Dict[str, Any]]:
+    stats = pstats.Stats(profiler).stats  # {(file, line, name): (cc, ncalls, self_s, cum_s, callers)}
+    rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    top = []
+    for (path, line, name), (_, ncalls, self_s, cum_s, _) in rows:
+        where = f"{_SITE_RE.sub('', path)}:{line}" if line else path
+        top.append(
+            {
+                "function": f"{name} ({where})",
+                "calls": ncalls,
+                "self_ms": round(self_s * 1000, 2),
+                "cum_ms": round(cum_s * 1000, 2),
+            }
+        )
+    return top
+
+
+def _prune(out_dir: str, keep: int = MAX_RUNS_KEPT) -> None:
+    prof_files = sorted(glob.glob(os.path.join(out_dir, "*.prof")))
+    for old in prof_files[:-keep]:
+        for path in (old, old[: -len(".prof")] + ".collapsed"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+@contextmanager
+def profile_run(label: str, *, top_n: Optional[int] = None, out_dir: Optional[str] = None) -> Iterator[RunProfile]:
+    """
+    Profile the enclosed block (one script run) on the current thread. Writes
+    `<stamp>-<label>.prof` (pstats/snakeviz) and `<stamp>-<label>.collapsed`
+    (flamegraph.pl / speedscope) under SORA_DATA_DIR/profiles, and fills
+    `top` with the hottest functions by self time. Files are written even when
+    the block exits via st.rerun()/st.stop().
+    """
+    result = RunProfile(label=label)
+    profiler: Optional[cProfile.Profile] = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as exc:  # another profiler already owns this interpreter (3.12+)
+        profiler = None
+        result.error = f"cProfile unavailable: {exc}"
+    sampler = _StackSampler(threading.get_ident())
+    sampler.start()
+    started = time.perf_counter()
+    try:
+        yield result
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        counts = sampler.stop()
+        result.wall_ms = (time.perf_counter() - started) * 1000.0
+        result.samples = sum(counts.values())
+        out_dir = out_dir or data_dir("profiles")
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(result.started))
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_") or "run"
+        base = os.path.join(out_dir, f"{stamp}-{int(result.started * 1000) % 1000:03d}-{slug}")
+        try:
+            if profiler is not None:
+                result.prof_path = f"{base}.prof"
+                profiler.dump_stats(result.prof_path)
+                result.top = _top_functions(profiler, top_n or profile_top_n())
+            result.collapsed_path = f"{base}.collapsed"
+            with open(result.collapsed_path, "w", encoding="utf-8") as fh:
+                fh.writelines(f"{stack} {count}\n" for stack, count in sorted(counts.items()))
+            _prune(out_dir)
+        except OSError as exc:  # pragma: no cover - disk path
+            result.error = str(exc)
@@ -0,0 +1,218 @@
+"""Process-wide submission scheduler with priorities, concurrency caps, and admission control."""
+
+from __future__ import annotations
+
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from lib.config import load_env
+
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+PRIORITY_LABELS = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BULK: "bulk"}
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when the queue is full or a submission waited past its timeout."""
+
+
+@dataclass
+class Ticket:
+    model: str
+    size: str
+    priority: int = PRIORITY_INTERACTIVE
+    seq: int = 0
+    enqueued_at: float = field(default_factory=time.monotonic)
+    admitted_at: Optional[float] = None
+
+    @property
+    def keys(self) -> List[str]:
+        return [f"model:{self.model}", f"size:{self.size}"]
+
+    @property
+    def waited_s(self) -> float:
+        end = self.admitted_at if self.admitted_at is not None else time.monotonic()
+        return end - self.enqueued_at
+
+
+class SubmissionScheduler:
+    """
+    Gate job submissions so the number of in-flight renders per model and per
+    resolution stays under quota. Waiters are served by (priority, arrival); a
+    waiter cannot overtake an earlier one competing for the same model or size,
+    and bulk work may not use the last `interactive_reserve` slots of a model.
+    """
+
+    def __init__(
+        self,
+        *,
+        model_limits: Optional[Dict[str, int]] = None,
+        size_limits: Optional[Dict[str, int]] = None,
+        max_queue: int = 20,
+        interactive_reserve: int = 0,
+    ) -> None:
+        self._limits: Dict[str, int] = {}
+        for model, limit in (model_limits or {}).items():
+            self._limits[f"model:{model}"] = limit
+        for size, limit in (size_limits or {}).items():
+            self._limits[f"size:{size}"] = limit
+        self.max_queue = max_queue
+        self.interactive_reserve = interactive_reserve
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._waiting: List[Ticket] = []
+        self._in_flight: Dict[str, int] = {}
+        self._waits: Deque[float] = deque(maxlen=200)
+        self._admitted = 0
+        self._rejected = 0
+
+    # ---- capacity checks (call with the lock held) ----
+
+    def _limit_for(self, key: str, priority: int) -> Optional[int]:
+        limit = self._limits.get(key)
+        if limit is None:
+            return None
+        if priority > PRIORITY_INTERACTIVE and key.startswith("model:"):
+            return max(1, limit - self.interactive_reserve)
+        return limit
+
+    def _fits(self, ticket: Ticket) -> bool:
+        for key in ticket.keys:
+            limit = self._limit_for(key, ticket.priority)
+            if limit is not None and self._in_flight.get(key, 0) >= limit:
+                return False
+        return True
+
+    def _can_admit(self, ticket: Ticket) -> bool:
+        if not self._fits(ticket):
+            return False
+        mine = set(ticket.keys)
+        for other in self._waiting:
+            if other is ticket:
+                return True
+            if mine.intersection(other.keys):
+                return False  # an earlier/higher-priority waiter wants the same slot
+        return True
+
+    # ---- public API ----
+
+    def acquire(
+        self,
+        model: str,
+        size: str,
+        *,
+        priority: int = PRIORITY_INTERACTIVE,
+        timeout: Optional[float] = None,
+        on_wait: Optional[Callable[[int, float], None]] = None,
+    ) -> Ticket:
+        """
+        Block until a slot is free and return the admitted ticket.
+        on_wait(position, waited_s) is called about once a second while queued.
+        """
+        with self._cond:
+            if len(self._waiting) >= self.max_queue:
+                self._rejected += 1
+                raise AdmissionRejected(f"Submission queue is full ({self.max_queue} waiting).")
+            ticket = Ticket(model=str(model), size=str(size), priority=priority, seq=next(self._seq))
+            self._waiting.append(ticket)
+            self._waiting.sort(key=lambda t: (t.priority, t.seq))
+            deadline = None if timeout is None else time.monotonic() + timeout
+            last_report = 0.0
+            try:
+                while not self._can_admit(ticket):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._rejected += 1
+                        raise AdmissionRejected(f"Waited {ticket.waited_s:.0f}s for a {model} slot; try again later.")
+                    if callable(on_wait) and time.monotonic() - last_report >= 1.0:
+                        last_report = time.monotonic()
+                        position = self._waiting.index(ticket) + 1
+                        self._cond.release()  # don't hold the lock across UI callbacks
+                        try:
+                            on_wait(position, ticket.waited_s)
+                        finally:
+                            self._cond.acquire()
+                        continue
+                    self._cond.wait(1.0 if remaining is None else min(1.0, remaining))
+            finally:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+            ticket.admitted_at = time.monotonic()
+            for key in ticket.keys:
+                self._in_flight[key] = self._in_flight.get(key, 0) + 1
+            self._waits.append(ticket.waited_s)
+            self._admitted += 1
+            return ticket
+
+    def release(self, ticket: Ticket) -> None:
+        with self._cond:
+            if ticket.admitted_at is None:
+                return
+            for key in ticket.keys:
+                self._in_flight[key] = max(0, self._in_flight.get(key, 0) - 1)
+            ticket.admitted_at = None
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, model: str, size: str, **kwargs: Any) -> Iterator[Ticket]:
+        ticket = self.acquire(model, size, **kwargs)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            waits = sorted(self._waits)
+            by_priority: Dict[str, int] = {}
+            for ticket in self._waiting:
+                label = PRIORITY_LABELS.get(ticket.priority, str(ticket.priority))
+                by_priority[label] = by_priority.get(label, 0) + 1
+            return {
+                "queue_depth": len(self._waiting),
+                "queued_by_priority": by_priority,
+                "in_flight": {k: v for k, v in self._in_flight.items() if v},
+                "limits": dict(self._limits),
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "avg_wait_s": round(sum(waits) / len(waits), 2) if waits else 0.0,
+                "p95_wait_s": round(waits[int(0.95 * (len(waits) - 1))], 2) if waits else 0.0,
+            }
+
+
+def _parse_limits(raw: str) -> Dict[str, int]:
+    """Parse 'sora-2=4,sora-2-pro=2' into a dict, ignoring malformed entries."""
+    limits: Dict[str, int] = {}
+    for part in raw.split(","):
+        name, _, value = part.partition("=")
+        try:
+            limits[name.strip()] = max(1, int(value))
+        except ValueError:
+            continue
+    return limits
+
+
+_SCHEDULER: Optional[SubmissionScheduler] = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+def get_scheduler() -> SubmissionScheduler:
+    """Return the process-wide scheduler configured from SORA_* environment variables."""
+    global _SCHEDULER
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is None:
+            load_env()
+            _SCHEDULER = SubmissionScheduler(
+                model_limits=_parse_limits(os.getenv("SORA_MODEL_LIMITS", "")),
+                size_limits=_parse_limits(os.getenv("SORA_SIZE_LIMITS", "")),
+                max_queue=int(os.getenv("SORA_MAX_QUEUE", "20") or 20),
+                interactive_reserve=int(os.getenv("SORA_INTERACTIVE_RESERVE", "0") or 0),
+            )
+        return _SCHEDULER
@@ -0,0 +1,150 @@
+"""Persistent full-text prompt index (SQLite FTS5) over job history."""
+
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from lib.config import data_dir
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prompts (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    prompt TEXT NOT NULL DEFAULT '',
+    model TEXT,
+    size TEXT,
+    seconds TEXT,
+    status TEXT,
+    created_at INTEGER
+);
+CREATE INDEX IF NOT EXISTS prompts_created_at ON prompts (created_at DESC);
+CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts USING fts5(
+    prompt,
+    content='prompts',
+    content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS prompts_ai AFTER INSERT ON prompts BEGIN
+    INSERT INTO prompts_fts (rowid, prompt) VALUES (new.rowid, new.prompt);
+END;
+CREATE TRIGGER IF NOT EXISTS prompts_ad AFTER DELETE ON prompts BEGIN
+    INSERT INTO prompts_fts (prompts_fts, rowid, prompt) VALUES ('delete', old.rowid, old.prompt);
+END;
+CREATE TRIGGER IF NOT EXISTS prompts_au AFTER UPDATE OF prompt ON prompts BEGIN
+    INSERT INTO prompts_fts (prompts_fts, rowid, prompt) VALUES ('delete', old.rowid, old.prompt);
+    INSERT INTO prompts_fts (rowid, prompt) VALUES (new.rowid, new.prompt);
+END;
+"""
+
+_UPSERT = """
+INSERT INTO prompts (id, prompt, model, size, seconds, status, created_at)
+VALUES (:id, COALESCE(:prompt, ''), :model, :size, :seconds, :status, :created_at)
+ON CONFLICT (id) DO UPDATE SET
+    prompt = CASE WHEN :prompt IS NOT NULL AND :prompt != '' THEN :prompt ELSE prompts.prompt END,
+    model = COALESCE(excluded.model, prompts.model),
+    size = COALESCE(excluded.size, prompts.size),
+    seconds = COALESCE(excluded.seconds, prompts.seconds),
+    status = COALESCE(excluded.status, prompts.status),
+    created_at = COALESCE(excluded.created_at, prompts.created_at)
+"""
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(text: str) -> Optional[str]:
+    """Turn free text into an FTS5 query: every word must match, the last as a prefix."""
+    tokens = _TOKEN_RE.findall(text or "")
+    if not tokens:
+        return None
+    quoted = [f'"{tok}"' for tok in tokens]
+    quoted[-1] += "*"
+    return " AND ".join(quoted)
+
+
+class PromptIndex:
+    """Thread-safe wrapper around a single SQLite connection in WAL mode."""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or os.path.join(data_dir(), "prompts.db")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def index_jobs(self, jobs: Iterable[Dict[str, Any]], *, prompts: Optional[Dict[str, str]] = None) -> int:
+        """Upsert jobs; a prompt from `prompts` (full text) wins over the job's own field."""
+        prompts = prompts or {}
+        rows = []
+        for job in jobs:
+            video_id = job.get("id")
+            if not video_id:
+                continue
+            created = job.get("created_at") or job.get("created")
+            rows.append(
+                {
+                    "id": str(video_id),
+                    "prompt": prompts.get(str(video_id)) or job.get("prompt"),
+                    "model": job.get("model"),
+                    "size": job.get("size") or job.get("resolution"),
+                    "seconds": str(job.get("seconds")) if job.get("seconds") is not None else None,
+                    "status": job.get("status"),
+                    "created_at": int(created) if str(created or "").isdigit() else None,
+                }
+            )
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany(_UPSERT, rows)
+        return len(rows)
+
+    def remove(self, video_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM prompts WHERE id = ?", (video_id,))
+
+    def search(self, text: str, *, limit: int = 20, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """Ranked (bm25) prefix search. Returns (page of rows, total matches)."""
+        match = build_match_query(text)
+        if not match:
+            return [], 0
+        with self._lock:
+            total = self._conn.execute(
+                "SELECT count(*) FROM prompts_fts WHERE prompts_fts MATCH ?", (match,)
+            ).fetchone()[0]
+            cursor = self._conn.execute(
+                """
+                SELECT p.id, p.prompt, p.model, p.size, p.seconds, p.status, p.created_at,
+                       snippet(prompts_fts, 0, '**', '**', '…', 12) AS snippet
+                FROM prompts_fts
+                JOIN prompts p ON p.rowid = prompts_fts.rowid
+                WHERE prompts_fts MATCH ?
+                ORDER BY bm25(prompts_fts), p.created_at DESC
+                LIMIT ? OFFSET ?
+                """,
+                (match, limit, offset),
+            )
+            return [dict(row) for row in cursor.fetchall()], int(total)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT count(*) FROM prompts").fetchone()[0])
+
+
+_INDEX: Optional[PromptIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_prompt_index() -> PromptIndex:
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            _INDEX = PromptIndex()
+        return _INDEX
@@ -0,0 +1,110 @@
+"""Cold-start helpers: deferred imports, warm-up, and a startup timing report."""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+from types import ModuleType
+from typing import Any, Dict, Iterable, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Heavy third-party modules that pages only need once a client or table is built.
+HEAVY_MODULES = ("openai", "pandas")
+
+_PROCESS_T0 = time.perf_counter()
+_LOCK = threading.Lock()
+_IMPORT_MS: Dict[str, float] = {}
+_MARKS_MS: Dict[str, float] = {}
+
+
+def _elapsed_ms() -> float:
+    return (time.perf_counter() - _PROCESS_T0) * 1000.0
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Import a module on first use and record how long the import took.
+    Subsequent calls are a plain sys.modules lookup.
+    """
+    module = sys.modules.get(name)
+    # A module another thread is still importing is already in sys.modules; wait for it instead.
+    if module is not None and not getattr(getattr(module, "__spec__", None), "_initializing", False):
+        return module
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    took = (time.perf_counter() - started) * 1000.0
+    with _LOCK:
+        _IMPORT_MS.setdefault(name, took)
+    return module
+
+
+def mark(label: str) -> float:
+    """Record the first time `label` is reached (ms since process start)."""
+    with _LOCK:
+        if label not in _MARKS_MS:
+            _MARKS_MS[label] = _elapsed_ms()
+        return _MARKS_MS[label]
+
+
+def warm_up(modules: Iterable[str] = HEAVY_MODULES) -> Dict[str, float]:
+    """
+    Import heavy dependencies ahead of time.
+    Call from a pre-fork hook (or set SORA_WARMUP=1) so workers start with them loaded.
+    """
+    for name in modules:
+        try:
+            lazy_import(name)
+        except Exception as exc:  # pragma: no cover - missing optional deps
+            logger.warning("Warm-up import of %s failed: %s", name, exc)
+    mark("warm_up")
+    with _LOCK:
+        return {name: _IMPORT_MS.get(name, 0.0) for name in modules}
+
+
+def warm_up_in_background(modules: Iterable[str] = HEAVY_MODULES) -> threading.Thread:
+    """Run warm_up on a daemon thread so the first render is not blocked."""
+    thread = threading.Thread(target=warm_up, args=(tuple(modules),), name="sora-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def startup_budget_ms() -> Optional[float]:
+    raw = os.getenv("SORA_STARTUP_BUDGET_MS", "").strip()
+    try:
+        return float(raw) if raw else None
+    except ValueError:
+        return None
+
+
+def startup_report() -> Dict[str, Any]:
+    """Return import-time breakdown, startup marks, and the budget verdict."""
+    with _LOCK:
+        imports = dict(sorted(_IMPORT_MS.items(), key=lambda kv: kv[1], reverse=True))
+        marks = dict(sorted(_MARKS_MS.items(), key=lambda kv: kv[1]))
+    budget = startup_budget_ms()
+    first_render = marks.get("first_render")
+    return {
+        "imports_ms": {k: round(v, 1) for k, v in imports.items()},
+        "marks_ms": {k: round(v, 1) for k, v in marks.items()},
+        "deferred": [name for name in HEAVY_MODULES if name not in sys.modules],
+        "budget_ms": budget,
+        "over_budget": bool(budget and first_render and first_render > budget),
+    }
+
+
+def record_first_render() -> None:
+    """Mark the end of the first page run and warn once if it blew the budget."""
+    with _LOCK:
+        already = "first_render" in _MARKS_MS
+    if already:
+        return
+    took = mark("first_render")
+    budget = startup_budget_ms()
+    if budget and took > budget:
+        logger.warning("Cold start took %.0f ms (budget %.0f ms)", took, budget)
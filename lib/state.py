@@ -3,15 +3,13 @@
 from __future__ import annotations
 
 import time
-import os
-from dataclasses import dataclass
 from typing import Any, Dict, Optional, Union
 
 import streamlit as st
 from collections.abc import Mapping
-from dotenv import load_dotenv
 
 from lib.api import to_dict
+from lib.config import ApiConfig, load_api_config, load_env
 
 
 # Session keys
@@ -25,17 +23,23 @@ API_CFG_KEY = "api_config"
 POLLING_KEY = "job_polling"
 SELECTED_JOB_KEY = "selected_job_id"
 
-
-@dataclass
-class ApiConfig:
-    api_key: str
-    base_url: Optional[str] = None
+SESSION_KEYS = (
+    VIDEO_HISTORY_KEY,
+    JOBS_CACHE_KEY,
+    JOBS_CURSOR_KEY,
+    JOBS_HAS_MORE_KEY,
+    BUSY_KEY,
+    BALLOONS_KEY,
+    API_CFG_KEY,
+    POLLING_KEY,
+    SELECTED_JOB_KEY,
+)
 
 
 def ensure_session_defaults() -> None:
     # Load environment variables from .env once per session init.
     if not st.session_state.get("_env_loaded", False):
-        load_dotenv()
+        load_env()
         st.session_state["_env_loaded"] = True
 
     state = st.session_state
@@ -50,14 +54,36 @@ def ensure_session_defaults() -> None:
     state.setdefault(SELECTED_JOB_KEY, None)
 
     if not state.get(API_CFG_KEY):
-        api_key = os.getenv("OPENAI_API_KEY", "")
-        base_url = os.getenv("OPENAI_BASE_URL") or None
+        env_cfg = load_api_config()
         state[API_CFG_KEY] = {
-            "api_key": api_key,
-            "base_url": base_url,
+            "api_key": env_cfg.api_key,
+            "base_url": env_cfg.base_url,
         }
 
 
+def current_session_id() -> str:
+    """Return the Streamlit session id (or 'local' outside a script run)."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx else "local"
+    except Exception:
+        return "local"
+
+
+def session_is_active(session_id: str) -> bool:
+    """True while the browser session is still connected (always True outside a server)."""
+    try:
+        from streamlit import runtime
+
+        if session_id == "local" or not runtime.exists():
+            return True
+        return runtime.get_instance().is_active_session(session_id)
+    except Exception:
+        return True
+
+
 def set_busy(value: bool) -> None:
     st.session_state[BUSY_KEY] = value
 
@@ -45,6 +45,12 @@ def disabled_button(label: str, *, disabled: bool, key: Optional[str] = None, he
     return st.button(label, key=key, disabled=disabled, help=help)
 
 
+def read_file(path: str) -> bytes:
+    """File contents for a lazy `st.download_button(data=lambda: read_file(path))`, read only on click."""
+    with open(path, "rb") as fh:
+        return fh.read()
+
+
 def toast_success(message: str) -> None:
     st.toast(message, icon="✅")
 
@@ -55,3 +61,14 @@ def toast_warning(message: str) -> None:
 
 def toast_error(message: str) -> None:
     st.toast(message, icon="🚫")
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    """Render a remaining-time estimate like '~1m20s'."""
+    if seconds is None:
+        return "—"
+    seconds = max(0, int(round(seconds)))
+    if seconds < 60:
+        return f"~{seconds}s"
+    minutes, secs = divmod(seconds, 60)
+    return f"~{minutes}m{secs:02d}s"
@@ -0,0 +1,307 @@
+"""Cancellable job watchers with per-job deadlines and a reaper for abandoned pollers."""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set
+
+from lib.api import CancelToken, PollCancelled, PollDeadlineExceeded, poll_until_complete
+from lib.config import load_env
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+# (base seconds, extra seconds per rendered second) before a watcher gives up.
+WALL_TIME_BUDGETS = {"sora-2": (600, 30), "sora-2-pro": (1200, 90)}
+FALLBACK_WALL_TIME = (1200, 60)
+OWNER_STALE_S = 15 * 60
+RESULT_TTL_S = 10 * 60
+REAP_INTERVAL_S = 15
+# Owner for process-level pollers (e.g. journal recovery); never reaped.
+SYSTEM_OWNER = "system"
+
+logger = logging.getLogger(__name__)
+
+
+def max_wall_time_s(model: Optional[str], seconds: Any) -> float:
+    """Deadline for one job; SORA_POLL_DEADLINE_SCALE stretches or shrinks every budget."""
+    load_env()
+    base, per_second = WALL_TIME_BUDGETS.get(str(model or ""), FALLBACK_WALL_TIME)
+    try:
+        rendered = float(seconds)
+    except (TypeError, ValueError):
+        rendered = 8.0
+    try:
+        scale = float(os.getenv("SORA_POLL_DEADLINE_SCALE", "1") or 1)
+    except ValueError:
+        scale = 1.0
+    return (base + per_second * rendered) * scale
+
+
+@dataclass
+class Watch:
+    video_id: str
+    timeout_s: float
+    token: CancelToken = field(default_factory=CancelToken)
+    owners: Set[str] = field(default_factory=set)
+    started: float = field(default_factory=time.time)
+    state: str = "watching"  # watching | completed | failed | cancelled | timed_out
+    job: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    finished: Optional[float] = None
+    callbacks: List[Callable[["Watch"], None]] = field(default_factory=list, repr=False)
+
+    @property
+    def active(self) -> bool:
+        return self.state == "watching"
+
+    @property
+    def remaining_s(self) -> float:
+        return max(0.0, self.started + self.timeout_s - time.time())
+
+
+class JobWatcher:
+    """
+    Registry of everything currently polling a job, keyed by video id. Each watch
+    carries a CancelToken and a wall-time deadline and is shared by the sessions
+    that asked for it; when its last owner stops watching or goes away, the poll
+    is cancelled. Background watches run on daemon threads, capped at `max_watchers`.
+    """
+
+    def __init__(self, *, max_watchers: int = 32, owner_stale_s: float = OWNER_STALE_S) -> None:
+        self.max_watchers = max_watchers
+        self.owner_stale_s = owner_stale_s
+        self._lock = threading.Lock()
+        self._watches: Dict[str, Watch] = {}
+        self._seen: Dict[str, float] = {}
+        self._is_alive: Optional[Callable[[str], bool]] = None
+        self._reaper: Optional[threading.Thread] = None
+        self._reaped = 0
+
+    def set_liveness(self, is_alive: Callable[[str], bool]) -> None:
+        """Install a check (e.g. "is this Streamlit session still connected")."""
+        self._is_alive = is_alive
+
+    def heartbeat(self, owner: str) -> None:
+        with self._lock:
+            self._seen[owner] = time.monotonic()
+
+    def start(
+        self,
+        client: OpenAI,
+        video_id: str,
+        owner: str,
+        *,
+        model: Optional[str] = None,
+        seconds: Any = None,
+        fetch: Optional[Callable[[str], Any]] = None,
+        interval: Optional[Callable[[dict], float]] = None,
+        on_tick: Optional[Callable[[dict], None]] = None,
+        on_done: Optional[Callable[[Watch], None]] = None,
+        capped: bool = True,
+    ) -> Watch:
+        """
+        Poll on a background thread, or join the watch already running for this id.
+        `on_done(watch)` runs once the watch finishes, whoever was polling. With
+        `capped=False` the watch is started even past `max_watchers`, for jobs that
+        were already created (and billed) under a cap of their own.
+        """
+        with self._lock:
+            existing = self._watches.get(video_id)
+            if capped and (existing is None or not existing.active):
+                running = sum(1 for w in self._watches.values() if w.active)
+                if running >= self.max_watchers:
+                    raise RuntimeError(f"Already watching {running} jobs; stop one before starting another.")
+            watch = self._claim_locked(video_id, owner, model, seconds, on_done=on_done)
+            if watch is existing:
+                return watch
+        thread = threading.Thread(
+            target=self._run,
+            args=(client, watch, fetch, interval, on_tick),
+            name=f"sora-watch-{video_id}",
+            daemon=True,
+        )
+        thread.start()
+        self._ensure_reaper()
+        return watch
+
+    def _claim_locked(
+        self,
+        video_id: str,
+        owner: str,
+        model: Optional[str],
+        seconds: Any,
+        *,
+        on_done: Optional[Callable[[Watch], None]] = None,
+    ) -> Watch:
+        self._seen[owner] = time.monotonic()
+        watch = self._watches.get(video_id)
+        if watch is None or not watch.active:
+            watch = Watch(video_id=video_id, timeout_s=max_wall_time_s(model, seconds))
+            self._watches[video_id] = watch
+        watch.owners.add(owner)
+        if on_done is not None:
+            watch.callbacks.append(on_done)
+        return watch
+
+    def _run(
+        self,
+        client: OpenAI,
+        watch: Watch,
+        fetch: Optional[Callable[[str], Any]],
+        interval: Optional[Callable[[dict], float]],
+        on_tick: Optional[Callable[[dict], None]],
+    ) -> None:
+        def _tick(job: Dict[str, Any]) -> None:
+            watch.job = job
+            if callable(on_tick):
+                on_tick(job)
+
+        try:
+            job = poll_until_complete(
+                client,
+                watch.video_id,
+                on_tick=_tick,
+                interval=interval,
+                fetch=fetch,
+                token=watch.token,
+                timeout_s=watch.timeout_s,
+            )
+            self.finish(watch, "completed", job=job)
+        except PollCancelled:
+            self.finish(watch, "cancelled", error=watch.token.reason)
+        except PollDeadlineExceeded as exc:
+            self.finish(watch, "timed_out", error=str(exc))
+        except Exception as exc:  # pragma: no cover - network path
+            self.finish(watch, "failed", error=str(exc))
+
+    def finish(
+        self,
+        watch: Watch,
+        state: str,
+        *,
+        job: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            if not watch.active:
+                return
+            watch.state = state
+            watch.job = job or watch.job
+            watch.error = error
+            watch.finished = time.time()
+            callbacks, watch.callbacks = watch.callbacks, []
+        for callback in callbacks:
+            try:
+                callback(watch)
+            except Exception:  # pragma: no cover - a bad callback must not break the poller
+                logger.exception("Watch callback failed for %s", watch.video_id)
+
+    def stop(self, video_id: str, owner: str) -> bool:
+        """
+        Drop one owner (also dismisses a finished watch for them); the poll is
+        cancelled once nobody is watching. Returns True if it was cancelled.
+        """
+        with self._lock:
+            watch = self._watches.get(video_id)
+            if watch is None:
+                return False
+            watch.owners.discard(owner)
+            if watch.owners or not watch.active:
+                return False
+            watch.token.cancel("stopped watching")
+            return True
+
+    def cancel(self, video_id: str, reason: str = "cancelled") -> bool:
+        """End the poll for every owner, e.g. after the job was deleted."""
+        with self._lock:
+            watch = self._watches.get(video_id)
+            if watch is None or not watch.active:
+                return False
+            watch.token.cancel(reason)
+            return True
+
+    def get(self, video_id: str) -> Optional[Watch]:
+        with self._lock:
+            return self._watches.get(video_id)
+
+    def watches(self, owner: Optional[str] = None) -> List[Watch]:
+        with self._lock:
+            return [w for w in self._watches.values() if owner is None or owner in w.owners]
+
+    def _owner_gone(self, owner: str, now: float) -> bool:
+        if owner == SYSTEM_OWNER:
+            return False
+        if self._is_alive is not None:
+            try:
+                if not self._is_alive(owner):
+                    return True
+            except Exception:
+                pass
+        return now - self._seen.get(owner, now) > self.owner_stale_s
+
+    def reap(self) -> int:
+        """Cancel watches whose owners are all gone and forget old results; returns polls cancelled."""
+        now = time.monotonic()
+        cancelled = 0
+        with self._lock:
+            gone = {owner for owner in self._seen if self._owner_gone(owner, now)}
+            for owner in gone:
+                self._seen.pop(owner, None)
+            for video_id, watch in list(self._watches.items()):
+                if watch.active:
+                    watch.owners -= gone
+                    if not watch.owners:
+                        watch.token.cancel("abandoned")
+                        cancelled += 1
+                elif watch.finished and time.time() - watch.finished > RESULT_TTL_S:
+                    del self._watches[video_id]
+            self._reaped += cancelled
+        return cancelled
+
+    def _ensure_reaper(self) -> None:
+        with self._lock:
+            if self._reaper is not None and self._reaper.is_alive():
+                return
+            self._reaper = threading.Thread(target=self._reap_forever, name="sora-watch-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_forever(self) -> None:
+        while True:
+            time.sleep(REAP_INTERVAL_S)
+            try:
+                self.reap()
+            except Exception:  # pragma: no cover - keep the reaper alive
+                continue
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            by_state: Dict[str, int] = {}
+            for watch in self._watches.values():
+                by_state[watch.state] = by_state.get(watch.state, 0) + 1
+            return {
+                "active": sum(1 for w in self._watches.values() if w.active),
+                "owners": len(self._seen),
+                "by_state": by_state,
+                "reaped": self._reaped,
+                "max_watchers": self.max_watchers,
+            }
+
+
+_WATCHER: Optional[JobWatcher] = None
+_WATCHER_LOCK = threading.Lock()
+
+
+def get_watcher() -> JobWatcher:
+    """Process-wide watcher; SORA_MAX_WATCHERS caps concurrent background pollers."""
+    global _WATCHER
+    with _WATCHER_LOCK:
+        if _WATCHER is None:
+            load_env()
+            _WATCHER = JobWatcher(max_watchers=int(os.getenv("SORA_MAX_WATCHERS", "32") or 32))
+        return _WATCHER
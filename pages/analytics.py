@@ -0,0 +1,90 @@
+"""Analytics page: render latency percentiles, throughput, and failure rates."""
+
+from __future__ import annotations
+
+import streamlit as st
+
+from lib.analytics import get_history_sync, get_job_history
+from lib.archive import archive_enabled, get_archive
+from lib.credentials import get_credential_pool
+from lib.state import JOBS_CACHE_KEY, ensure_session_defaults, is_busy
+from lib.ui import toast_error, toast_success
+
+
+SYNC_REFRESH_S = 2
+
+
+ensure_session_defaults()
+
+st.title("📊 Render Analytics")
+st.write("Time-to-complete percentiles, throughput, and failure rates across your job history.")
+
+pool = get_credential_pool()
+
+
+st.session_state.setdefault("analytics_max_pages", 10)
+# Shared by every session: the archive plus whatever jobs pages have loaded.
+history = get_job_history()
+sync = get_history_sync()
+
+
+def _sync_history() -> None:
+    if sync.start(int(st.session_state.get("analytics_max_pages", 10))):
+        st.session_state["analytics_syncing"] = True
+    else:
+        toast_error("A history sync is already running.")
+
+
+def _render_sync_status() -> None:
+    if sync.running:
+        archived = f" · {sync.archived} newly archived" if archive_enabled() else ""
+        st.caption(f"Syncing job history… {sync.listed} job(s) listed{archived}")
+    elif st.session_state.pop("analytics_syncing", False):
+        if sync.error:
+            toast_error(f"History sync failed: {sync.error}")
+        else:
+            toast_success(f"Job history synced ({sync.listed} job(s)).")
+        st.rerun()  # a full rerun redraws the charts and drops the fragment timer
+
+
+sync_cols = st.columns([2, 1])
+sync_cols[0].number_input("Pages to sync (100 jobs each)", 1, 500, key="analytics_max_pages")
+with sync_cols[1]:
+    st.write("")
+    st.button("Sync history", on_click=_sync_history, disabled=is_busy() or sync.running or not len(pool), width="stretch")
+st.fragment(run_every=SYNC_REFRESH_S if sync.running else None)(_render_sync_status)()
+
+# Only jobs that are new or changed since the last run are re-parsed.
+changed = history.update_from_archive(get_archive()) if archive_enabled() else 0
+changed += history.update(st.session_state.get(JOBS_CACHE_KEY, {}).values())
+df = history.frame
+
+if df.empty:
+    st.info("No job history yet. Load the Jobs page or sync history to populate analytics.")
+    st.stop()
+
+summary = history.summary()
+overview = st.columns(4)
+overview[0].metric("Jobs", len(df))
+overview[1].metric("Completed", int(df["completed"].sum()))
+overview[2].metric("Failed", int(df["failed"].sum()))
+overview[3].metric("Median latency", f"{df.loc[df['completed'], 'latency_s'].median():.0f}s" if df["completed"].any() else "—")
+st.caption(f"{changed} job(s) updated this run.")
+
+st.markdown("#### Time to complete (seconds)")
+st.dataframe(summary["latency"], width="stretch", hide_index=True)
+
+st.markdown("#### Throughput (rendered seconds per hour)")
+if summary["throughput"].empty:
+    st.caption("No completed jobs with completion timestamps yet.")
+else:
+    st.bar_chart(summary["throughput"])
+
+st.markdown("#### Median latency by hour of day (UTC)")
+if summary["latency_by_hour"].empty:
+    st.caption("Not enough completed jobs yet.")
+else:
+    st.line_chart(summary["latency_by_hour"])
+
+st.markdown("#### Failure rates")
+st.dataframe(summary["failures"], width="stretch", hide_index=True)
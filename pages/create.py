@@ -1,33 +1,28 @@
-"""Create page: compose prompts and manage the current generation flow."""
+"""Create page: compose prompts and follow several concurrent generations."""
 
 from __future__ import annotations
 
 import json
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 import streamlit as st
 
-from lib.api import (
-    create_video,
-    download_video_bytes,
-    extract_asset_url,
-    get_openai_client,
-    get_progress_percent,
-    poll_until_complete,
-    safe_get_id,
-    to_dict,
-)
+from lib.api import get_progress_percent
+from lib.credentials import get_credential_pool
+from lib.generations import Generation, get_generation_runner
+from lib.media import get_background_media
+from lib.predictor import get_predictor
+from lib.scheduler import get_scheduler
 from lib.state import (
     BALLOONS_KEY,
     VIDEO_HISTORY_KEY,
     cache_job,
+    current_session_id,
     ensure_session_defaults,
-    get_api_config,
-    is_busy,
-    set_busy,
     upsert_video_history,
 )
-from lib.ui import toast_error, toast_success, toast_warning
+from lib.ui import format_eta, read_file, toast_error, toast_success, toast_warning
+from lib.watcher import get_watcher
 
 
 SIZE_PRESETS: Dict[str, str] = {
@@ -43,6 +38,10 @@ MODELS = [
     "sora-2-pro",
 ]
 
+# How often the progress rows and result cards check on background work.
+PROGRESS_REFRESH_S = 1.0
+MEDIA_REFRESH_S = 1.0
+
 
 def _ensure_create_defaults() -> None:
     defaults = {
@@ -50,10 +49,6 @@ def _ensure_create_defaults() -> None:
         "create_model": MODELS[0],
         "create_size_label": list(SIZE_PRESETS.keys())[0],
         "create_duration": 12,
-        "create_last_job": None,
-        "create_last_media_url": None,
-        "create_last_media_bytes": None,
-        "create_last_metadata": "",
         "create_validation_error": "",
     }
     for key, value in defaults.items():
@@ -66,12 +61,15 @@ ensure_session_defaults()
 st.title("🎬 Prompt to Video")
 st.write("Compose a prompt, tweak generation settings, and render high-quality video clips.")
 
-cfg = get_api_config()
+pool = get_credential_pool()
+runner = get_generation_runner()
+generations = runner.generations(current_session_id())
+active_count = sum(1 for gen in generations if gen.active)
 
 
 def _validate_inputs() -> Optional[str]:
-    if not cfg.api_key:
-        return "Add your OpenAI API key in the sidebar before generating."
+    if not len(pool):
+        return "Set OPENAI_API_KEY (or SORA_CREDENTIALS) before generating."
     prompt_text = st.session_state.get("create_prompt", "").strip()
     if not prompt_text:
         return "Prompt cannot be empty."
@@ -81,10 +79,6 @@ def _validate_inputs() -> Optional[str]:
     return None
 
 
-output_container = st.container()
-progress_placeholder = st.empty()
-
-
 def _submit_generation() -> None:
     error = _validate_inputs()
     if error:
@@ -93,87 +87,52 @@ def _submit_generation() -> None:
         return
 
     st.session_state["create_validation_error"] = ""
-    set_busy(True)
-
     prompt_text = st.session_state.get("create_prompt", "").strip()
-
     size_label = st.session_state.get("create_size_label")
-    size_value = SIZE_PRESETS.get(size_label, "1280x720")
     payload = {
         "prompt": prompt_text,
         "model": st.session_state.get("create_model"),
         "seconds": str(int(st.session_state.get("create_duration", 6))),
-        "size": size_value,
+        "size": SIZE_PRESETS.get(size_label, "1280x720"),
     }
-
     image_file = st.session_state.get("create_image_ref")
     if image_file is not None:
         payload["input_reference"] = image_file
 
-    client = get_openai_client(
-        cfg.api_key,
-        base_url=cfg.base_url,
-    )
-
     try:
-        with st.status("Submitting job…", expanded=False) as status:
-            status.write("Sending payload to OpenAI Videos API.")
-            job = create_video(client, payload)
-            job_dict = to_dict(job)
-            job_id = safe_get_id(job) or job_dict.get("id")
-            if not job_id:
-                raise RuntimeError(f"No video id returned from create(). Raw: {job_dict}")
-            cache_job(job_dict)
-            upsert_video_history(job_dict, prompt=prompt_text, source="generate")
-            status.update(label="Queued…", state="running", expanded=True)
-
-            progress_bar = progress_placeholder.progress(1, text="Queued…")
-
-            def _on_tick(job_update: Dict[str, str]) -> None:
-                job_copy = to_dict(job_update)
-                cache_job(job_copy)
-                upsert_video_history(job_copy, prompt=prompt_text, source="poll")
-                pct_val = max(0, min(100, get_progress_percent(job_copy)))
-                label = "Finalizing" if pct_val >= 99 else f"Rendering {pct_val}%"
-                progress_bar.progress(max(pct_val, 1), text=label)
-                status.update(label=f"{label}", state="running", expanded=True)
-
-            status.write("Polling job status…")
-            final_job = poll_until_complete(client, job_id, sleep_s=3, on_tick=_on_tick)
-            final_dict = to_dict(final_job)
-            cache_job(final_dict)
-            upsert_video_history(final_dict, prompt=prompt_text, source="complete")
-            progress_bar.progress(100, text="Ready")
-            status.update(label="Ready", state="complete", expanded=True)
-
-            status.write("Attempting to fetch rendered media…")
-            media_url = extract_asset_url(final_dict)
-            media_bytes = None
-            if media_url:
-                status.update(label="Ready", state="complete", expanded=False)
-            else:
-                progress_bar.progress(100, text="Downloading media…")
-                try:
-                    media_bytes = download_video_bytes(client, job_id)
-                except Exception as download_err:  # pragma: no cover - network path
-                    toast_error(f"Download failed: {download_err}")
-                    status.update(label="Ready (download failed)", state="error", expanded=True)
-
-        st.session_state["create_last_job"] = final_dict
-        st.session_state["create_last_media_url"] = media_url
-        st.session_state["create_last_media_bytes"] = media_bytes
-        st.session_state["create_last_metadata"] = json.dumps(final_dict, indent=2)
-        toast_success("Video ready!")
-        if not st.session_state.get(BALLOONS_KEY):  # Celebrate first run only
-            st.balloons()
-            st.session_state[BALLOONS_KEY] = True
-
-    except Exception as exc:  # pragma: no cover - API failure path
+        # Submission, admission, and polling run in the background; the page stays usable.
+        runner.submit(current_session_id(), payload)
+    except RuntimeError as exc:
         st.session_state["create_validation_error"] = str(exc)
-        toast_error(str(exc))
-    finally:
-        set_busy(False)
-        progress_placeholder.empty()
+        toast_warning(str(exc))
+        return
+    toast_success("Generation started. Its progress is shown below.")
+
+
+def _apply_finished(generations: List[Generation]) -> None:
+    """Mirror generation results into session history; toasts fire once per finished job."""
+    for gen in generations:
+        if gen.job:
+            cache_job(gen.job)
+            upsert_video_history(gen.job, prompt=gen.prompt, source="poll" if gen.active else "complete")
+        if gen.active or gen.applied:
+            continue
+        gen.applied = True
+        if gen.state == "completed":
+            toast_success("Video ready!")
+            if not st.session_state.get(BALLOONS_KEY):  # Celebrate first run only
+                st.balloons()
+                st.session_state[BALLOONS_KEY] = True
+        elif gen.state == "cancelled":
+            # The watcher's cancel reason says why: the session went away, Stop was clicked, or the job was deleted.
+            if gen.error == "job deleted":
+                toast_warning(f"Deleted {gen.video_id}.")
+            elif gen.error == "abandoned":
+                toast_warning(f"Stopped watching {gen.video_id}; it keeps rendering in the background.")
+            else:
+                toast_warning(f"Stopped watching {gen.video_id}; it keeps rendering, find it on the Jobs tab.")
+        else:
+            toast_error(gen.error or f"Generation {gen.state.replace('_', ' ')}.")
 
 
 # ---- Step 1: Compose prompt ----
@@ -201,7 +160,7 @@ with st.form("create_form"):
         "Generate",
         type="primary",
         width="stretch",
-        disabled=is_busy() or not cfg.api_key,
+        disabled=active_count >= runner.max_per_owner or not len(pool),
         on_click=_submit_generation,
     )
 
@@ -210,60 +169,169 @@ validation_error = st.session_state.get("create_validation_error")
 if validation_error:
     st.error(validation_error)
 
+queue_stats = get_scheduler().stats()
+if queue_stats["in_flight"] or queue_stats["queue_depth"] or queue_stats["limits"]:
+    with st.expander("Submission queue", expanded=False):
+        queue_cols = st.columns(4)
+        queue_cols[0].metric("Queued", queue_stats["queue_depth"])
+        queue_cols[1].metric("In flight", sum(v for k, v in queue_stats["in_flight"].items() if k.startswith("model:")))
+        queue_cols[2].metric("Avg wait", f"{queue_stats['avg_wait_s']:.1f}s")
+        queue_cols[3].metric("p95 wait", f"{queue_stats['p95_wait_s']:.1f}s")
+        st.json(
+            {
+                "limits": queue_stats["limits"],
+                "in_flight": queue_stats["in_flight"],
+                "queued_by_priority": queue_stats["queued_by_priority"],
+                "rejected": queue_stats["rejected"],
+            },
+            expanded=False,
+        )
+
 st.divider()
 
-# ---- Step 2: Review result ----
-last_job = st.session_state.get("create_last_job")
+_apply_finished(generations)
 
-if not last_job:
+# ---- Step 2: Follow renders ----
+if active_count:
+    st.caption(f"{active_count} of {runner.max_per_owner} generations running for this session.")
+elif not generations:
     st.info("Submit a prompt to see job details and download options here.")
-else:
-    job_id = last_job.get("id", "unknown")
-    status_text = last_job.get("status", "unknown")
+
+
+def _stop_watching(gen: Generation) -> None:
+    if not get_watcher().stop(gen.video_id, current_session_id()):
+        toast_warning(f"Another session is still watching {gen.video_id}.")
+
+
+def _render_progress(watched: List[Generation]) -> None:
+    predictor = get_predictor()
+    for gen in watched:
+        snippet = gen.prompt if len(gen.prompt) <= 80 else gen.prompt[:77] + "…"
+        job_note = f" · `{gen.video_id}`" if gen.video_id else ""
+        st.markdown(f"**{snippet}**{job_note}")
+        row = st.columns([5, 1])
+        if gen.state == "rendering" and gen.job:
+            pct_val = max(0, min(100, get_progress_percent(gen.job)))
+            label = "Finalizing" if pct_val >= 99 else f"Rendering {pct_val}% · ETA {format_eta(predictor.eta(gen.job))}"
+            row[0].progress(max(pct_val, 1), text=label)
+        else:
+            row[0].progress(0, text=gen.note or gen.state.capitalize())
+        row[1].button(
+            "Stop",
+            key=f"create_stop_{gen.key}",
+            on_click=_stop_watching,
+            args=(gen,),
+            disabled=gen.state != "rendering",  # nothing to stop until the job exists
+            width="stretch",
+        )
+    if any(not gen.active for gen in watched):
+        st.rerun()  # a full rerun moves the finished job into the results below
+
+
+watched = [gen for gen in generations if gen.active]
+if watched:
+    # Reads progress the background pollers already fetched; no API calls happen here.
+    st.fragment(run_every=PROGRESS_REFRESH_S)(_render_progress)(watched)
+
+# ---- Step 3: Review results ----
+finished = [gen for gen in generations if not gen.active]
+background = get_background_media()
+
+
+def _dismiss(key: str) -> None:
+    runner.dismiss(current_session_id(), key)
+
+
+def _retry_media(gen: Generation) -> None:
+    background.submit(pool.client_for(gen.video_id), gen.video_id, gen.variants)
+
+
+def _render_result(gen: Generation) -> None:
+    job = gen.job or {}
+    job_id = gen.video_id or "unknown"
     st.markdown(f"**Job ID:** `{job_id}`")
-    st.write(f"Status: {status_text}")
+    st.write(f"Status: {job.get('status', gen.state)}")
+    if gen.state != "completed":
+        st.warning(f"Generation {gen.state.replace('_', ' ')}: {gen.error or 'no details'}")
+        st.button("Dismiss", key=f"create_dismiss_{gen.key}", on_click=_dismiss, args=(gen.key,))
+        return
     meta_cols = st.columns(3)
-    meta_cols[0].metric("Resolution", last_job.get("size", "—"))
-    meta_cols[1].metric("Duration", f"{last_job.get('seconds', '—')}s")
-    meta_cols[2].metric("Model", last_job.get("model", "—"))
-
-    media_url = st.session_state.get("create_last_media_url")
-    media_bytes = st.session_state.get("create_last_media_bytes")
-    if media_url:
-        st.video(media_url)
-    elif media_bytes:
-        st.video(media_bytes)
+    meta_cols[0].metric("Resolution", job.get("size", "—"))
+    meta_cols[1].metric("Duration", f"{job.get('seconds', '—')}s")
+    meta_cols[2].metric("Model", job.get("model", "—"))
+
+    states = {v: background.state(job_id, v) for v in gen.variants}
+    video_state, video_path, video_error = states.get("video", ("missing", None, None))
+    thumbnail_path = states.get("thumbnail", ("missing", None, None))[1]
+
+    if gen.media_url:
+        st.video(gen.media_url)
+    elif video_path:
+        st.video(video_path)
     else:
-        st.warning("Media preview unavailable. Try downloading the MP4 below.")
-
-    col_dl1, col_dl2 = st.columns(2)
+        if thumbnail_path:
+            st.image(thumbnail_path, caption="Poster · video loading" if video_state == "pending" else "Thumbnail")
+        if video_state == "pending":
+            progress = background.progress(job_id, "video")
+            pct = progress.percent if progress and progress.percent is not None else 0
+            done_mb = (progress.bytes_done if progress else 0) / (1024 * 1024)
+            st.progress(pct, text=f"Downloading MP4… {done_mb:.1f} MB")
+        elif video_state == "failed":
+            st.warning(f"MP4 download failed: {video_error}")
+            st.button("Retry download", key=f"create_retry_{gen.key}", on_click=_retry_media, args=(gen,), disabled=not len(pool))
+        elif not thumbnail_path:
+            st.warning("Media preview unavailable. Try downloading the MP4 below.")
+
+    col_dl1, col_dl2, col_dl3 = st.columns([2, 2, 1])
     with col_dl1:
-        if media_bytes:
+        if video_path:
             st.download_button(
                 "Download MP4",
-                data=media_bytes,
+                data=lambda path=video_path: read_file(path),  # read on click, not on every rerun
                 file_name=f"{job_id}.mp4",
                 mime="video/mp4",
+                key=f"create_mp4_{gen.key}",
                 width="stretch",
             )
-        elif media_url:
+        elif gen.media_url:
             st.markdown(
-                f"[Download MP4]({media_url})",
+                f"[Download MP4]({gen.media_url})",
                 help="Opens the asset URL in a new tab.",
             )
         else:
-            st.button("Download MP4", disabled=True, width="stretch")
+            st.button("Download MP4", key=f"create_mp4_{gen.key}", disabled=True, width="stretch")
     with col_dl2:
         st.download_button(
             "Download metadata JSON",
-            data=st.session_state.get("create_last_metadata", "{}"),
+            data=json.dumps(job, indent=2),
             file_name=f"{job_id}.json",
             mime="application/json",
+            key=f"create_meta_{gen.key}",
             width="stretch",
         )
+    with col_dl3:
+        st.button("Dismiss", key=f"create_dismiss_{gen.key}", on_click=_dismiss, args=(gen.key,), width="stretch")
+
+
+def _media_pending(gens: List[Generation]) -> bool:
+    return any(background.state(g.video_id, v)[0] == "pending" for g in gens if g.video_id for v in g.variants)
+
+
+def _render_results(gens: List[Generation], was_pending: bool) -> None:
+    for gen in gens:
+        with st.container(border=True):
+            _render_result(gen)
+    if was_pending and not _media_pending(gens):
+        st.rerun()  # a full rerun re-registers the fragment without the refresh timer
+
+
+if finished:
+    pending = _media_pending(finished)
+    # Cards show immediately; the fragment refreshes itself until downloads settle.
+    st.fragment(run_every=MEDIA_REFRESH_S if pending else None)(_render_results)(finished, pending)
 
-    history = st.session_state.get(VIDEO_HISTORY_KEY, [])[:5]
-    if history:
-        st.markdown("#### Recent jobs this session")
-        for entry in history:
-            st.write(f"• `{entry.get('id')}` · {entry.get('status')} · {entry.get('size', '—')} · {entry.get('seconds', '—')}s")
+history = st.session_state.get(VIDEO_HISTORY_KEY, [])[:5]
+if history:
+    st.markdown("#### Recent jobs this session")
+    for entry in history:
+        st.write(f"• `{entry.get('id')}` · {entry.get('status')} · {entry.get('size', '—')} · {entry.get('seconds', '—')}s")
@@ -4,35 +4,45 @@ from __future__ import annotations
 
 import datetime as dt
 import json
-from typing import Dict, List
+import os
+import time
+from typing import Dict, List, Optional
 
-import pandas as pd
 import streamlit as st
 
 from lib.api import (
+    DownloadProgress,
     delete_video,
-    download_video_bytes,
     extract_asset_url,
-    get_openai_client,
     get_progress_percent,
-    get_video,
     list_videos,
-    poll_until_complete,
     to_dict,
 )
 from lib.state import (
     JOBS_HAS_MORE_KEY,
     VIDEO_HISTORY_KEY,
     cache_job,
+    current_session_id,
     ensure_session_defaults,
-    get_api_config,
+    get_cached_job,
     is_busy,
     remove_video_from_history,
     set_busy,
     upsert_video_history,
 )
+from lib.archive import archive_enabled, get_archive
+from lib.autosave import get_autosaver
+from lib.coalesce import LIVE_STATUSES, get_coalescer
+from lib.credentials import get_credential_pool
+from lib.export import export_jobs_zip
+from lib.journal import get_journal
+from lib.media import cached_media, get_background_media
+from lib.predictor import get_predictor
+from lib.search import get_prompt_index
+from lib.watcher import get_watcher
 from lib.state import format_ts
-from lib.ui import job_status_badge, toast_error, toast_success
+from lib.startup import lazy_import
+from lib.ui import format_eta, job_status_badge, read_file, toast_error, toast_success, toast_warning
 
 
 ensure_session_defaults()
@@ -40,9 +50,9 @@ ensure_session_defaults()
 st.title("📼 My Jobs")
 st.write("Monitor render progress, download outputs, and manage your video jobs.")
 
-cfg = get_api_config()
+pool = get_credential_pool()
 
-if not cfg.api_key:
+if not len(pool):
     st.stop()
 
 
@@ -58,11 +68,17 @@ def _ensure_jobs_defaults() -> None:
         "jobs_selected_id": None,
         "jobs_selected_job": None,
         "jobs_selected_media_url": None,
-        "jobs_selected_media_bytes": None,
+        "jobs_selected_media_path": None,
         "jobs_pending_delete": None,
         "jobs_download_payload": None,
         "jobs_loaded_once": False,
         "jobs_last_filters": None,
+        "jobs_bulk_selection": [],
+        "jobs_export_result": None,
+        "jobs_search_query": "",
+        "jobs_search_page": 0,
+        "jobs_watch_handled": [],
+        "jobs_credential": pool.names()[0],
     }
     for key, value in defaults.items():
         st.session_state.setdefault(key, value)
@@ -71,12 +87,19 @@ def _ensure_jobs_defaults() -> None:
 _ensure_jobs_defaults()
 
 
-def _get_client():
-    return get_openai_client(
-        cfg.api_key,
-        base_url=cfg.base_url,
-    )
+def _get_client(video_id: Optional[str] = None):
+    """Client for the key that owns `video_id`, or for the key being listed."""
+    if video_id:
+        return pool.client_for(video_id)
+    return pool.client(st.session_state.get("jobs_credential"))
+
 
+SEARCH_PAGE_SIZE = 20
+WATCH_REFRESH_S = 2.0
+LIVE_REFRESH_S = 10.0
+
+# Larger archives stay on disk; Streamlit buffers download_button payloads in memory.
+EXPORT_INLINE_LIMIT = 200 * 1024 * 1024
 
 STATUS_OPTIONS = ["All", "In-progress", "Completed", "Failed"]
 STATUS_TO_API = {
@@ -88,6 +111,13 @@ STATUS_TO_API = {
 
 
 with st.container():
+    if len(pool) > 1:
+        st.selectbox(
+            "API key",
+            pool.names(),
+            key="jobs_credential",
+            help="Each key lists the jobs of its own organization.",
+        )
     filter_cols = st.columns([2, 2, 2, 1])
     with filter_cols[0]:
         st.selectbox(
@@ -121,6 +151,7 @@ with st.container():
 
 def _filters_snapshot() -> Dict[str, Optional[str]]:
     return {
+        "credential": st.session_state.get("jobs_credential"),
         "status": st.session_state.get("jobs_status_filter"),
         "use_date": st.session_state.get("jobs_use_date_filter"),
         "start": st.session_state.get("jobs_date_start"),
@@ -152,6 +183,13 @@ def _fetch_jobs(*, reset: bool) -> None:
             st.session_state["jobs_rows"].append(job_dict)
             cache_job(job_dict)
             upsert_video_history(job_dict, source="jobs")
+        get_predictor().observe_jobs(st.session_state["jobs_rows"])
+        get_coalescer().prime(data)
+        get_prompt_index().index_jobs(data)
+        pool.pin([item.get("id") for item in data], st.session_state.get("jobs_credential"))
+        get_autosaver().observe(client, [to_dict(item) for item in data])
+        if archive_enabled():
+            get_archive().append(data)
         has_more = bool(page.get("has_more"))
         st.session_state[JOBS_HAS_MORE_KEY] = has_more
         st.session_state["jobs_next_after"] = data[-1].get("id") if has_more and data else None
@@ -178,6 +216,73 @@ if st.session_state.get("jobs_last_error"):
 jobs = st.session_state.get("jobs_rows", [])
 
 
+def _reset_search_page() -> None:
+    st.session_state["jobs_search_page"] = 0
+
+
+def _open_search_result(row: Dict) -> None:
+    job_id = row.get("id")
+    if not any(job.get("id") == job_id for job in st.session_state.get("jobs_rows", [])):
+        job = get_cached_job(job_id) or {
+            "id": job_id,
+            "status": row.get("status"),
+            "model": row.get("model"),
+            "size": row.get("size"),
+            "seconds": row.get("seconds"),
+            "created_at": row.get("created_at"),
+            "prompt": row.get("prompt"),
+        }
+        st.session_state["jobs_rows"].insert(0, job)
+    st.session_state["jobs_selected_id"] = job_id
+
+
+with st.expander("Search prompts", expanded=bool(st.session_state.get("jobs_search_query"))):
+    st.text_input(
+        "Search prompts",
+        key="jobs_search_query",
+        placeholder="e.g. drone harbor sunset",
+        on_change=_reset_search_page,
+        label_visibility="collapsed",
+    )
+    query = st.session_state.get("jobs_search_query", "").strip()
+    if query:
+        index = get_prompt_index()
+        page_no = int(st.session_state.get("jobs_search_page", 0))
+        started = time.perf_counter()
+        results, total = index.search(query, limit=SEARCH_PAGE_SIZE, offset=page_no * SEARCH_PAGE_SIZE)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        pages = max(1, -(-total // SEARCH_PAGE_SIZE))
+        st.caption(f"{total} match(es) across {len(index)} indexed job(s) · {elapsed_ms:.1f} ms")
+        for row in results:
+            result_cols = st.columns([6, 1])
+            result_cols[0].markdown(
+                f"{job_status_badge(row.get('status'))} · `{row['id']}` · {format_ts(row.get('created_at'))}  \n"
+                f"{row.get('snippet') or row.get('prompt') or '—'}"
+            )
+            result_cols[1].button(
+                "Open",
+                key=f"jobs_search_open_{row['id']}",
+                on_click=_open_search_result,
+                args=(row,),
+                width="stretch",
+            )
+        if total > SEARCH_PAGE_SIZE:
+            nav_cols = st.columns([1, 2, 1])
+            nav_cols[0].button(
+                "Previous",
+                disabled=page_no <= 0,
+                on_click=lambda: st.session_state.update(jobs_search_page=page_no - 1),
+                width="stretch",
+            )
+            nav_cols[1].caption(f"Page {page_no + 1} of {pages}")
+            nav_cols[2].button(
+                "Next",
+                disabled=page_no + 1 >= pages,
+                on_click=lambda: st.session_state.update(jobs_search_page=page_no + 1),
+                width="stretch",
+            )
+
+
 def _apply_date_filter(items: List[Dict]) -> List[Dict]:
     if not st.session_state.get("jobs_use_date_filter"):
         return items
@@ -221,8 +326,20 @@ else:
                 "Model": job.get("model", "—"),
             }
         )
+    pd = lazy_import("pandas")
     df = pd.DataFrame(table_rows)
-    st.dataframe(df, width="stretch", hide_index=True)
+    table_event = st.dataframe(
+        df,
+        width="stretch",
+        hide_index=True,
+        on_select="rerun",
+        selection_mode="multi-row",
+        key="jobs_table",
+    )
+    selected_rows = getattr(getattr(table_event, "selection", None), "rows", []) or []
+    st.session_state["jobs_bulk_selection"] = [
+        visible_jobs[idx] for idx in selected_rows if 0 <= idx < len(visible_jobs)
+    ]
 
     job_ids = [row.get("Job ID") for row in table_rows if row.get("Job ID")]
     if job_ids:
@@ -235,6 +352,143 @@ else:
     else:
         st.session_state["jobs_selected_id"] = None
 
+
+def _apply_live_updates(updates: Dict[str, Dict]) -> bool:
+    """Merge refreshed jobs into the table rows; True if any status changed."""
+    changed = False
+    rows = []
+    for job in st.session_state.get("jobs_rows", []):
+        fresh = updates.get(job.get("id"))
+        if fresh is None:
+            rows.append(job)
+            continue
+        status = str(fresh.get("status", "")).lower()
+        changed = changed or status != str(job.get("status", "")).lower()
+        if status == "deleted":
+            remove_video_from_history(job.get("id"))
+            continue
+        rows.append(fresh)
+        cache_job(fresh)
+        upsert_video_history(fresh, source="poll")
+        get_predictor().observe_tick(fresh)
+        if (st.session_state.get("jobs_selected_job") or {}).get("id") == fresh.get("id"):
+            st.session_state["jobs_selected_job"] = fresh
+            st.session_state["jobs_selected_media_url"] = extract_asset_url(fresh)
+    st.session_state["jobs_rows"] = rows
+    if changed:
+        get_predictor().observe_jobs(rows)
+        get_autosaver().observe(None, updates.values())
+        get_prompt_index().index_jobs([updates[j["id"]] for j in rows if j.get("id") in updates])
+    return changed
+
+
+def _refresh_live_rows(live_ids: List[str]) -> None:
+    """Timer-driven refresh of queued/in-progress rows: one list sweep per key per cycle."""
+    coalescer = get_coalescer()
+    by_key: Dict[str, List[str]] = {}
+    for video_id in live_ids:
+        by_key.setdefault(pool.credential_for(video_id).name, []).append(video_id)
+    updates: Dict[str, Dict] = {}
+    try:
+        for name, ids in by_key.items():
+            updates.update(coalescer.refresh_many(pool.client(name), ids))
+    except Exception as exc:  # pragma: no cover - network path
+        st.caption(f"Live refresh failed: {exc}")
+        return
+    stats = coalescer.stats()
+    st.caption(
+        f"Auto-refreshing {len(live_ids)} live job(s) every {LIVE_REFRESH_S:.0f}s · "
+        f"{stats['sweeps']} list sweep(s), {stats['fallbacks']} fallback retrieve(s) so far"
+    )
+    if _apply_live_updates(updates):
+        st.rerun()  # redraw the table; the timer stops once no rows are live
+
+
+live_ids = [
+    job["id"] for job in jobs if job.get("id") and str(job.get("status", "")).lower() in LIVE_STATUSES
+]
+if live_ids and len(pool):
+    st.fragment(run_every=LIVE_REFRESH_S)(_refresh_live_rows)(live_ids)
+
+
+def _handle_bulk_export() -> None:
+    selection = st.session_state.get("jobs_bulk_selection") or []
+    if not selection:
+        return
+    progress_placeholder = st.empty()
+    set_busy(True)
+    try:
+        client = _get_client()
+        progress_bar = progress_placeholder.progress(0, text="Starting export…")
+        with st.status(f"Exporting {len(selection)} jobs…", expanded=False) as status:
+
+            def _on_progress(done: int, total: int, item) -> None:
+                label = f"{done}/{total} · {item.video_id}"
+                progress_bar.progress(int(done * 100 / total), text=label)
+                if not item.ok:
+                    status.write(f"Failed `{item.video_id}`: {item.error}")
+
+            result = export_jobs_zip(
+                client,
+                selection,
+                client_for=pool.client_for,
+                include_metadata=st.session_state.get("jobs_export_metadata", True),
+                include_thumbnails=st.session_state.get("jobs_export_thumbnails", False),
+                max_workers=int(st.session_state.get("jobs_export_workers", 4)),
+                on_progress=_on_progress,
+            )
+            state = "error" if result.failures else "complete"
+            status.update(label="Export finished", state=state, expanded=bool(result.failures))
+        st.session_state["jobs_export_result"] = result
+        if result.failures:
+            toast_error(f"{len(result.failures)} of {len(result.items)} exports failed.")
+        else:
+            toast_success("Export ready below.")
+    except Exception as exc:  # pragma: no cover - network/disk path
+        toast_error(str(exc))
+    finally:
+        progress_placeholder.empty()
+        set_busy(False)
+
+
+bulk_selection = st.session_state.get("jobs_bulk_selection") or []
+with st.expander(f"Bulk export ({len(bulk_selection)} selected)", expanded=bool(bulk_selection)):
+    st.caption("Select rows in the table above, then export them into a single ZIP on disk.")
+    export_cols = st.columns(3)
+    export_cols[0].checkbox("Include metadata JSON", value=True, key="jobs_export_metadata")
+    export_cols[1].checkbox("Include thumbnails", value=False, key="jobs_export_thumbnails")
+    export_cols[2].number_input("Parallel downloads", 1, 16, 4, key="jobs_export_workers")
+    st.button(
+        f"Export {len(bulk_selection)} selected to ZIP",
+        on_click=_handle_bulk_export,
+        disabled=is_busy() or not bulk_selection,
+        width="stretch",
+    )
+
+    export_result = st.session_state.get("jobs_export_result")
+    if export_result:
+        result_cols = st.columns(4)
+        result_cols[0].metric("Exported", f"{len(export_result.items) - len(export_result.failures)}/{len(export_result.items)}")
+        result_cols[1].metric("Size", f"{export_result.bytes_total / (1024 * 1024):.1f} MB")
+        result_cols[2].metric("Elapsed", f"{export_result.elapsed_s:.1f}s")
+        result_cols[3].metric("Throughput", f"{export_result.throughput_mb_s:.1f} MB/s")
+        if export_result.failures:
+            st.dataframe(
+                [{"Job ID": item.video_id, "Error": item.error} for item in export_result.failures],
+                width="stretch",
+                hide_index=True,
+            )
+        st.caption(f"Archive written to `{export_result.path}`")
+        if export_result.bytes_total <= EXPORT_INLINE_LIMIT and os.path.exists(export_result.path):
+            # A callable is only read when the button is clicked, not on every rerun.
+            st.download_button(
+                "Save ZIP",
+                data=lambda path=export_result.path: read_file(path),
+                file_name=os.path.basename(export_result.path),
+                mime="application/zip",
+                width="stretch",
+            )
+
 selected_id = st.session_state.get("jobs_selected_id")
 selected_job = None
 if selected_id:
@@ -252,7 +506,7 @@ actions_container = st.container()
 def _update_selected_job(job_dict: Dict) -> None:
     st.session_state["jobs_selected_job"] = job_dict
     st.session_state["jobs_selected_media_url"] = extract_asset_url(job_dict)
-    st.session_state["jobs_selected_media_bytes"] = None
+    st.session_state["jobs_selected_media_path"] = cached_media(str(job_dict.get("id")))
     rows = st.session_state.get("jobs_rows", [])
     for idx, existing in enumerate(rows):
         if existing.get("id") == job_dict.get("id"):
@@ -272,10 +526,10 @@ with actions_container:
         def _handle_open() -> None:
             set_busy(True)
             try:
-                client = _get_client()
+                client = _get_client(selected_id)
                 with st.status("Fetching job…", expanded=False) as status:
-                    job = get_video(client, selected_id)
-                    job_dict = to_dict(job)
+                    # Explicit refresh: skip the snapshot cache but still join an in-flight retrieve.
+                    job_dict = get_coalescer().retrieve(client, selected_id, max_age=0)
                     cache_job(job_dict)
                     upsert_video_history(job_dict, source="open")
                     _update_selected_job(job_dict)
@@ -287,53 +541,55 @@ with actions_container:
                 set_busy(False)
 
         def _handle_resume_polling() -> None:
-            progress_placeholder = st.empty()
-            set_busy(True)
+            # Polls on a watcher thread so the page stays responsive; the fragment below reports progress.
             try:
-                client = _get_client()
-                progress_bar = progress_placeholder.progress(0, text="Resuming polling…")
-                with st.status("Checking render…", expanded=False) as status:
-                    def _tick(job_update: Dict) -> None:
-                        job_dict = to_dict(job_update)
-                        cache_job(job_dict)
-                        upsert_video_history(job_dict, source="poll")
-                        pct = max(0, min(100, get_progress_percent(job_dict)))
-                        label = "Finalizing" if pct >= 99 else f"Rendering {pct}%"
-                        progress_bar.progress(max(pct, 1), text=label)
-                        status.update(label=label, state="running", expanded=True)
-
-                    job_obj = poll_until_complete(client, selected_id, sleep_s=3, on_tick=_tick)
-                    job_dict = to_dict(job_obj)
-                    progress_bar.progress(100, text="Ready")
-                    status.update(label="Ready", state="complete", expanded=False)
-                    cache_job(job_dict)
-                    upsert_video_history(job_dict, source="complete")
-                    _update_selected_job(job_dict)
-                toast_success("Job completed.")
+                job = selected_job or get_cached_job(selected_id) or {}
+                get_watcher().start(
+                    _get_client(selected_id),
+                    selected_id,
+                    current_session_id(),
+                    model=job.get("model"),
+                    seconds=job.get("seconds"),
+                    fetch=get_coalescer().fetcher(_get_client(selected_id)),
+                    interval=get_predictor().next_poll_delay,
+                    on_tick=get_predictor().observe_tick,
+                    on_done=get_journal().record_watch,
+                )
+                toast_success("Watching the job in the background.")
             except Exception as exc:  # pragma: no cover - network path
                 toast_error(str(exc))
-            finally:
-                progress_placeholder.empty()
-                set_busy(False)
 
         def _handle_download() -> None:
+            progress_placeholder = st.empty()
             set_busy(True)
             try:
-                client = _get_client()
+                client = _get_client(selected_id)
+                progress_bar = progress_placeholder.progress(0, text="Requesting media stream…")
                 with st.status("Downloading MP4…", expanded=False) as status:
-                    status.write("Requesting media stream…")
-                    media_bytes = download_video_bytes(client, selected_id)
+
+                    def _on_progress(progress: DownloadProgress) -> None:
+                        mb = progress.bytes_done / (1024 * 1024)
+                        retry_note = f" · retry {progress.retries}" if progress.retries else ""
+                        progress_bar.progress(progress.percent or 0, text=f"{mb:.1f} MB{retry_note}")
+
+                    # Streams into the media cache; an interrupted transfer resumes from the .part file.
+                    media_path = get_background_media().run_inline(client, selected_id, "video", on_progress=_on_progress)
+                    if media_path is None:
+                        status.update(label="Already downloading", state="error", expanded=False)
+                        toast_warning("This MP4 is already being downloaded (autosave or another tab); try again shortly.")
+                        return
                     st.session_state["jobs_download_payload"] = {
                         "id": selected_id,
-                        "bytes": media_bytes,
+                        "path": media_path,
                         "file_name": f"{selected_id}.mp4",
                     }
-                    st.session_state["jobs_selected_media_bytes"] = media_bytes
+                    st.session_state["jobs_selected_media_path"] = media_path
                     status.update(label="Download ready", state="complete", expanded=False)
                 toast_success("Download ready below.")
             except Exception as exc:  # pragma: no cover - network path
-                toast_error(str(exc))
+                toast_error(f"{exc} — click Download MP4 again to resume.")
             finally:
+                progress_placeholder.empty()
                 set_busy(False)
 
         def _handle_delete() -> None:
@@ -354,10 +610,14 @@ with actions_container:
         action_cols[4].button("Delete", on_click=_handle_delete, disabled=is_busy())
 
         download_payload = st.session_state.get("jobs_download_payload")
-        if download_payload and download_payload.get("id") == selected_id:
+        if (
+            download_payload
+            and download_payload.get("id") == selected_id
+            and os.path.exists(download_payload.get("path", ""))
+        ):
             st.download_button(
                 "Save MP4",
-                data=download_payload.get("bytes"),
+                data=lambda path=download_payload["path"]: read_file(path),  # read on click, not on every rerun
                 file_name=download_payload.get("file_name"),
                 mime="video/mp4",
                 width="stretch",
@@ -371,17 +631,21 @@ with actions_container:
             def _execute_delete() -> None:
                 set_busy(True)
                 try:
-                    client = _get_client()
+                    client = _get_client(selected_id)
                     with st.status("Deleting video…", expanded=False) as status:
                         status.write("Sending delete request…")
                         delete_video(client, selected_id)
+                        get_watcher().cancel(selected_id, "job deleted")
+                        get_journal().record_status(selected_id, "deleted")
+                        get_coalescer().invalidate(selected_id)
+                        get_prompt_index().remove(selected_id)
                         remove_video_from_history(selected_id)
                         st.session_state["jobs_rows"] = [
                             job for job in st.session_state.get("jobs_rows", []) if job.get("id") != selected_id
                         ]
                         st.session_state["jobs_selected_job"] = None
                         st.session_state["jobs_selected_media_url"] = None
-                        st.session_state["jobs_selected_media_bytes"] = None
+                        st.session_state["jobs_selected_media_path"] = None
                         if st.session_state.get("jobs_download_payload", {}).get("id") == selected_id:
                             st.session_state["jobs_download_payload"] = None
                         status.update(label="Deleted", state="complete", expanded=False)
@@ -400,6 +664,73 @@ with actions_container:
             )
 
 
+def _consume_finished_watch(watch) -> None:
+    """Apply a finished background poll to this session once."""
+    handled = st.session_state["jobs_watch_handled"]
+    key = f"{watch.video_id}:{watch.finished}"
+    if key in handled:
+        return
+    handled.append(key)
+    del handled[:-50]
+    if watch.job:
+        cache_job(watch.job)
+        upsert_video_history(watch.job, source="complete" if watch.state == "completed" else "poll")
+        if st.session_state.get("jobs_selected_id") == watch.video_id:
+            _update_selected_job(watch.job)
+    if watch.state == "completed":
+        get_predictor().observe_jobs([watch.job])
+        toast_success(f"Job {watch.video_id} completed.")
+    elif watch.state in ("failed", "timed_out"):
+        toast_error(watch.error or f"Job {watch.video_id} {watch.state}.")
+
+
+def _render_watches(was_active: bool) -> None:
+    owner = current_session_id()
+    watcher = get_watcher()
+    watcher.heartbeat(owner)
+    predictor = get_predictor()
+    own = sorted(watcher.watches(owner), key=lambda w: w.started, reverse=True)
+    if not own:
+        return
+    st.markdown("#### Watching")
+    for watch in own:
+        row = st.columns([5, 1])
+        job = watch.job or {}
+        if watch.active:
+            pct = max(0, min(100, get_progress_percent(job))) if job else 0
+            label = (
+                f"`{watch.video_id}` · {job.get('status', 'queued')} {pct}% · "
+                f"ETA {format_eta(predictor.eta(job)) if job else '—'} · "
+                f"gives up in {format_eta(watch.remaining_s)}"
+            )
+            row[0].progress(max(pct, 1), text=label)
+            row[1].button(
+                "Stop watching",
+                key=f"jobs_watch_stop_{watch.video_id}",
+                on_click=watcher.stop,
+                args=(watch.video_id, owner),
+                width="stretch",
+            )
+        else:
+            _consume_finished_watch(watch)
+            outcome = watch.state.replace("_", " ") + (f" · {watch.error}" if watch.error else "")
+            row[0].write(f"{job_status_badge(job.get('status'))} `{watch.video_id}` · {outcome}")
+            row[1].button(
+                "Dismiss",
+                key=f"jobs_watch_dismiss_{watch.video_id}",
+                on_click=watcher.stop,
+                args=(watch.video_id, owner),
+                width="stretch",
+            )
+    if was_active and not any(w.active for w in own):
+        st.rerun()  # refresh the table and details, and drop the fragment timer
+
+
+# Non-blocking progress for background polls; refreshes itself while any are running.
+watching = any(w.active for w in get_watcher().watches(current_session_id()))
+st.fragment(run_every=WATCH_REFRESH_S if watching else None)(_render_watches)(watching)
+
+
 st.divider()
 
 st.markdown("### Job details")
@@ -417,11 +748,11 @@ else:
     detail_cols[3].metric("Created", format_ts(selected_job.get("created_at") or selected_job.get("created")))
 
     media_url = st.session_state.get("jobs_selected_media_url")
-    media_bytes = st.session_state.get("jobs_selected_media_bytes")
+    media_path = st.session_state.get("jobs_selected_media_path")
     if media_url:
         st.video(media_url)
-    elif media_bytes:
-        st.video(media_bytes)
+    elif media_path and os.path.exists(media_path):
+        st.video(media_path)
     else:
         st.caption("Open the job or resume polling to load a preview.")
 
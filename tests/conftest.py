@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Point SORA_DATA_DIR at a fresh directory so tests never touch `.sora`."""
+    root = tmp_path / "sora"
+    root.mkdir()
+    monkeypatch.setenv("SORA_DATA_DIR", str(root))
+    return root
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from lib.analytics import JobHistory, build_frame, failure_rates, latency_percentiles
+from lib.archive import JobArchive
+
+
+def _job(video_id: str, status: str = "completed", latency: int = 100, **extra) -> dict:
+    job = {"id": video_id, "status": status, "model": "sora-2", "size": "720x1280", "seconds": "4", "created_at": 1_700_000_000}
+    if status == "completed":
+        job["completed_at"] = job["created_at"] + latency
+    return {**job, **extra}
+
+
+def test_build_frame_derives_latency_and_outcome():
+    df = build_frame([_job("a", latency=90), _job("b", "failed"), _job("c", "in_progress")])
+    assert df.set_index("id")["latency_s"]["a"] == 90
+    assert df["completed"].tolist() == [True, False, False]
+    assert df["failed"].tolist() == [False, True, False]
+
+
+def test_percentiles_and_failure_rates():
+    df = build_frame([_job(str(i), latency=100 + i) for i in range(10)] + [_job("x", "failed")])
+    latency = latency_percentiles(df)
+    assert latency[["jobs", "p50"]].iloc[0].tolist() == [10, 104.5]
+    failures = failure_rates(df)
+    assert failures[["jobs", "failed", "failure_rate_pct"]].iloc[0].tolist() == [11, 1, 9.1]
+
+
+def test_history_only_reparses_changed_jobs():
+    history = JobHistory()
+    assert history.update([_job("a", "in_progress"), _job("b")]) == 2
+    first = history.summary()
+    assert history.update([_job("a", "in_progress"), _job("b")]) == 0
+    assert history.summary() is first  # memoized until something changes
+    assert history.update([_job("a"), _job("a")]) == 1  # duplicates collapse to one row
+    assert len(history.frame) == 2
+    assert int(history.frame["completed"].sum()) == 2
+
+
+def test_history_reads_the_archive_only_when_it_grows(data_dir):
+    archive = JobArchive(str(data_dir / "archive"))
+    archive.append([_job("a", latency=60), _job("b", "failed")])
+    history = JobHistory()
+    assert history.update_from_archive(archive) == 2
+    assert history.update_from_archive(archive) == 0
+    assert history.frame.set_index("id")["latency_s"]["a"] == 60
+    archive.append([_job("c")])
+    assert history.update_from_archive(archive) == 1
+    assert history.update([_job("a", latency=60)]) == 0  # live jobs match archived rows
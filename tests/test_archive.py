@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import glob
+import os
+
+from lib.archive import JobArchive
+
+
+def _job(video_id: str, status: str = "completed") -> dict:
+    return {"id": video_id, "status": status, "model": "sora-2", "created_at": 1_700_000_000}
+
+
+def test_only_new_terminal_jobs_are_appended(data_dir):
+    archive = JobArchive(str(data_dir / "archive"))
+    assert archive.append([_job("v1"), _job("v2", "in_progress"), _job("v3", "failed")]) == 2
+    assert archive.append([_job("v1"), _job("v2")]) == 1
+    assert len(archive) == 3
+
+
+def test_writers_see_each_others_index(data_dir):
+    # Two instances stand in for two processes sharing one archive.
+    first, second = JobArchive(str(data_dir / "archive")), JobArchive(str(data_dir / "archive"))
+    assert first.append([_job("v1"), _job("v2")]) == 2
+    assert second.append([_job("v2"), _job("v3")]) == 1
+    assert first.append([_job("v3"), _job("v4")]) == 1
+    assert len(first) == len(second) == 4
+    assert sorted(first.read(columns=["id"])["id"]) == ["v1", "v2", "v3", "v4"]
+
+
+def test_compact_merges_parts_and_drops_duplicate_ids(data_dir):
+    root = str(data_dir / "archive")
+    JobArchive(root).append([_job("v1", "failed"), _job("v2")])
+    # An archive written before writers shared the index can hold an id twice.
+    os.remove(os.path.join(root, "_ids.txt"))
+    archive = JobArchive(root)
+    archive.append([_job("v1"), _job("v3")])
+    assert len(archive.read()) == 4
+
+    assert archive.compact() == 1
+    assert len(glob.glob(os.path.join(root, "day=*", "*.parquet"))) == 1
+    frame = archive.read(columns=["id", "status"]).sort_values("id")
+    assert list(frame.itertuples(index=False, name=None)) == [("v1", "completed"), ("v2", "completed"), ("v3", "completed")]
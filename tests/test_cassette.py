@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from lib.cassette import Cassette, CassetteConfig, _httpx, make_transport, request_key
+
+
+def _record(path, handler):
+    httpx = _httpx()
+    cassette = Cassette(CassetteConfig(path=str(path), mode="record"))
+    transport = make_transport(cassette)
+    transport._inner = httpx.MockTransport(handler)  # stand-in for the network
+    return httpx.Client(transport=transport, base_url="https://api.example.test")
+
+
+def _replay(path):
+    httpx = _httpx()
+    cassette = Cassette(CassetteConfig(path=str(path), mode="replay", speed=0))
+    return cassette, httpx.Client(transport=make_transport(cassette), base_url="https://other.example.test")
+
+
+def test_request_key_ignores_host_and_query_order():
+    assert request_key("get", "/v1/videos", "b=2&a=1") == "GET /v1/videos?a=1&b=2"
+    assert request_key("GET", "/v1/videos/x/content", "", "bytes=10-") == "GET /v1/videos/x/content [bytes=10-]"
+
+
+def test_record_then_replay_round_trip(tmp_path):
+    httpx = _httpx()
+    progress = iter([10, 60, 100])
+
+    def handler(request):
+        if request.url.path == "/v1/videos/v1":
+            return httpx.Response(200, json={"id": "v1", "progress": next(progress)})
+        if request.url.path == "/v1/videos/v1/content":
+            return httpx.Response(200, content=b"\x00mp4" * 1000, headers={"set-cookie": "secret"})
+        return httpx.Response(404, json={"error": "missing"})
+
+    with _record(tmp_path, handler) as client:
+        polls = [client.get("/v1/videos/v1").json()["progress"] for _ in range(3)]
+        listing = client.get("/v1/videos", params={"limit": 2, "after": "x"})
+        content = client.get("/v1/videos/v1/content").content
+    assert polls == [10, 60, 100]
+    assert listing.status_code == 404
+
+    cassette, client = _replay(tmp_path)
+    with client:
+        replayed = [client.get("/v1/videos/v1").json()["progress"] for _ in range(4)]
+        assert replayed == [10, 60, 100, 100]  # polls in order, then the last one repeats
+        assert client.get("/v1/videos?after=x&limit=2").status_code == 404
+        response = client.get("/v1/videos/v1/content")
+        assert response.content == content
+        assert "set-cookie" not in response.headers
+        with pytest.raises(RuntimeError, match="no recorded response"):
+            client.get("/v1/videos/unknown")
+    assert cassette.stats()["misses"] == 1
+
+
+def test_concurrent_recorders_keep_every_body(tmp_path):
+    httpx = _httpx()
+
+    def handler(request):
+        return httpx.Response(200, content=request.url.path.encode())
+
+    # Two recorders that both start from an empty cassette, as two processes would.
+    first, second = _record(tmp_path, handler), _record(tmp_path, handler)
+    with first, second:
+        first.get("/a")
+        second.get("/b")
+
+    with open(tmp_path / "interactions.jsonl", encoding="utf-8") as fh:
+        records = [json.loads(line) for line in fh]
+    assert len({r["body"] for r in records}) == 2
+    _, client = _replay(tmp_path)
+    with client:
+        assert client.get("/a").content == b"/a"
+        assert client.get("/b").content == b"/b"
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+
+import lib.cli as cli
+from lib.credentials import Credential, CredentialPool
+from lib.journal import JobJournal
+from lib.search import PromptIndex
+
+
+@pytest.fixture
+def pool(data_dir, monkeypatch) -> CredentialPool:
+    pool = CredentialPool([Credential("a", "sk-aaaaaaaaaaaa")], pin_path=str(data_dir / "credential_pins.tsv"))
+    monkeypatch.setattr(cli, "get_credential_pool", lambda: pool)
+    return pool
+
+
+def test_pool_exits_on_unknown_or_missing_credentials(pool, monkeypatch):
+    assert cli._pool("a") is pool
+    with pytest.raises(SystemExit, match="nope"):
+        cli._pool("nope")
+    monkeypatch.setattr(cli, "get_credential_pool", lambda: CredentialPool([]))
+    with pytest.raises(SystemExit, match="OPENAI_API_KEY"):
+        cli._pool()
+
+
+def test_read_ids_expands_stdin(monkeypatch):
+    monkeypatch.setattr("sys.stdin", io.StringIO("v2\n\n  v3 \n"))
+    assert cli._read_ids(["v1", "-"]) == ["v1", "v2", "v3"]
+
+
+def test_run_many_keeps_order_and_reports_failures():
+    def fn(item: str) -> dict:
+        if item == "bad":
+            raise RuntimeError("boom")
+        return {"value": item.upper()}
+
+    results = cli._run_many(fn, ["a", "bad", "c"], workers=3)
+    assert results == [
+        {"id": "a", "ok": True, "value": "A"},
+        {"id": "bad", "ok": False, "error": "boom"},
+        {"id": "c", "ok": True, "value": "C"},
+    ]
+    assert cli._exit_code(results) == 1
+    assert cli._exit_code(results[:1]) == 0
+    assert cli._run_many(fn, [], workers=3) == []
+
+
+def test_delete_unindexes_and_journals(pool, data_dir, monkeypatch, capsys):
+    index = PromptIndex(str(data_dir / "prompts.db"))
+    journal = JobJournal(str(data_dir / "journal.jsonl"))
+    index.index_jobs([{"id": "v1", "prompt": "a red fox"}])
+    journal.record_submit("v1", credential="a")
+    monkeypatch.setattr(cli, "get_prompt_index", lambda: index)
+    monkeypatch.setattr(cli, "get_journal", lambda: journal)
+    monkeypatch.setattr(cli, "delete_video", lambda client, video_id: {"id": video_id, "deleted": True})
+
+    assert cli.main(["delete", "v1"]) == 0
+    assert json.loads(capsys.readouterr().out) == [{"id": "v1", "ok": True, "response": {"id": "v1", "deleted": True}}]
+    assert len(index) == 0
+    assert journal.get("v1").status == "deleted"
+
+
+def test_search_prints_ranked_matches(data_dir, monkeypatch, capsys):
+    index = PromptIndex(str(data_dir / "prompts.db"))
+    index.index_jobs([{"id": "v1", "prompt": "a red fox"}, {"id": "v2", "prompt": "a blue whale"}])
+    monkeypatch.setattr(cli, "get_prompt_index", lambda: index)
+
+    assert cli.main(["search", "fo"]) == 0
+    out = json.loads(capsys.readouterr().out)
+    assert (out["total"], out["indexed"], [r["id"] for r in out["results"]]) == (1, 2, ["v1"])
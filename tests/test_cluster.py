@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import pytest
+
+import lib.cluster as cluster_mod
+import lib.credentials as credentials_mod
+from lib.cluster import Cluster, ClusterStore, runs_maintenance
+from lib.credentials import CredentialPool, load_credentials
+
+
+@pytest.fixture
+def pool(data_dir, monkeypatch):
+    monkeypatch.setenv("SORA_CREDENTIALS", '[{"name": "a", "api_key": "sk-aaaaaaaaaaaa"}, {"name": "b", "api_key": "sk-bbbbbbbbbbbb"}]')
+    monkeypatch.setattr(credentials_mod, "_POOL", None)
+    return credentials_mod.get_credential_pool()
+
+
+def test_read_requests_polling_under_the_pinned_key(pool, data_dir):
+    cluster = Cluster(ClusterStore(str(data_dir / "cluster.db")), "replica-1")
+    # Pinned by another process (the CLI) after this pool loaded its pins.
+    CredentialPool(load_credentials(), pin_path=pool.pin_path).pin(["v1"], "b")
+
+    assert cluster.read(pool.client("a"), "v1") is None  # nothing published yet
+    cluster.read(pool.client("a"), "v2")
+    assert cluster.store.requested() == {"v1": "b", "v2": None}
+
+
+def test_only_the_leader_runs_maintenance(data_dir, monkeypatch):
+    monkeypatch.setattr(cluster_mod, "_CLUSTER", None)
+    monkeypatch.delenv("SORA_CLUSTER", raising=False)
+    assert runs_maintenance()
+
+    replica = Cluster(ClusterStore(str(data_dir / "cluster.db")), "replica-1")
+    monkeypatch.setattr(cluster_mod, "_CLUSTER", replica)
+    assert not runs_maintenance()
+    replica.is_leader = True
+    assert runs_maintenance()
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import lib.coalesce as coalesce_mod
+from lib.coalesce import StatusCoalescer
+
+
+def test_concurrent_retrieves_share_one_request(monkeypatch):
+    calls = []
+    release = threading.Event()
+
+    def get_video(client, video_id):
+        calls.append(video_id)
+        release.wait(5)
+        return {"id": video_id, "status": "in_progress", "progress": len(calls)}
+
+    monkeypatch.setattr(coalesce_mod, "get_video", get_video)
+    coalescer = StatusCoalescer(freshness_s=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(coalescer.retrieve(None, "v1"))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while not calls:
+        time.sleep(0.01)
+    time.sleep(0.05)  # let the other callers join the flight
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["v1"]
+    assert [r["progress"] for r in results] == [1] * 5
+    assert coalescer.retrieve(None, "v1")["progress"] == 1  # fresh snapshot, no request
+    stats = coalescer.stats()
+    assert (stats["requests"], stats["coalesced"], stats["cache_hits"]) == (1, 4, 1)
+
+    assert coalescer.retrieve(None, "v1", max_age=0)["progress"] == 2  # explicit refresh
+    assert calls == ["v1", "v1"]
+
+
+def test_snapshots_are_capped_evicting_the_least_recently_refreshed():
+    coalescer = StatusCoalescer(max_snapshots=3)
+    coalescer.prime([{"id": f"v{i}", "status": "queued"} for i in range(3)])
+    coalescer.prime([{"id": "v0", "status": "in_progress"}])  # refreshed: now the newest
+    coalescer.prime([{"id": "v3"}, {"id": "v4"}])
+    assert list(coalescer._snapshots) == ["v0", "v3", "v4"]
+    assert coalescer.stats()["snapshots"] == 3
+
+
+def test_prune_drops_stale_snapshots_first():
+    coalescer = StatusCoalescer()
+    coalescer.prime([{"id": "old"}])
+    coalescer._snapshots["old"] = (time.monotonic() - 600, {"id": "old"})
+    coalescer.prime([{"id": "new"}])
+    coalescer.prune(older_than_s=300)
+    assert list(coalescer._snapshots) == ["new"]
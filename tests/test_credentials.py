@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from lib.credentials import Credential, CredentialPool, load_credentials
+
+
+def _pool(data_dir) -> CredentialPool:
+    creds = [Credential("a", "sk-aaaaaaaaaaaa"), Credential("b", "sk-bbbbbbbbbbbb")]
+    return CredentialPool(creds, pin_path=str(data_dir / "credential_pins.tsv"))
+
+
+def test_unknown_name_raises(data_dir):
+    pool = _pool(data_dir)
+    assert pool.get().name == "a"
+    assert pool.get("b").name == "b"
+    with pytest.raises(RuntimeError, match="Unknown credential 'typo'"):
+        pool.get("typo")
+    with pytest.raises(RuntimeError, match="Unknown credential"):
+        with pool.lease("typo"):
+            pass
+    with pool.lease("b") as cred:
+        assert cred.name == "b"
+
+
+def test_lease_prefers_least_loaded_key(data_dir):
+    pool = _pool(data_dir)
+    with pool.lease() as first, pool.lease() as second:
+        assert {first.name, second.name} == {"a", "b"}
+
+
+def test_pins_written_elsewhere_are_read_on_a_miss(data_dir):
+    # Two pools stand in for the app and the CLI sharing one pin file.
+    app, cli = _pool(data_dir), _pool(data_dir)
+    assert app.credential_for("v1").name == "a"  # unknown: first key
+    assert cli.pin(["v1", "v2"], "b") == 2
+    assert cli.pin(["v1"], "b") == 0
+    assert app.credential_for("v1").name == "b"
+    assert app.credential_for("v2").name == "b"
+    cli.pin(["v1"], "a")
+    assert app.pinned_name("v1") == "b"  # a hit is served from memory
+    assert _pool(data_dir).pinned_name("v1") == "a"  # the last pin wins on reload
+
+
+def test_concurrent_pin_appends_never_interleave(data_dir):
+    # Separate pools stand in for the app and CLI processes sharing one pin file.
+    def pin(name: str) -> None:
+        pool = _pool(data_dir)
+        for i in range(50):
+            pool.pin([f"{name}{i}"], name)
+
+    threads = [threading.Thread(target=pin, args=(name,)) for name in "ab"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(data_dir / "credential_pins.tsv", encoding="utf-8") as fh:
+        lines = fh.read().splitlines()
+    assert len(lines) == 100 and all(line[0] == line.split("\t")[1] for line in lines)
+
+
+def test_pins_to_unconfigured_keys_fall_back(data_dir):
+    pool = _pool(data_dir)
+    pool.pin(["v1"], "retired")
+    assert pool.pinned_name("v1") is None
+    assert pool.credential_for("v1").name == "a"
+
+
+def test_load_credentials_rejects_duplicates(monkeypatch):
+    monkeypatch.setenv("SORA_CREDENTIALS", '[{"name": "x", "api_key": "sk-1"}, {"name": "x", "api_key": "sk-2"}]')
+    with pytest.raises(RuntimeError, match="Duplicate credential name"):
+        load_credentials()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import json
+import zipfile
+
+import lib.export as export_mod
+from lib.export import export_jobs_zip
+
+
+def test_zip_holds_media_and_metadata_and_reports_failures(data_dir, monkeypatch):
+    calls = []
+
+    def stream_video_to_path(client, video_id, path, *, variant=None):
+        calls.append((client, video_id, variant))
+        if video_id == "bad":
+            raise RuntimeError("expired")
+        with open(path, "wb") as fh:
+            fh.write(f"{video_id}:{variant or 'video'}".encode())
+        return 0
+
+    monkeypatch.setattr(export_mod, "stream_video_to_path", stream_video_to_path)
+    jobs = [{"id": "v1", "prompt": "a cat"}, {"id": "bad"}, {"id": "v2"}]
+    progress = []
+    result = export_jobs_zip(
+        None,
+        jobs,
+        str(data_dir / "out.zip"),
+        include_thumbnails=True,
+        client_for=lambda video_id: f"client-{video_id}",
+        on_progress=lambda done, total, item: progress.append((done, total)),
+    )
+
+    assert sorted(item.video_id for item in result.items) == ["bad", "v1", "v2"]
+    assert [(f.video_id, f.error) for f in result.failures] == [("bad", "expired")]
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+    assert ("client-v2", "v2", "thumbnail") in calls
+    with zipfile.ZipFile(result.path) as zf:
+        assert sorted(zf.namelist()) == ["v1.json", "v1.mp4", "v1.webp", "v2.json", "v2.mp4", "v2.webp"]
+        assert zf.read("v1.mp4") == b"v1:video"
+        assert json.loads(zf.read("v1.json"))["prompt"] == "a cat"
+        assert result.bytes_total == sum(info.file_size for info in zf.infolist())
+
+
+def test_empty_export_writes_an_empty_zip(data_dir):
+    result = export_jobs_zip(None, [], str(data_dir / "empty.zip"))
+    assert result.items == [] and result.throughput_mb_s >= 0
+    with zipfile.ZipFile(result.path) as zf:
+        assert zf.namelist() == []
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from lib.generations import MAX_FINISHED_PER_OWNER, Generation, GenerationRunner
+from lib.watcher import JobWatcher
+
+
+def test_uncapped_watches_start_past_the_cap():
+    watcher = JobWatcher(max_watchers=1)
+    release = threading.Event()
+    done = []
+
+    def fetch(video_id):
+        release.wait(5)
+        return {"id": video_id, "status": "completed", "progress": 100}
+
+    kwargs = dict(fetch=fetch, interval=lambda job: 0.01, on_done=done.append)
+    watcher.start(None, "v1", "session", **kwargs)
+    with pytest.raises(RuntimeError, match="Already watching"):
+        watcher.start(None, "v2", "session", **kwargs)
+    watcher.start(None, "v3", "session", capped=False, **kwargs)
+    release.set()
+    deadline = time.monotonic() + 5
+    while len(done) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sorted(w.video_id for w in done) == ["v1", "v3"]
+
+
+def test_finished_generations_are_capped_per_owner():
+    runner = GenerationRunner()
+    now = time.time()
+    gens = [
+        Generation(key=f"gen-{i}", owner="s", payload={}, state="completed", finished=now - 100 + i)
+        for i in range(MAX_FINISHED_PER_OWNER + 5)
+    ]
+    gens.append(Generation(key="running", owner="s", payload={}, state="rendering"))
+    runner._by_owner["s"] = gens
+    with runner._lock:
+        runner._prune_locked()
+    kept = runner.generations("s")
+    assert len(kept) == MAX_FINISHED_PER_OWNER + 1
+    assert kept[0].key == "running"
+    assert kept[-1].key == "gen-5"  # the five oldest finished cards were dropped
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+
+from lib.journal import JobJournal
+from lib.media import media_path
+
+
+def _journal(data_dir) -> JobJournal:
+    return JobJournal(str(data_dir / "journal.jsonl"))
+
+
+def test_replays_submits_and_status_changes(data_dir):
+    journal = _journal(data_dir)
+    journal.record_submit("v1", credential="a", prompt="a cat", model="sora-2", seconds=4)
+    assert journal.record_status("v1", "in_progress")
+    assert not journal.record_status("v1", "in_progress")  # unchanged
+    assert not journal.record_status("unknown", "completed")
+
+    entry = _journal(data_dir).get("v1")
+    assert (entry.credential, entry.prompt, entry.seconds, entry.status) == ("a", "a cat", "4", "in_progress")
+
+
+def test_torn_tail_is_skipped_and_not_glued_to_the_next_record(data_dir):
+    journal = _journal(data_dir)
+    journal.record_submit("v1")
+    with open(journal.path, "a", encoding="utf-8") as fh:
+        fh.write('{"op": "submit", "id": "torn"')  # crash mid-write
+
+    again = _journal(data_dir)
+    assert [e.id for e in again.pending()] == ["v1"]
+    again.record_submit("v2")
+    assert [e.id for e in _journal(data_dir).pending()] == ["v1", "v2"]
+
+
+def test_compact_drops_settled_entries(data_dir):
+    journal = _journal(data_dir)
+    for video_id in ("failed", "done", "cached", "running"):
+        journal.record_submit(video_id)
+    journal.record_status("failed", "failed")
+    journal.record_status("done", "completed")
+    journal.record_status("cached", "completed")
+    with open(media_path("cached"), "wb") as fh:
+        fh.write(b"mp4")
+
+    assert journal.compact() == 2
+    with open(journal.path, encoding="utf-8") as fh:
+        assert [json.loads(line)["id"] for line in fh] == ["done", "running"]
+    assert sorted(os.listdir(data_dir)) == ["journal.jsonl", "journal.jsonl.lock", "media"]
+
+
+def test_compaction_keeps_submits_from_other_writers(data_dir):
+    # Separate instances stand in for the app and CLI processes sharing one file.
+    compactor = _journal(data_dir)
+
+    def submit(prefix: str) -> None:
+        writer = _journal(data_dir)
+        for i in range(50):
+            writer.record_submit(f"{prefix}{i}")
+
+    writers = [threading.Thread(target=submit, args=(prefix,)) for prefix in "ab"]
+    for thread in writers:
+        thread.start()
+    while any(thread.is_alive() for thread in writers):
+        compactor.compact()
+    for thread in writers:
+        thread.join()
+
+    assert len(_journal(data_dir)) == 100
+
+
+def test_status_for_a_job_journaled_by_another_process_is_kept(data_dir):
+    app = _journal(data_dir)
+    app.record_submit("v1")
+    cli = _journal(data_dir)
+    cli.record_submit("v2")  # the app's cached entries predate this
+    assert app.record_status("v2", "in_progress")
+    assert _journal(data_dir).get("v2").status == "in_progress"
+
+    cli.compact()  # replaces the file under the app
+    cli.record_submit("v3")
+    assert [e.id for e in app.pending()] == ["v1", "v2", "v3"]
+
+
+def test_completed_entries_age_out_when_their_media_expires(data_dir):
+    journal = _journal(data_dir)
+    journal.record_submit("fresh")
+    journal.record_submit("expired")
+    journal.record_status("fresh", "completed", job={"id": "fresh", "completed_at": time.time()})
+    journal.record_status("expired", "completed", job={"id": "expired", "expires_at": time.time() - 1})
+    assert _journal(data_dir).get("fresh").expires_at > time.time()
+    assert [e.id for e in journal.pending()] == ["fresh"]
+    assert journal.compact() == 1
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from lib.autosave import AutoSaver, LocalMediaStore
+from lib.locks import file_lock
+from lib.media import BackgroundMedia, media_path
+
+
+def test_run_inline_reports_busy_while_another_writer_holds_the_file(data_dir):
+    background = BackgroundMedia(max_workers=1)
+    with file_lock(f"{media_path('v1')}.lock"):  # another process streaming the same MP4
+        assert background.run_inline(None, "v1", "video") is None
+    assert background.state("v1", "video") == ("missing", None, None)
+
+
+def test_observe_is_a_no_op_on_followers(data_dir, monkeypatch):
+    leading = {"value": False}
+    saver = AutoSaver(LocalMediaStore())
+    monkeypatch.setattr(AutoSaver, "running", True)  # without worker threads that would hit the API
+    saver._should_sweep = lambda: leading["value"]
+    job = {"id": "v1", "status": "completed", "expires_at": 9_999_999_999}
+    assert saver.observe(None, [job]) == 0
+    leading["value"] = True
+    assert saver.observe(None, [job]) == 1
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from lib.predictor import MIN_SAMPLES, CompletionPredictor
+
+T0 = 1_700_000_000
+
+
+def _done(video_id: str, latency: float, **extra) -> dict:
+    job = {"id": video_id, "status": "completed", "model": "sora-2", "size": "720x1280", "seconds": "8"}
+    return {**job, "created_at": T0, "completed_at": T0 + latency, **extra}
+
+
+def _running(video_id: str = "live", progress: int = 0, status: str = "in_progress") -> dict:
+    return {"id": video_id, "status": status, "progress": progress, "model": "sora-2", "size": "720x1280", "seconds": "8", "created_at": T0}
+
+
+def test_prior_until_enough_history():
+    predictor = CompletionPredictor()
+    prior = predictor.estimate("sora-2", "720x1280", "8")
+    assert (prior.basis, prior.samples, prior.mean_s) == ("prior", 0, 20 + 8 * 8.0)
+    assert predictor.estimate("sora-2", "1792x1024", "8").mean_s == pytest.approx(prior.mean_s * 1.5)
+
+    assert predictor.observe_jobs([_done(str(i), 100 + 10 * i) for i in range(MIN_SAMPLES)]) == MIN_SAMPLES
+    assert predictor.observe_jobs([_done("0", 100)]) == 0  # ids train once
+    learned = predictor.estimate("sora-2", "720x1280", "8")
+    assert (learned.basis, learned.samples, learned.mean_s) == ("model+size+seconds", MIN_SAMPLES, 110)
+    assert predictor.estimate("sora-2", "1280x720", "8").basis == "model+seconds"
+
+
+def test_eta_blends_history_with_observed_progress():
+    predictor = CompletionPredictor()
+    predictor.observe_jobs([_done(str(i), 200) for i in range(MIN_SAMPLES)])
+    job = _running()
+    assert predictor.eta(job, now=T0 + 50) == pytest.approx(150)  # history only
+
+    predictor.observe_tick(_running(progress=10), now=T0 + 20)
+    predictor.observe_tick(_running(progress=50), now=T0 + 60)  # 1% per second
+    # Progress says 50s left; at 50% it is weighted equally with history (140s left).
+    assert predictor.eta(job, now=T0 + 60) == pytest.approx(0.5 * 50 + 0.5 * 140)
+
+
+def test_poll_delay_sleeps_until_near_the_predicted_finish():
+    predictor = CompletionPredictor()
+    predictor.observe_jobs([_done(str(i), latency) for i, latency in enumerate((90, 100, 110))])
+    job = _running()
+    assert predictor.next_poll_delay(job, now=T0) == 30.0  # capped at max_s
+    assert predictor.next_poll_delay(job, now=T0 + 80) == pytest.approx(10.0)  # 20s left minus 10s spread
+    assert predictor.next_poll_delay(job, now=T0 + 200) == 2.0  # overdue: poll at min_s
+    assert predictor.next_poll_delay({"id": "x"}) == 2.0  # undated
+
+
+def test_queue_time_is_learned_from_ticks_and_used_once_started():
+    predictor = CompletionPredictor()
+    for i in range(MIN_SAMPLES):
+        video_id = f"q{i}"
+        predictor.observe_tick(_running(video_id, status="queued"), now=T0 + 5)
+        predictor.observe_tick(_running(video_id, progress=1), now=T0 + 30)  # waited 30s in the queue
+        predictor.observe_jobs([_done(video_id, 130)])
+    assert predictor._learned("queue", "sora-2", "720x1280", "8").mean_s == 30
+    assert predictor._learned("render", "sora-2", "720x1280", "8").mean_s == 100
+
+    # This job waited 90s; once it starts it needs the 100s render, not 130s minus what elapsed.
+    predictor.observe_tick(_running(status="queued"), now=T0 + 60)
+    predictor.observe_tick(_running(progress=1), now=T0 + 90)
+    assert predictor.eta(_running(progress=1), now=T0 + 100) == pytest.approx(90, abs=1)
+
+    # A job first seen mid-render has no known queue time and trains only the total.
+    predictor.observe_tick(_running("late", progress=40), now=T0 + 60)
+    predictor.observe_jobs([_done("late", 130)])
+    assert predictor._learned("queue", "sora-2", "720x1280", "8").samples == MIN_SAMPLES
+
+
+def test_processes_merge_training_instead_of_overwriting(data_dir):
+    path = str(data_dir / "predictor.json")
+    app, cli = CompletionPredictor(path), CompletionPredictor(path)
+    app.observe_jobs([_done("a", 100), _done("shared", 100)])
+    cli.observe_jobs([_done("b", 200), _done("shared", 100)])
+
+    with open(path, encoding="utf-8") as fh:
+        saved = json.load(fh)
+    assert sorted(saved["seen"]) == ["a", "b", "shared"]
+    assert saved["latency"]["sora-2|720x1280|8"][0] == 3  # "shared" counted once
+    assert cli.estimate("sora-2", "720x1280", "8").mean_s == pytest.approx(400 / 3)
+    assert CompletionPredictor(path).estimate("sora-2", "720x1280", "8").samples == 3
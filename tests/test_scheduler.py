@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from lib.scheduler import PRIORITY_BULK, AdmissionRejected, SubmissionScheduler, _parse_limits
+
+
+def _acquire_in_thread(scheduler: SubmissionScheduler, admitted: list, name: str, *args, **kwargs) -> threading.Thread:
+    def run() -> None:
+        admitted.append((name, scheduler.acquire(*args, **kwargs)))
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def _wait_queued(scheduler: SubmissionScheduler, depth: int) -> None:
+    deadline = time.monotonic() + 5
+    while scheduler.stats()["queue_depth"] < depth and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_per_model_limit_queues_until_release():
+    scheduler = SubmissionScheduler(model_limits={"sora-2": 1})
+    first = scheduler.acquire("sora-2", "720x1280")
+    other_model = scheduler.acquire("sora-2-pro", "720x1280", timeout=0.1)  # not limited
+    admitted: list = []
+    waiter = _acquire_in_thread(scheduler, admitted, "second", "sora-2", "720x1280")
+    _wait_queued(scheduler, 1)
+    assert not admitted
+    scheduler.release(first)
+    waiter.join(5)
+    assert [name for name, _ in admitted] == ["second"]
+    scheduler.release(other_model)
+    assert scheduler.stats()["in_flight"] == {"model:sora-2": 1, "size:720x1280": 1}
+
+
+def test_interactive_waiters_are_served_before_earlier_bulk_ones():
+    scheduler = SubmissionScheduler(model_limits={"sora-2": 1})
+    held = scheduler.acquire("sora-2", "720x1280")
+    admitted: list = []
+    bulk = _acquire_in_thread(scheduler, admitted, "bulk", "sora-2", "720x1280", priority=PRIORITY_BULK)
+    _wait_queued(scheduler, 1)
+    interactive = _acquire_in_thread(scheduler, admitted, "interactive", "sora-2", "720x1280")
+    _wait_queued(scheduler, 2)
+    assert scheduler.stats()["queued_by_priority"] == {"bulk": 1, "interactive": 1}
+
+    scheduler.release(held)
+    interactive.join(5)
+    scheduler.release(admitted[0][1])
+    bulk.join(5)
+    assert [name for name, _ in admitted] == ["interactive", "bulk"]
+
+
+def test_bulk_work_leaves_the_interactive_reserve_free():
+    scheduler = SubmissionScheduler(model_limits={"sora-2": 2}, interactive_reserve=1)
+    scheduler.acquire("sora-2", "720x1280", priority=PRIORITY_BULK)
+    with pytest.raises(AdmissionRejected, match="Waited"):
+        scheduler.acquire("sora-2", "720x1280", priority=PRIORITY_BULK, timeout=0.05)
+    scheduler.acquire("sora-2", "720x1280", timeout=0.05)  # interactive may take the reserved slot
+    assert scheduler.stats()["rejected"] == 1
+
+
+def test_full_queue_rejects_immediately():
+    scheduler = SubmissionScheduler(model_limits={"sora-2": 1}, max_queue=1)
+    held = scheduler.acquire("sora-2", "720x1280")
+    admitted: list = []
+    waiter = _acquire_in_thread(scheduler, admitted, "queued", "sora-2", "720x1280")
+    _wait_queued(scheduler, 1)
+    with pytest.raises(AdmissionRejected, match="queue is full"):
+        scheduler.acquire("sora-2", "720x1280")
+    scheduler.release(held)
+    waiter.join(5)
+    assert scheduler.stats()["admitted"] == 2
+
+
+def test_parse_limits_skips_malformed_entries():
+    assert _parse_limits("sora-2=4, sora-2-pro=0,bad,x=y") == {"sora-2": 4, "sora-2-pro": 1}
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from lib.search import PromptIndex, build_match_query
+
+
+def _index(data_dir) -> PromptIndex:
+    return PromptIndex(str(data_dir / "prompts.db"))
+
+
+def test_match_query_requires_every_word_and_prefixes_the_last():
+    assert build_match_query("Red fo") == '"Red" AND "fo"*'
+    assert build_match_query('"; DROP') == '"DROP"*'  # punctuation never reaches FTS5
+    assert build_match_query("  !? ") is None
+
+
+def test_search_ranks_pages_and_counts(data_dir):
+    index = _index(data_dir)
+    index.index_jobs(
+        [
+            {"id": "v1", "prompt": "a red fox in the snow", "created_at": 100},
+            {"id": "v2", "prompt": "red fox, red fox, red fox", "created_at": 200},
+            {"id": "v3", "prompt": "a blue whale", "created_at": 300},
+        ]
+    )
+    rows, total = index.search("red fo", limit=1)
+    assert (total, [r["id"] for r in rows]) == (2, ["v2"])  # more matches rank first
+    rows, _ = index.search("red fo", limit=1, offset=1)
+    assert [r["id"] for r in rows] == ["v1"]
+    assert "**" in rows[0]["snippet"]
+    assert index.search("cafe")[1] == 0
+
+
+def test_full_prompts_win_and_listings_fill_in_metadata(data_dir):
+    index = _index(data_dir)
+    index.index_jobs([{"id": "v1", "prompt": "a cat"}], prompts={"v1": "a cat wearing a café hat"})
+    index.index_jobs([{"id": "v1", "prompt": "", "status": "completed", "model": "sora-2"}])  # listing without a prompt
+    rows, _ = index.search("cafe hat")  # diacritics are folded
+    assert rows[0]["prompt"] == "a cat wearing a café hat"
+    assert (rows[0]["status"], rows[0]["model"]) == ("completed", "sora-2")
+
+
+def test_index_persists_and_remove_drops_rows(data_dir):
+    index = _index(data_dir)
+    index.index_jobs([{"id": "v1", "prompt": "lighthouse at dusk"}, {"id": None, "prompt": "ignored"}])
+    reopened = _index(data_dir)
+    assert len(reopened) == 1
+    reopened.remove("v1")
+    assert reopened.search("lighthouse") == ([], 0)
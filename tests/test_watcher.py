@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import time
+
+import lib.watcher as watcher_mod
+from lib.watcher import SYSTEM_OWNER, JobWatcher, Watch, max_wall_time_s
+
+
+def _running(video_id: str) -> dict:
+    return {"id": video_id, "status": "in_progress", "progress": 10}
+
+
+def _wait_done(watch: Watch) -> Watch:
+    deadline = time.monotonic() + 5
+    while watch.active and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return watch
+
+
+def _start(watcher: JobWatcher, video_id: str, owner: str, **kwargs) -> Watch:
+    return watcher.start(None, video_id, owner, fetch=_running, interval=lambda job: 0.01, **kwargs)
+
+
+def test_deadline_scales_with_model_and_duration(monkeypatch):
+    assert max_wall_time_s("sora-2", 4) == 600 + 30 * 4
+    assert max_wall_time_s("sora-2-pro", "bad") == 1200 + 90 * 8
+    monkeypatch.setenv("SORA_POLL_DEADLINE_SCALE", "0.5")
+    assert max_wall_time_s("unknown", 10) == (1200 + 60 * 10) / 2
+
+
+def test_watch_times_out_at_its_deadline(monkeypatch):
+    monkeypatch.setenv("SORA_POLL_DEADLINE_SCALE", "0.0001")  # 0.06s for sora-2
+    watch = _wait_done(_start(JobWatcher(), "slow", "session", model="sora-2", seconds=0))
+    assert watch.state == "timed_out"
+    assert "slow" in watch.error
+
+
+def test_stop_cancels_only_once_every_owner_left():
+    watcher = JobWatcher()
+    watch = _start(watcher, "v1", "a")
+    _start(watcher, "v1", "b")
+    assert not watcher.stop("v1", "a")
+    assert watch.active
+    assert watcher.stop("v1", "b")
+    assert _wait_done(watch).state == "cancelled"
+    assert watch.error == "stopped watching"
+
+
+def test_reaper_cancels_watches_of_departed_sessions():
+    watcher = JobWatcher()
+    alive = {"gone": False, "here": True}
+    watcher.set_liveness(lambda owner: alive[owner])
+    abandoned = _start(watcher, "v1", "gone")
+    kept = _start(watcher, "v2", "here")
+    system = _start(watcher, "v3", SYSTEM_OWNER)
+    assert watcher.reap() == 1
+    assert (_wait_done(abandoned).state, abandoned.error) == ("cancelled", "abandoned")
+    assert kept.active and system.active
+    assert watcher.stats()["reaped"] == 1
+    for video_id in ("v2", "v3"):
+        watcher.cancel(video_id)
+
+
+def test_stale_owners_are_reaped_without_a_liveness_check():
+    watcher = JobWatcher(owner_stale_s=0)
+    watch = _start(watcher, "v1", "session")
+    time.sleep(0.01)
+    assert watcher.reap() == 1
+    assert _wait_done(watch).error == "abandoned"
+
+
+def test_finished_watches_are_forgotten_after_the_result_ttl(monkeypatch):
+    watcher = JobWatcher()
+    watch = watcher.start(None, "v1", SYSTEM_OWNER, fetch=lambda video_id: {"id": video_id, "status": "completed"})
+    assert _wait_done(watch).state == "completed"
+    watcher.reap()
+    assert watcher.get("v1") is watch
+    monkeypatch.setattr(watcher_mod, "RESULT_TTL_S", -1)
+    watcher.reap()
+    assert watcher.get("v1") is None